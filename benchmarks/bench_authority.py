@@ -0,0 +1,72 @@
+"""
+Authority enrichment: a linear search of the dump per URI, one store query per URI, and
+AuthorityStore.enrich() (batched queries behind the LRU cache).
+
+    python benchmarks/bench_authority.py [records] [corpus path]
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.authority import AuthorityStore
+
+LABEL = 'http://www.w3.org/2004/02/skos/core#prefLabel'
+LINEAR_RECORDS = 100
+
+
+def write_dump(path, corpus):
+    uris = set('http://id.loc.gov/authorities/names/n{0}'.format(number) for number in range(10000, 100000))
+    for record in MODSReader(corpus, streaming=True):
+        uris.update(subject.uri for subject in record.subjects if subject.uri)
+    with open(path, 'w', encoding='utf-8') as dump:
+        for uri in sorted(uris):
+            dump.write('<{0}> <{1}> "Label for {2}"@en .\n'.format(uri, LABEL, uri.rsplit('/', 1)[-1]))
+    return len(uris)
+
+
+def linear(dump, corpus):
+    with open(dump, encoding='utf-8') as f:
+        lines = [line.split(' ', 1) for line in f]
+    for record in itertools.islice(MODSReader(corpus, streaming=True), LINEAR_RECORDS):
+        for item in record.names + record.subjects:
+            target = '<{0}>'.format(item.uri)
+            next((rest for subject, rest in lines if subject == target), None)
+
+
+def per_uri(store, corpus):
+    for record in MODSReader(corpus, streaming=True):
+        for item in record.names + record.subjects:
+            store.connection.execute('SELECT label FROM labels WHERE uri = ?', (item.uri,)).fetchone()
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    with tempfile.TemporaryDirectory() as directory:
+        dump = os.path.join(directory, 'labels.nt')
+        labels = write_dump(dump, path)
+        with AuthorityStore(os.path.join(directory, 'labels.db')) as store:
+            start = time.perf_counter()
+            store.load_ntriples(dump)
+            print('{0:10} {1} labels in {2:.1f} s'.format('load', labels, time.perf_counter() - start))
+            start = time.perf_counter()
+            linear(dump, path)
+            elapsed = time.perf_counter() - start
+            print('{0:10} {1:.1f} ms/record'.format('linear', elapsed * 1000 / LINEAR_RECORDS))
+            for name, func in (('per URI', lambda: per_uri(store, path)),
+                               ('enrich', lambda: sum(1 for _ in store.enrich(MODSReader(path, streaming=True))))):
+                start = time.perf_counter()
+                func()
+                elapsed = time.perf_counter() - start
+                print('{0:10} {1:.3f} ms/record'.format(name, elapsed * 1000 / count))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
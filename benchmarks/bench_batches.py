@@ -0,0 +1,65 @@
+"""
+Batches of a corpus where every 1000th record carries a 1 MB note: peak memory of batches
+of a fixed number of records against batches bounded by max_bytes. Each mode runs in its
+own process so peak memory is comparable.
+
+    python benchmarks/bench_batches.py [records] [corpus path]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+
+MODES = {'records': dict(max_records=2000),
+         'bytes': dict(max_records=2000, max_bytes=4 * 1024 * 1024)}
+
+
+def skew(path, skewed):
+    records = 0
+    with open(path, encoding='utf-8') as source, open(skewed, 'w', encoding='utf-8') as output:
+        for line in source:
+            if line.strip() == '</mods>':
+                if records % 1000 == 0:
+                    output.write('    <note>{0}</note>\n'.format('x' * 1024 * 1024))
+                records += 1
+            output.write(line)
+
+
+def run(path, mode):
+    start = time.perf_counter()
+    batches = records = 0
+    for batch in MODSReader(path).batches(**MODES[mode]):
+        for record in batch:
+            record.titles, record.note
+        batches += 1
+        records += len(batch)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print('{0:8} {1} records in {2} batches, {3:.1f} s, peak {4:.0f} MB'.format(
+        mode, records, batches, elapsed, peak))
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    skewed = path + '.skewed'
+    skew(path, skewed)
+    try:
+        for mode in sorted(MODES, reverse=True):
+            subprocess.check_call([sys.executable, __file__, '--run', skewed, mode])
+    finally:
+        os.remove(skewed)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--run']:
+        run(sys.argv[2], sys.argv[3])
+    else:
+        count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+        main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
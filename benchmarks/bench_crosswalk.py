@@ -0,0 +1,107 @@
+"""
+MODS to oai_dc crosswalk throughput: pymods.crosswalk against a minimal XSLT reference,
+applied both to each parsed record and, as in an external XSLT step, to each record
+serialized and reparsed.
+
+    python benchmarks/bench_crosswalk.py [records] [corpus path]
+"""
+
+import os
+import sys
+import time
+
+from lxml import etree
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.crosswalk import crosswalk, mods_to_dc, to_oai_dc
+
+XSLT = b'''<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform"
+    xmlns:mods="http://www.loc.gov/mods/v3" xmlns:xlink="http://www.w3.org/1999/xlink"
+    xmlns:oai_dc="http://www.openarchives.org/OAI/2.0/oai_dc/" xmlns:dc="http://purl.org/dc/elements/1.1/"
+    exclude-result-prefixes="mods xlink">
+  <xsl:template match="/mods:mods">
+    <oai_dc:dc>
+      <xsl:for-each select="mods:titleInfo">
+        <dc:title>
+          <xsl:if test="mods:nonSort"><xsl:value-of select="mods:nonSort"/><xsl:text> </xsl:text></xsl:if>
+          <xsl:value-of select="mods:title"/>
+          <xsl:if test="mods:subTitle">: <xsl:value-of select="mods:subTitle"/></xsl:if>
+        </dc:title>
+      </xsl:for-each>
+      <xsl:for-each select="mods:name">
+        <xsl:variable name="name">
+          <xsl:value-of select="mods:namePart[@type='family']"/>, <xsl:value-of select="mods:namePart[@type='given']"/>
+        </xsl:variable>
+        <xsl:choose>
+          <xsl:when test="not(mods:role) or mods:role/mods:roleTerm[.='Creator' or .='cre' or .='aut']">
+            <dc:creator><xsl:value-of select="$name"/></dc:creator>
+          </xsl:when>
+          <xsl:otherwise><dc:contributor><xsl:value-of select="$name"/></dc:contributor></xsl:otherwise>
+        </xsl:choose>
+      </xsl:for-each>
+      <xsl:for-each select="mods:subject[not(mods:geographicCode)]">
+        <dc:subject>
+          <xsl:for-each select="*"><xsl:if test="position() > 1">--</xsl:if><xsl:value-of select="."/></xsl:for-each>
+        </dc:subject>
+      </xsl:for-each>
+      <xsl:for-each select="mods:abstract | mods:note | mods:tableOfContents">
+        <dc:description><xsl:value-of select="."/></dc:description>
+      </xsl:for-each>
+      <xsl:for-each select="mods:originInfo/mods:publisher"><dc:publisher><xsl:value-of select="."/></dc:publisher></xsl:for-each>
+      <xsl:for-each select="mods:originInfo">
+        <xsl:choose>
+          <xsl:when test="*[@point='start'] and *[@point='end']">
+            <dc:date><xsl:value-of select="*[@point='start']"/> - <xsl:value-of select="*[@point='end']"/></dc:date>
+          </xsl:when>
+          <xsl:otherwise>
+            <xsl:for-each select="mods:dateIssued | mods:dateCreated"><dc:date><xsl:value-of select="."/></dc:date></xsl:for-each>
+          </xsl:otherwise>
+        </xsl:choose>
+      </xsl:for-each>
+      <xsl:for-each select="mods:typeOfResource | mods:genre"><dc:type><xsl:value-of select="."/></dc:type></xsl:for-each>
+      <xsl:for-each select="mods:physicalDescription/*"><dc:format><xsl:value-of select="."/></dc:format></xsl:for-each>
+      <xsl:for-each select="mods:identifier | mods:location/mods:url">
+        <dc:identifier><xsl:value-of select="."/></dc:identifier>
+      </xsl:for-each>
+      <xsl:for-each select="mods:language/mods:languageTerm[@type='code']">
+        <dc:language><xsl:value-of select="."/></dc:language>
+      </xsl:for-each>
+      <xsl:for-each select="mods:relatedItem/mods:titleInfo"><dc:relation><xsl:value-of select="mods:title"/></dc:relation></xsl:for-each>
+      <xsl:for-each select="mods:accessCondition">
+        <dc:rights><xsl:value-of select="."/></dc:rights>
+        <xsl:if test="@xlink:href"><dc:rights><xsl:value-of select="@xlink:href"/></dc:rights></xsl:if>
+      </xsl:for-each>
+    </oai_dc:dc>
+  </xsl:template>
+</xsl:stylesheet>'''
+
+
+def timed(name, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print('{0:28} {1:.2f} s ({2:.0f} records/s)'.format(name, elapsed, count / elapsed))
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    transform = etree.XSLT(etree.XML(XSLT))
+    records = list(MODSReader(path, streaming=True))
+    count = len(records)
+    print('{0} records, already parsed'.format(count))
+    timed('XSLT, serialize + reparse', count,
+          lambda: [transform(etree.fromstring(etree.tostring(record))) for record in records])
+    timed('XSLT on parsed record', count, lambda: [transform(record) for record in records])
+    timed('mods_to_dc', count, lambda: [mods_to_dc(record) for record in records])
+    timed('mods_to_dc + to_oai_dc', count, lambda: [to_oai_dc(mods_to_dc(record)) for record in records])
+    print('streaming from {0}, including parsing'.format(path))
+    timed('XSLT on parsed record', count, lambda: [transform(record) for record in MODSReader(path, streaming=True)])
+    timed('crosswalk(oai_dc=True)', count, lambda: list(crosswalk(MODSReader(path, streaming=True), oai_dc=True)))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
@@ -0,0 +1,52 @@
+"""
+Date range queries: filtering records by their date text on every query against one
+date_columns() pass followed by vectorized queries.
+
+    python benchmarks/bench_dates.py [records] [corpus path]
+"""
+
+import os
+import sys
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.dates import date_columns, date_key, overlapping
+
+QUERIES = [(18500101, 18991231), (19000101, 19451231), (19660101, 19661231), (20000101, 20201231)]
+
+
+def text_filter(path, start, end):
+    matches = 0
+    for record in MODSReader(path, streaming=True):
+        for date in record.dates or []:
+            found = date_key(date.text)
+            if found and found[0] <= end and found[1] >= start:
+                matches += 1
+                break
+    return matches
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    start = time.perf_counter()
+    for query in QUERIES:
+        text_filter(path, *query)
+    print('{0:22} {1:.2f} s'.format('filter per query', time.perf_counter() - start))
+    start = time.perf_counter()
+    columns = date_columns(MODSReader(path, streaming=True))
+    print('{0:22} {1:.2f} s'.format('date_columns', time.perf_counter() - start))
+    start = time.perf_counter()
+    for query in QUERIES:
+        len(overlapping(columns, *query))
+    print('{0:22} {1:.4f} s'.format('vectorized queries', time.perf_counter() - start))
+    start = time.perf_counter()
+    columns.start.argsort(kind='stable')
+    print('{0:22} {1:.4f} s'.format('sort by start', time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
@@ -0,0 +1,47 @@
+"""
+Dublin Core export throughput: DCExporter (one pass per record) against one
+DCRecord.get_element call per column.
+
+    python benchmarks/bench_dc_export.py [records] [corpus path]
+"""
+
+import os
+import sys
+import time
+
+from corpus import write_dc_corpus
+
+from pymods import OAIReader
+from pymods.export import DCExporter, TabularExporter
+
+ELEMENTS = ['{*}title', '{*}creator', '{*}subject', '{*}description', '{*}date', '{*}type', '{*}identifier',
+            '{*}language', '{*}rights']
+DELIMITERS = {'{*}subject': ';'}
+
+
+class GetElementExporter(TabularExporter):
+
+    def row(self, record):
+        record = record.metadata
+        return ['|'.join(record.get_element(elem, DELIMITERS.get(elem)) or []) for elem in ELEMENTS]
+
+
+def run(exporter, path):
+    start = time.perf_counter()
+    with open(os.devnull, 'w', newline='') as output:
+        written = exporter.export(OAIReader(path, streaming=True), output)
+    return written, time.perf_counter() - start
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_dc_corpus(path, count)
+    for name, exporter in (('get_element', GetElementExporter(ELEMENTS)),
+                           ('DCExporter', DCExporter(ELEMENTS, DELIMITERS))):
+        written, elapsed = run(exporter, path)
+        print('{0:12} {1} records in {2:.1f} s ({3:.0f} records/s)'.format(name, written, elapsed, written / elapsed))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-dc-{0}.xml'.format(count))
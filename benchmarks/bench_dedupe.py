@@ -0,0 +1,46 @@
+"""
+Duplicate detection: comparing every pair of records against Deduper's blocking and
+MinHash bands.
+
+    python benchmarks/bench_dedupe.py [records] [corpus path]
+"""
+
+import os
+import re
+import sys
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.dedupe import Deduper
+
+WORD = re.compile(r'\w+')
+
+
+def pairwise(path, threshold):
+    words = [set(WORD.findall(' '.join(record.titles + [name.text for name in record.names]).casefold()))
+             for record in MODSReader(path, streaming=True)]
+    pairs = 0
+    for first in range(len(words)):
+        for second in range(first + 1, len(words)):
+            union = len(words[first] | words[second])
+            if union and len(words[first] & words[second]) / union >= threshold:
+                pairs += 1
+    return pairs
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    start = time.perf_counter()
+    pairs = pairwise(path, 0.8)
+    print('{0:9} {1} pairs in {2:.1f} s'.format('pairwise', pairs, time.perf_counter() - start))
+    start = time.perf_counter()
+    clusters = Deduper(threshold=0.8).clusters(MODSReader(path, streaming=True))
+    print('{0:9} {1} clusters in {2:.1f} s'.format('Deduper', len(clusters), time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
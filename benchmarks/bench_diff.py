@@ -0,0 +1,55 @@
+"""
+Collection diff: loading both versions and comparing every property of every record
+against diff(), which compares fingerprints first and properties only for changed records.
+The new version has every 100th title edited.
+
+    python benchmarks/bench_diff.py [records] [corpus path]
+"""
+
+import itertools
+import os
+import sys
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.diff import diff, field_differences
+
+
+def edit(path, edited):
+    counter = itertools.count()
+    with open(path, encoding='utf-8') as source, open(edited, 'w', encoding='utf-8') as output:
+        for line in source:
+            if '<title>' in line and next(counter) % 100 == 0:
+                line = line.replace('<title>', '<title>Revised ', 1)
+            output.write(line)
+
+
+def compare_all(old_path, new_path):
+    old = dict((record.key, record) for record in MODSReader(old_path))
+    changed = 0
+    for record in MODSReader(new_path):
+        if field_differences(old.pop(record.key), record):
+            changed += 1
+    return changed
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    edited = path + '.edited'
+    edit(path, edited)
+    try:
+        for name, func in (('compare all', compare_all),
+                           ('diff', lambda old, new: len(list(diff(MODSReader(old), MODSReader(new)))))):
+            start = time.perf_counter()
+            changed = func(path, edited)
+            print('{0:12} {1} changed in {2:.1f} s'.format(name, changed, time.perf_counter() - start))
+    finally:
+        os.remove(edited)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
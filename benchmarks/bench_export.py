@@ -0,0 +1,31 @@
+"""
+Tabular export throughput.
+
+    python benchmarks/bench_export.py [records] [corpus path]
+"""
+
+import os
+import sys
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.export import TabularExporter
+
+COLUMNS = ['key', 'titles', 'names', 'dates', 'subjects', 'subjects.uri', 'genre', 'purl', 'rights.uri']
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    start = time.perf_counter()
+    with open(os.devnull, 'w', newline='') as output:
+        written = TabularExporter(COLUMNS).export(MODSReader(path, streaming=True), output)
+    elapsed = time.perf_counter() - start
+    print('{0} records in {1:.1f} s ({2:.0f} records/s)'.format(written, elapsed, written / elapsed))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
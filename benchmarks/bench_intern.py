@@ -0,0 +1,45 @@
+"""
+Memory held by buffered SQLiteSink rows (pymods.sink.record_rows) with and without
+string interning.
+
+    python benchmarks/bench_intern.py [records] [corpus path]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.record import interned
+from pymods.sink import record_rows
+
+
+def buffered_rows(path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = [record_rows(record) for record in MODSReader(path, streaming=True)]
+    elapsed = time.perf_counter() - start
+    # the readers' parse trees are released by now, so what remains is held by rows
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(rows), size, elapsed
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    for name in ('plain', 'interned'):
+        if name == 'interned':
+            with interned():
+                records, size, elapsed = buffered_rows(path)
+        else:
+            records, size, elapsed = buffered_rows(path)
+        print('{0:9} {1} records: {2:.1f} MB held, {3:.1f} s'.format(name, records, size / 1e6, elapsed))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
@@ -0,0 +1,46 @@
+"""
+Parser presets: time and peak memory of reading the corpus into one tree and reading
+titles, names and subjects of every record, for each preset. Each preset runs in its own
+process so peak memory is comparable.
+
+    python benchmarks/bench_presets.py [records] [corpus path]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.reader import PARSER_PRESETS
+
+
+def run(path, preset, streaming):
+    start = time.perf_counter()
+    records = 0
+    for record in MODSReader(path, streaming=streaming, preset=preset):
+        record.titles, record.names, record.subjects
+        records += 1
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print('{0:8} {1:9} {2} records in {3:.2f} s, peak {4:.0f} MB'.format(
+        preset, 'streaming' if streaming else 'tree', records, elapsed, peak))
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    for streaming in ('', '1'):
+        for preset in sorted(PARSER_PRESETS):
+            subprocess.check_call([sys.executable, __file__, '--run', path, preset, streaming])
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--run']:
+        run(sys.argv[2], sys.argv[3], bool(sys.argv[4]))
+    else:
+        count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+        main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
@@ -0,0 +1,41 @@
+"""
+Field coverage: one profile() pass over the corpus against one accessor scan per field.
+
+    python benchmarks/bench_profile.py [records] [corpus path]
+"""
+
+import os
+import sys
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.profiler import profile
+
+FIELDS = ['abstract', 'genre', 'language', 'dates', 'identifiers', 'subjects', 'names', 'rights']
+
+
+def scan_per_field(path):
+    coverage = {}
+    for field in FIELDS:
+        coverage[field] = sum(1 for record in MODSReader(path, streaming=True) if getattr(record, field))
+    return coverage
+
+
+def one_pass(path):
+    return profile(MODSReader(path, streaming=True)).records
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    for name, func in (('scan per field', scan_per_field), ('profile', one_pass)):
+        start = time.perf_counter()
+        func(path)
+        print('{0:14} {1:.1f} s'.format(name, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
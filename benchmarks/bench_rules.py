@@ -0,0 +1,61 @@
+"""
+Quality rule throughput: one RuleSet pass over the corpus against one pass per rule.
+
+    python benchmarks/bench_rules.py [records] [corpus path]
+"""
+
+import os
+import sys
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.rules import HAS_LCSH_URI, HAS_PURL, HAS_RIGHTSSTATEMENTS_URI, HAS_TYPE_OF_RESOURCE, RuleSet, rule
+
+
+def _not_empty(value):
+    return bool(value)
+
+
+def _single(value):
+    return value is not None and len(value) == 1
+
+
+def _short(value):
+    return all(len(getattr(item, 'text', item) or '') < 500 for item in value or [])
+
+
+RULES = [HAS_TYPE_OF_RESOURCE, HAS_RIGHTSSTATEMENTS_URI, HAS_LCSH_URI, HAS_PURL]
+for name in ('titles', 'names', 'dates', 'genre', 'language', 'abstract', 'subjects', 'identifiers'):
+    RULES.append(rule('has_' + name, name, _not_empty))
+for name in ('titles', 'type_of_resource', 'purl', 'rights'):
+    RULES.append(rule('single_' + name, name, _single))
+for name in ('titles', 'abstract', 'note', 'publication_place'):
+    RULES.append(rule('short_' + name, name, _short))
+
+
+def one_pass(path):
+    return RuleSet(RULES).report(MODSReader(path, streaming=True)).records
+
+
+def pass_per_rule(path):
+    records = 0
+    for each_rule in RULES:
+        records = RuleSet([each_rule]).report(MODSReader(path, streaming=True)).records
+    return records
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    for name, func in (('pass per rule', pass_per_rule), ('RuleSet', one_pass)):
+        start = time.perf_counter()
+        records = func(path)
+        elapsed = time.perf_counter() - start
+        print('{0:14} {1} records, {2} rules in {3:.1f} s'.format(name, records, len(RULES), elapsed))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
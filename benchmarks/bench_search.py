@@ -0,0 +1,50 @@
+"""
+Phrase search: rescanning the corpus with MODSReader for every query against a
+SearchIndex built once.
+
+    python benchmarks/bench_search.py [records] [corpus path]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+
+from pymods import MODSReader
+from pymods.search import SearchIndex, field_texts
+
+QUERIES = ['garden census', 'river survey', 'church school', 'harbor mill']
+
+
+def rescan(path, phrase):
+    return [record.key for record in MODSReader(path, streaming=True)
+            if any(phrase in text.casefold() for text in field_texts(record))]
+
+
+def main(count, path):
+    if not os.path.exists(path):
+        write_corpus(path, count)
+    start = time.perf_counter()
+    for query in QUERIES:
+        rescan(path, query)
+    print('{0:16} {1:.2f} s'.format('rescan per query', time.perf_counter() - start))
+    with tempfile.TemporaryDirectory() as directory:
+        with SearchIndex(os.path.join(directory, 'index.db')) as index:
+            start = time.perf_counter()
+            index.update(MODSReader(path))
+            print('{0:16} {1:.2f} s, {2:.1f} MB'.format('index', time.perf_counter() - start,
+                                                         os.path.getsize(index.path) / 1e6))
+            start = time.perf_counter()
+            index.update(MODSReader(path))
+            print('{0:16} {1:.2f} s'.format('unchanged update', time.perf_counter() - start))
+            start = time.perf_counter()
+            for query in QUERIES:
+                index.search('"{0}"'.format(query), limit=None)
+            print('{0:16} {1:.3f} s'.format('phrase queries', time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(count, sys.argv[2] if len(sys.argv) > 2 else '/tmp/pymods-bench-{0}.xml'.format(count))
@@ -0,0 +1,127 @@
+"""
+Synthetic MODS collection and oai_dc ListRecords generators for benchmarks.
+
+    python benchmarks/corpus.py 1000000 /tmp/corpus.xml [mods|dc]
+"""
+
+import random
+import sys
+from xml.sax.saxutils import escape
+
+WORDS = ('river', 'letter', 'county', 'map', 'survey', 'school', 'church', 'railroad', 'harbor', 'family',
+         'photograph', 'report', 'garden', 'census', 'court', 'mill', 'bridge', 'festival', 'union', 'island')
+FAMILIES = ('Smith', 'Garcia', 'Nguyen', 'Okafor', 'Miller', 'Kowalski', 'Rossi', 'Haddad', 'Tanaka', 'Dubois')
+GIVEN = ('Ana', 'John', 'Mei', 'Chidi', 'Laura', 'Piotr', 'Giulia', 'Omar', 'Yuki', 'Claire')
+RIGHTS = ('http://rightsstatements.org/vocab/InC/1.0/', 'http://rightsstatements.org/vocab/NoC-US/1.0/',
+          'http://rightsstatements.org/vocab/CNE/1.0/')
+
+HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+          '<mods:modsCollection xmlns="http://www.loc.gov/mods/v3" xmlns:mods="http://www.loc.gov/mods/v3" '
+          'xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n')
+FOOTER = '</mods:modsCollection>\n'
+
+DC_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><responseDate>2020-01-01T00:00:00Z</responseDate>'
+             '<request verb="ListRecords" metadataPrefix="oai_dc">http://localhost/oai</request><ListRecords>\n')
+DC_FOOTER = '</ListRecords></OAI-PMH>\n'
+
+
+def words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def record(rng, number):
+    year = rng.randint(1800, 2020)
+    parts = ['  <mods version="3.4">',
+             '    <identifier type="fedora">bench:{0}</identifier>'.format(number),
+             '    <identifier type="IID">BENCH_{0:08d}</identifier>'.format(number),
+             '    <titleInfo><nonSort>The</nonSort><title>{0}</title><subTitle>{1}</subTitle></titleInfo>'.format(
+                 words(rng, 4).title(), words(rng, 3))]
+    for _ in range(rng.randint(1, 3)):
+        parts.append('    <name type="personal" authority="lcnaf" authorityURI="http://id.loc.gov/authorities/names" '
+                     'valueURI="http://id.loc.gov/authorities/names/n{0}">'
+                     '<namePart type="family">{1}</namePart><namePart type="given">{2}</namePart>'
+                     '<role><roleTerm type="text" authority="marcrelator">Creator</roleTerm>'
+                     '<roleTerm type="code" authority="marcrelator">cre</roleTerm></role></name>'.format(
+                         rng.randint(10000, 99999), rng.choice(FAMILIES), rng.choice(GIVEN)))
+    parts.append('    <typeOfResource>{0}</typeOfResource>'.format(rng.choice(('text', 'still image', 'cartographic'))))
+    parts.append('    <genre authority="aat" valueURI="http://vocab.getty.edu/page/aat/300{0}">{1}</genre>'.format(
+        rng.randint(10000, 99999), rng.choice(WORDS)))
+    if rng.random() < 0.2:
+        parts.append('    <originInfo><dateCreated point="start">{0}</dateCreated>'
+                     '<dateCreated point="end">{1}</dateCreated><publisher>Bench Press</publisher></originInfo>'.format(
+                         year, year + rng.randint(1, 30)))
+    else:
+        parts.append('    <originInfo><dateIssued encoding="w3cdtf">{0}-{1:02d}-{2:02d}</dateIssued>'
+                     '<publisher>Bench Press</publisher></originInfo>'.format(
+                         year, rng.randint(1, 12), rng.randint(1, 28)))
+    parts.append('    <language><languageTerm type="text">English</languageTerm>'
+                 '<languageTerm type="code" authority="iso639-2b">eng</languageTerm></language>')
+    parts.append('    <abstract>{0}</abstract>'.format(escape(words(rng, rng.randint(10, 60)))))
+    for _ in range(rng.randint(1, 5)):
+        parts.append('    <subject authority="lcsh" authorityURI="http://id.loc.gov/authorities/subjects" '
+                     'valueURI="http://id.loc.gov/authorities/subjects/sh{0}"><topic>{1}</topic>'
+                     '<geographic>{2}</geographic></subject>'.format(
+                         rng.randint(80000000, 99999999), words(rng, 2).capitalize(), rng.choice(FAMILIES)))
+    parts.append('    <note>{0}</note>'.format(words(rng, 8)))
+    parts.append('    <accessCondition type="use and reproduction" xlink:href="{0}">Rights statement</accessCondition>'
+                 .format(rng.choice(RIGHTS)))
+    parts.append('    <location><url>http://purl.flvc.org/bench/{0}</url></location>'.format(number))
+    parts.append('  </mods>\n')
+    return '\n'.join(parts)
+
+
+def dc_record(rng, number):
+    year = rng.randint(1800, 2020)
+    parts = ['  <record><header><identifier>oai:bench:{0}</identifier><datestamp>2020-01-01</datestamp></header>'
+             '<metadata><oai_dc:dc xmlns:oai_dc="http://www.openarchives.org/OAI/2.0/oai_dc/" '
+             'xmlns:dc="http://purl.org/dc/elements/1.1/">'.format(number),
+             '    <dc:title>The {0}: {1}</dc:title>'.format(words(rng, 4).title(), words(rng, 3))]
+    for _ in range(rng.randint(1, 3)):
+        parts.append('    <dc:creator>{0}, {1}</dc:creator>'.format(rng.choice(FAMILIES), rng.choice(GIVEN)))
+    parts.append('    <dc:subject>{0}</dc:subject>'.format(
+        '; '.join(words(rng, 2).capitalize() for _ in range(rng.randint(1, 5)))))
+    parts.append('    <dc:description>{0}</dc:description>'.format(escape(words(rng, rng.randint(10, 60)))))
+    parts.append('    <dc:publisher>Bench Press</dc:publisher>')
+    parts.append('    <dc:date>{0}-{1:02d}-{2:02d}</dc:date>'.format(year, rng.randint(1, 12), rng.randint(1, 28)))
+    parts.append('    <dc:type>{0}</dc:type>'.format(rng.choice(('Text', 'StillImage', 'Cartographic'))))
+    parts.append('    <dc:format>{0}</dc:format>'.format(rng.choice(WORDS)))
+    parts.append('    <dc:identifier>BENCH_{0:08d}</dc:identifier>'.format(number))
+    parts.append('    <dc:identifier>http://purl.flvc.org/bench/{0}</dc:identifier>'.format(number))
+    parts.append('    <dc:language>eng</dc:language>')
+    parts.append('    <dc:rights>{0}</dc:rights>'.format(rng.choice(RIGHTS)))
+    parts.append('  </oai_dc:dc></metadata></record>\n')
+    return '\n'.join(parts)
+
+
+def write_corpus(path, count, seed=0):
+    """
+    :param path: Output file.
+    :param count: Number of records.
+    :param seed: Random seed.
+    """
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER)
+        for number in range(count):
+            f.write(record(rng, number))
+        f.write(FOOTER)
+
+
+def write_dc_corpus(path, count, seed=0):
+    """
+    :param path: Output file.
+    :param count: Number of records.
+    :param seed: Random seed.
+    """
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(DC_HEADER)
+        for number in range(count):
+            f.write(dc_record(rng, number))
+        f.write(DC_FOOTER)
+
+
+if __name__ == '__main__':
+    writer = write_dc_corpus if sys.argv[3:] == ['dc'] else write_corpus
+    writer(sys.argv[2], int(sys.argv[1]))
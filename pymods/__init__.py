@@ -184,9 +184,27 @@ Get URLs for objects using a No Copyright US rightsstatement.org URI
 
 '''
 
+from .authority import *
+from .checkpoint import *
 from .constants import *
+from .crosswalk import *
+from .dates import *
+from .dedupe import *
+from .diff import *
 from .exceptions import *
+from .export import *
+from .fingerprint import *
+from .harvest import *
+from .parallel import *
+from .profiler import *
 from .reader import *
 from .record import *
+from .rules import *
+from .scanner import *
+from .search import *
+from .sink import *
+from .transform import *
+from .validate import *
+from .writer import *
 
 __version__ = '2.0.13'
@@ -0,0 +1,285 @@
+"""
+Local authority label cache. Labels from authority dumps (e.g. LC Name Authority File,
+LCSH or FAST) in N-Triples or JSON-LD are loaded into an SQLite key-value file, which is
+read through an in-process LRU cache, so names and subjects can be enriched with their
+authorized labels without network access.
+"""
+
+import collections
+import contextlib
+import gzip
+import json
+import re
+import sqlite3
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+# label predicates by preference
+LABEL_PREDICATES = ('http://www.loc.gov/mads/rdf/v1#authoritativeLabel',
+                    'http://www.w3.org/2004/02/skos/core#prefLabel',
+                    'http://www.w3.org/2000/01/rdf-schema#label')
+
+Authorized = collections.namedtuple('Authorized', 'item label')
+__pdoc__['Authorized.item'] = 'The Name or Subject element.'
+__pdoc__['Authorized.label'] = "The authorized label for the item's uri, or None."
+
+Enriched = collections.namedtuple('Enriched', 'record names subjects')
+__pdoc__['Enriched.record'] = 'The record.'
+__pdoc__['Enriched.names'] = 'List of Authorized elements, one per record.names element.'
+__pdoc__['Enriched.subjects'] = 'List of Authorized elements, one per record.subjects element.'
+
+_TRIPLE = re.compile(r'^<([^>]*)>\s+<([^>]*)>\s+"((?:[^"\\]|\\.)*)"(?:@([A-Za-z0-9-]+)|\^\^<[^>]*>)?\s*\.\s*$')
+_ESCAPE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+def normalize_uri(uri):
+    """
+    :param uri: An authority URI.
+    :return: The URI with surrounding whitespace, an https scheme, a trailing slash or
+        a .html or .json suffix removed, so that variants of one URI match.
+    """
+    uri = uri.strip()
+    if uri.startswith('https://'):
+        uri = 'http://' + uri[8:]
+    for suffix in ('.html', '.json', '/'):
+        if uri.endswith(suffix):
+            uri = uri[:-len(suffix)]
+    return uri
+
+
+def _unescape(literal):
+    if '\\' not in literal:
+        return literal
+    return _ESCAPE.sub(lambda match: chr(int(match.group(1) or match.group(2), 16)) if not match.group(3)
+                       else _ESCAPES.get(match.group(3), match.group(3)), literal)
+
+
+def _rank(predicate_rank, language):
+    # labels in English, or without a language, are preferred for each predicate
+    english = not language or language.lower() == 'en' or language.lower().startswith('en-')
+    return predicate_rank * 2 + (0 if english else 1)
+
+
+@contextlib.contextmanager
+def _unclosed(source):
+    yield source
+
+
+def _open(source):
+    if hasattr(source, 'read'):
+        # leave file objects open for the caller
+        return _unclosed(source)
+    if source.endswith('.gz'):
+        return gzip.open(source, 'rt', encoding='utf-8')
+    return open(source, encoding='utf-8')
+
+
+def _local_name(iri):
+    return re.split(r'[#/:]', iri)[-1]
+
+
+class AuthorityStore(object):
+    """
+    SQLite backed map of authority URIs to labels, read through an LRU cache.
+    """
+
+    def __init__(self, path, cache_size=100000):
+        """
+        :param path: Location of the SQLite file. Created if it does not exist.
+        :param cache_size: Number of labels kept in memory.
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS labels (uri TEXT PRIMARY KEY, label TEXT NOT NULL, '
+                                'rank INTEGER NOT NULL) WITHOUT ROWID')
+        self._cache = collections.OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT count(*) FROM labels').fetchone()[0]
+
+    def load_ntriples(self, source, predicates=LABEL_PREDICATES, batch_size=50000):
+        """
+        Load labels from an N-Triples dump. Only triples with a literal object and one of
+        predicates are read; other lines are skipped without being fully parsed.
+
+        :param source: A file path (.nt, or gzipped .nt.gz) or a text file object.
+        :param predicates: Label predicate IRIs, most preferred first.
+        :param batch_size: Number of labels per transaction.
+        :return: Number of labels read.
+        """
+        ranks = dict((predicate, rank) for rank, predicate in enumerate(predicates))
+        markers = tuple('<{0}>'.format(predicate) for predicate in predicates)
+
+        def labels():
+            with _open(source) as lines:
+                for line in lines:
+                    if not any(marker in line for marker in markers):
+                        continue
+                    match = _TRIPLE.match(line)
+                    if match and match.group(2) in ranks:
+                        subject, predicate, literal, language = match.groups()
+                        yield subject, _unescape(literal), _rank(ranks[predicate], language)
+
+        return self._load(labels(), batch_size)
+
+    def load_jsonld(self, source, predicates=LABEL_PREDICATES, batch_size=50000):
+        """
+        Load labels from a JSON-LD dump: a single document (a node, a list of nodes, or an
+        object with an @graph), or one document per line. Property names are matched on
+        their local name (e.g. 'prefLabel'), so compacted and expanded documents both work.
+
+        :param source: A file path (.json/.jsonld, or gzipped .gz) or a text file object.
+        :param predicates: Label predicate IRIs, most preferred first.
+        :param batch_size: Number of labels per transaction.
+        :return: Number of labels read.
+        """
+        ranks = {}
+        for rank, predicate in enumerate(predicates):
+            ranks.setdefault(_local_name(predicate), rank)
+
+        def nodes(document):
+            if isinstance(document, list):
+                for item in document:
+                    for node in nodes(item):
+                        yield node
+            elif isinstance(document, dict):
+                if '@graph' in document:
+                    for node in nodes(document['@graph']):
+                        yield node
+                if '@id' in document:
+                    yield document
+
+        def documents():
+            with _open(source) as lines:
+                first = lines.readline()
+                try:
+                    # one document per line
+                    yield json.loads(first)
+                except ValueError:
+                    yield json.loads(first + lines.read())
+                    return
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+
+        def labels():
+            for document in documents():
+                for node in nodes(document):
+                    for key, values in node.items():
+                        rank = ranks.get(_local_name(key))
+                        if rank is None:
+                            continue
+                        for value in values if isinstance(values, list) else [values]:
+                            if isinstance(value, dict):
+                                if '@value' not in value:
+                                    continue
+                                yield node['@id'], value['@value'], _rank(rank, value.get('@language'))
+                            else:
+                                yield node['@id'], value, _rank(rank, None)
+
+        return self._load(labels(), batch_size)
+
+    def _load(self, labels, batch_size):
+        cursor = self.connection.cursor()
+        # keep the existing label unless the new one ranks higher (works before SQLite's upsert, 3.24)
+        statement = ('INSERT OR REPLACE INTO labels SELECT ?, ?, ? '
+                     'WHERE NOT EXISTS (SELECT 1 FROM labels WHERE uri = ? AND rank <= ?)')
+        count = 0
+        batch = []
+        for uri, label, rank in labels:
+            uri = normalize_uri(uri)
+            batch.append((uri, label, rank, uri, rank))
+            if len(batch) == batch_size:
+                count += self._write(cursor, statement, batch)
+        count += self._write(cursor, statement, batch)
+        self._cache.clear()
+        return count
+
+    def _write(self, cursor, statement, batch):
+        cursor.execute('BEGIN')
+        try:
+            cursor.executemany(statement, batch)
+        except BaseException:
+            cursor.execute('ROLLBACK')
+            raise
+        cursor.execute('COMMIT')
+        count = len(batch)
+        del batch[:]
+        return count
+
+    def label(self, uri):
+        """
+        :param uri: An authority URI.
+        :return: The URI's label, or None.
+        """
+        return self.labels([uri])[uri]
+
+    def labels(self, uris):
+        """
+        Look up many URIs, reading the ones not in the cache with one query per 500.
+
+        :param uris: An iterable of authority URIs.
+        :return: A dict of each URI to its label, or None.
+        """
+        cache = self._cache
+        found = {}
+        missing = {}
+        for uri in uris:
+            if uri in found or uri in missing:
+                continue
+            key = normalize_uri(uri)
+            try:
+                found[uri] = cache[key]
+                cache.move_to_end(key)
+            except KeyError:
+                missing[uri] = key
+        keys = list(set(missing.values()))
+        fetched = dict.fromkeys(keys)
+        # stay under SQLite's default limit on bound parameters
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            fetched.update(self.connection.execute('SELECT uri, label FROM labels WHERE uri IN ({0})'.format(
+                ', '.join('?' * len(chunk))), chunk))
+        for uri, key in missing.items():
+            found[uri] = fetched[key]
+        cache.update(fetched)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return found
+
+    def enrich(self, records, batch_size=500):
+        """
+        Pair the names and subjects of records with their authorized labels, looking up the
+        URIs of batch_size records at a time.
+
+        :param records: Any pymods reader of MODSRecords, or iterable of MODSRecords.
+        :param batch_size: Number of records per lookup.
+        :return: An iterator of Enriched elements, in reader order.
+        """
+        batch = []
+        for record in records:
+            batch.append((record, record.names, record.subjects))
+            if len(batch) == batch_size:
+                for enriched in self._enrich(batch):
+                    yield enriched
+                batch = []
+        for enriched in self._enrich(batch):
+            yield enriched
+
+    def _enrich(self, batch):
+        found = self.labels(item.uri for record, names, subjects in batch for item in names + subjects if item.uri)
+        for record, names, subjects in batch:
+            yield Enriched(record,
+                           [Authorized(name, found.get(name.uri)) for name in names],
+                           [Authorized(subject, found.get(subject.uri)) for subject in subjects])
@@ -0,0 +1,85 @@
+"""
+Checkpoints for long running reads. A checkpoint records where the last fully processed
+record ended so a reader can resume from the next record boundary.
+"""
+
+import collections
+import json
+import os
+import tempfile
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+Checkpoint = collections.namedtuple('Checkpoint', 'offset ordinal key')
+__pdoc__['Checkpoint.offset'] = 'Byte offset just past the last completed record.'
+__pdoc__['Checkpoint.ordinal'] = 'Ordinal of the next record.'
+__pdoc__['Checkpoint.key'] = 'Key of the last completed record (see Record.key).'
+
+
+def load_checkpoint(path):
+    """
+    :param path: Location of a checkpoint file.
+    :return: A Checkpoint, or None if the file does not exist.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return Checkpoint(**json.load(f))
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, checkpoint):
+    """
+    Atomically replace the checkpoint file at path.
+
+    :param path: Location of the checkpoint file.
+    :param checkpoint: A Checkpoint.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint._asdict(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class Checkpointer(object):
+    """
+    Periodically persists the position of the last completed record.
+    """
+
+    def __init__(self, path, every=1000):
+        """
+        :param path: Location of the checkpoint file.
+        :param every: Number of completed records between saves.
+        """
+        self.path = path
+        self.every = every
+        self.count = 0
+        self._last = None
+
+    def completed(self, span, record):
+        """
+        Mark a record as fully processed.
+
+        :param span: The record's RecordSpan.
+        :param record: The record.
+        """
+        self.count += 1
+        self._last = span, record
+        if self.count % self.every == 0:
+            self.save()
+
+    def save(self):
+        """
+        Write a checkpoint for the last completed record, if any.
+        """
+        if self._last is None:
+            return
+        span, record = self._last
+        save_checkpoint(self.path, Checkpoint(span.offset + span.length, span.ordinal + 1, record.key))
@@ -7,7 +7,18 @@ NAMESPACES = {'oai_dc': '{http://www.openarchives.org/OAI/2.0/}',
               'mods': '{http://www.loc.gov/mods/v3}',
               'dcterms': '{http://purl.org/dc/terms}',
               'xlink': '{http://www.w3.org/1999/xlink}',
-              'repox': '{http://repox.ist.utl.pt}'}
+              'repox': '{http://repox.ist.utl.pt}',
+              'oai_dc_record': '{http://www.openarchives.org/OAI/2.0/oai_dc/}',
+              'qdc': '{http://worldcat.org/xmlschemas/qdc-1.0/}',
+              'marc': '{http://www.loc.gov/MARC21/slim}'}
+
+# elements that hold a single record in each supported format
+RECORD_TAGS = ['{0}mods'.format(NAMESPACES['mods']),
+               '{0}record'.format(NAMESPACES['oai_dc']),
+               '{0}record'.format(NAMESPACES['repox']),
+               '{0}record'.format(NAMESPACES['marc']),
+               '{0}dc'.format(NAMESPACES['oai_dc_record']),
+               '{0}qualifieddc'.format(NAMESPACES['qdc'])]
 
 DATE_FIELDS = ['{0}dateIssued'.format(NAMESPACES['mods']),
                '{0}dateCreated'.format(NAMESPACES['mods']),
@@ -0,0 +1,177 @@
+"""
+MODS to Dublin Core crosswalk. Each MODSRecord is mapped in a single pass over its
+top-level elements, reusing MODSRecord's formatting of titles, names, subjects and dates.
+"""
+
+import collections
+
+from lxml import etree
+
+from pymods.constants import NAMESPACES
+from pymods.record import record_parser
+
+# crosswalk() and the namespace shorthands are left out, so that the package star import
+# keeps pymods.crosswalk as this module
+__all__ = ['DC_ELEMENTS', 'DCMI_TYPES', 'CREATOR_ROLES', 'OAI_DC_NSMAP', 'mods_to_dc', 'to_oai_dc']
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+DC_ELEMENTS = ['title', 'creator', 'subject', 'description', 'publisher', 'contributor', 'date', 'type', 'format',
+               'identifier', 'source', 'language', 'relation', 'coverage', 'rights']
+__pdoc__['DC_ELEMENTS'] = 'The fifteen Dublin Core elements, in oai_dc order.'
+
+DCMI_TYPES = {'text': 'Text',
+              'cartographic': 'Image',
+              'notated music': 'Text',
+              'sound recording': 'Sound',
+              'sound recording-musical': 'Sound',
+              'sound recording-nonmusical': 'Sound',
+              'still image': 'StillImage',
+              'moving image': 'MovingImage',
+              'three dimensional object': 'PhysicalObject',
+              'software, multimedia': 'Software',
+              'mixed material': 'Collection'}
+__pdoc__['DCMI_TYPES'] = 'mods:typeOfResource values and their DCMI Type Vocabulary terms.'
+
+CREATOR_ROLES = {'creator', 'author', 'cre', 'aut'}
+__pdoc__['CREATOR_ROLES'] = 'Role texts (lower cased) and codes mapped to dc:creator. Other roles map to dc:contributor.'
+
+OAI_DC_NSMAP = {'oai_dc': 'http://www.openarchives.org/OAI/2.0/oai_dc/',
+                'dc': 'http://purl.org/dc/elements/1.1/'}
+
+mods = NAMESPACES['mods']
+dc = NAMESPACES['dc']
+
+
+def _title_info(elem, values):
+    title = elem._title_text(elem._get_text(elem.find('./{0}nonSort'.format(mods))),
+                             elem._get_text(elem.find('./{0}title'.format(mods))),
+                             elem._get_text(elem.find('./{0}subTitle'.format(mods))))
+    values['title'].append(title)
+
+
+def _name(elem, values):
+    text = elem._name_text()
+    if not text:
+        return
+    role = elem._name_role()
+    if role.text is None and role.code is None:
+        element = 'creator'
+    elif (role.text or '').lower() in CREATOR_ROLES or role.code in CREATOR_ROLES:
+        element = 'creator'
+    else:
+        element = 'contributor'
+    values[element].append(text)
+
+
+def _type_of_resource(elem, values):
+    if elem.text:
+        values['type'].append(DCMI_TYPES.get(elem.text, elem.text))
+
+
+def _origin_info(elem, values):
+    values['publisher'].extend(publisher.text for publisher in elem.iterfind('./{0}publisher'.format(mods))
+                               if publisher.text)
+    for date_pair in elem._date_collector(elem) or []:
+        date = elem._date_text(date_pair)
+        if date is not None:
+            values['date'].append(date[0])
+
+
+def _language(elem, values):
+    term = elem.find('./{0}languageTerm[@type="code"]'.format(mods))
+    if term is None:
+        term = elem.find('./{0}languageTerm'.format(mods))
+    if term is not None and term.text:
+        values['language'].append(term.text)
+
+
+def _physical_description(elem, values):
+    values['format'].extend(part.text for part in elem if part.text and part.tag in _FORMAT_TAGS)
+
+
+def _subject(elem, values):
+    if len(elem) and 'geographicCode' not in elem[0].tag:
+        values['subject'].append(elem._subject_text())
+
+
+def _location(elem, values):
+    values['identifier'].extend(url.text for url in elem.iterfind('./{0}url'.format(mods)) if url.text)
+
+
+def _access_condition(elem, values):
+    if elem.text:
+        values['rights'].append(elem.text)
+    uri = elem.get('{http://www.w3.org/1999/xlink}href')
+    if uri:
+        values['rights'].append(uri)
+
+
+def _related_item(elem, values):
+    values['relation'].extend(elem._title_part())
+
+
+def _text(element):
+    def text(elem, values):
+        if elem.text:
+            values[element].append(elem.text)
+    return text
+
+
+_FORMAT_TAGS = {'{0}{1}'.format(mods, tag) for tag in ('extent', 'form', 'internetMediaType')}
+
+_MAPPINGS = {'{0}titleInfo'.format(mods): _title_info,
+             '{0}name'.format(mods): _name,
+             '{0}typeOfResource'.format(mods): _type_of_resource,
+             '{0}genre'.format(mods): _text('type'),
+             '{0}originInfo'.format(mods): _origin_info,
+             '{0}language'.format(mods): _language,
+             '{0}physicalDescription'.format(mods): _physical_description,
+             '{0}abstract'.format(mods): _text('description'),
+             '{0}tableOfContents'.format(mods): _text('description'),
+             '{0}note'.format(mods): _text('description'),
+             '{0}subject'.format(mods): _subject,
+             '{0}identifier'.format(mods): _text('identifier'),
+             '{0}location'.format(mods): _location,
+             '{0}accessCondition'.format(mods): _access_condition,
+             '{0}relatedItem'.format(mods): _related_item}
+
+
+def mods_to_dc(record):
+    """
+    Map a MODSRecord to Dublin Core in one pass over its top-level elements.
+
+    :param record: A MODSRecord.
+    :return: An OrderedDict of each of DC_ELEMENTS to a list of values.
+    """
+    values = collections.OrderedDict((element, []) for element in DC_ELEMENTS)
+    for elem in record:
+        mapping = _MAPPINGS.get(elem.tag)
+        if mapping is not None:
+            mapping(elem, values)
+    return values
+
+
+def to_oai_dc(values):
+    """
+    :param values: A mapping of DC element names to lists of values, e.g. from mods_to_dc().
+    :return: An oai_dc:dc root element, in the DCRecord class.
+    """
+    root = record_parser().makeelement('{{{0}}}dc'.format(OAI_DC_NSMAP['oai_dc']), nsmap=OAI_DC_NSMAP)
+    for element, texts in values.items():
+        for text in texts:
+            etree.SubElement(root, '{0}{1}'.format(dc, element)).text = text
+    return root
+
+
+def crosswalk(reader, oai_dc=False):
+    """
+    Crosswalk every record from a reader.
+
+    :param reader: A MODSReader, or any iterable of MODSRecords.
+    :param oai_dc: Whether to yield oai_dc:dc elements instead of value dicts.
+    :return: An iterator of mods_to_dc() results or oai_dc:dc elements, in reader order.
+    """
+    for record in reader:
+        values = mods_to_dc(record)
+        yield to_oai_dc(values) if oai_dc else values
@@ -0,0 +1,170 @@
+"""
+Normalized, sortable date keys. Date text is parsed once into integer day keys of the
+form YYYYMMDD (1966-12-08 is 19661208), with a start and end key per date, so ranges and
+sorting compare integers. date_columns() collects the keys of a whole reader into NumPy
+arrays for vectorized range queries; NumPy is only required for that function.
+"""
+
+import calendar
+import collections
+import re
+
+from pymods.constants import DATE_FIELDS, NAMESPACES
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+mods = NAMESPACES['mods']
+
+# key of records without a date in date_columns()
+MISSING = 0
+
+DateKey = collections.namedtuple('DateKey', 'start end type elem')
+__pdoc__['DateKey.start'] = 'First day covered by the date, as a YYYYMMDD integer.'
+__pdoc__['DateKey.end'] = 'Last day covered by the date, as a YYYYMMDD integer.'
+__pdoc__['DateKey.type'] = 'Date elem type, e.g. {http://www.loc.gov/mods/v3}dateIssued.'
+__pdoc__['DateKey.elem'] = 'List of the lxml.etree.Elements the key was read from.'
+
+DateColumns = collections.namedtuple('DateColumns', 'keys start end')
+__pdoc__['DateColumns.keys'] = 'List of record keys (see Record.key), one per record.'
+__pdoc__['DateColumns.start'] = 'numpy.int32 array of each record\'s earliest start key, or MISSING.'
+__pdoc__['DateColumns.end'] = 'numpy.int32 array of each record\'s latest end key, or MISSING.'
+
+# circa and inferred markers dropped before parsing, e.g. 'ca. 1850', '[1850?]'
+_UNCERTAIN = re.compile(r'[\[\]?~]')
+_CIRCA = re.compile(r'^(?:circa|ca\.?|c\.?)\s*')
+_DAY = re.compile(r'^(\d{4})(?:-?(\d{2})(?:-?(\d{2}))?)?(?:T.*)?$')
+# unspecified digits (EDTF 'X', MARC 'u'), e.g. 185u, 18XX, 1850s
+_UNSPECIFIED = re.compile(r'^(\d{1,3})([uUxX]{1,3})$|^(\d{3})0s$')
+_RANGE = re.compile(r'\s*(?:/|\s-\s|(?<=\d)-(?=\d{4}$))\s*')
+
+
+def _day_range(text):
+    match = _DAY.match(text)
+    if match:
+        year, month, day = match.groups()
+        year = int(year)
+        if year == 0:
+            return None
+        if month is None:
+            return year * 10000 + 101, year * 10000 + 1231
+        month = int(month)
+        if not 1 <= month <= 12:
+            return None
+        last = calendar.monthrange(year, month)[1]
+        if day is None:
+            return year * 10000 + month * 100 + 1, year * 10000 + month * 100 + last
+        day = int(day)
+        if not 1 <= day <= last:
+            return None
+        key = year * 10000 + month * 100 + day
+        return key, key
+    match = _UNSPECIFIED.match(text)
+    if match:
+        digits, unspecified, decade = match.groups()
+        if decade:
+            digits, unspecified = decade, 'x'
+        scale = 10 ** len(unspecified)
+        first = int(digits) * scale
+        return max(first, 1) * 10000 + 101, (first + scale - 1) * 10000 + 1231
+    return None
+
+
+def date_key(text):
+    """
+    Parse date text into start and end day keys.
+
+    Understands years, year-month and full dates in W3CDTF/ISO 8601 (including the
+    basic YYYYMMDD form and times, which are ignored), unspecified digits as in
+    '185u', '18XX' or '1850s', circa and inferred markers ('ca. 1850', '[1850?]'),
+    and ranges written '1850 - 1860', '1850-1860' or '1850/1860'.
+
+    :param text: Date text, e.g. '1987-02'.
+    :return: A (start, end) tuple of YYYYMMDD integers, e.g. (19870201, 19870228), or None.
+    """
+    if not text:
+        return None
+    text = _CIRCA.sub('', _UNCERTAIN.sub('', text).strip())
+    parts = _RANGE.split(text, maxsplit=1)
+    if len(parts) == 2:
+        first, last = _day_range(parts[0]), _day_range(parts[1])
+        if first is None or last is None:
+            return None
+        return min(first[0], last[0]), max(first[1], last[1])
+    return _day_range(text)
+
+
+def date_keys(record):
+    """
+    Day keys for every date in a record's mods:originInfo elements. Dates with
+    point="start" and point="end" are combined into one key. If only one point of a pair
+    can be parsed, the key covers that point alone.
+
+    :param record: A MODSRecord.
+    :return: A list of DateKey elements, in document order.
+    """
+    keys = []
+    for origin_info in record.iterfind('{0}originInfo'.format(mods)):
+        points = collections.OrderedDict()
+        for date in origin_info:
+            if date.tag not in DATE_FIELDS:
+                continue
+            point = date.get('point')
+            if point in ('start', 'end'):
+                points.setdefault(date.tag, {})[point] = date
+                continue
+            parsed = date_key(date.text)
+            if parsed:
+                keys.append(DateKey(parsed[0], parsed[1], date.tag, [date]))
+        for tag, pair in points.items():
+            spans = [date_key(pair[point].text) for point in ('start', 'end') if point in pair]
+            spans = [span for span in spans if span]
+            if spans:
+                keys.append(DateKey(spans[0][0], spans[-1][1], tag, list(pair.values())))
+    return keys
+
+
+def date_range(record, date_type=None):
+    """
+    :param record: A MODSRecord.
+    :param date_type: Only use dates of this type, e.g. '{http://www.loc.gov/mods/v3}dateIssued'.
+    :return: A (start, end) tuple of the earliest start and latest end keys in the record, or None.
+    """
+    keys = [key for key in date_keys(record) if date_type is None or key.type == date_type]
+    if not keys:
+        return None
+    return min(key.start for key in keys), max(key.end for key in keys)
+
+
+def date_columns(reader, date_type=None):
+    """
+    Collect the date range of every record from a reader into NumPy arrays, one row per
+    record. Records without a date have start and end set to MISSING, which no range query
+    with a positive start matches.
+
+    :param reader: Any pymods reader of MODSRecords, or iterable of MODSRecords.
+    :param date_type: Only use dates of this type, e.g. '{http://www.loc.gov/mods/v3}dateIssued'.
+    :return: A DateColumns.
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('date_columns requires NumPy (pip install pymods[numpy])')
+    keys = []
+    starts = []
+    ends = []
+    for record in reader:
+        found = date_range(record, date_type)
+        keys.append(record.key)
+        starts.append(found[0] if found else MISSING)
+        ends.append(found[1] if found else MISSING)
+    return DateColumns(keys, numpy.array(starts, dtype=numpy.int32), numpy.array(ends, dtype=numpy.int32))
+
+
+def overlapping(columns, start, end):
+    """
+    :param columns: A DateColumns.
+    :param start: First day of the query range, as a YYYYMMDD integer.
+    :param end: Last day of the query range, as a YYYYMMDD integer.
+    :return: A NumPy array of the row numbers of records whose range overlaps the query.
+    """
+    return ((columns.start <= end) & (columns.end >= start)).nonzero()[0]
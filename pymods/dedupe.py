@@ -0,0 +1,190 @@
+"""
+Duplicate and near-duplicate record detection. Each record is reduced to a signature of
+hashed blocking keys (normalized title and year, identifiers, PURLs) and a MinHash of its
+title and name words. Records sharing a blocking key, or a MinHash band whose estimated
+similarity passes a threshold, are merged into clusters with a union-find, so the work
+grows about linearly with the number of records rather than with the number of pairs.
+"""
+
+import array
+import collections
+import concurrent.futures
+import hashlib
+import os
+import random
+import re
+
+from pymods.dates import date_keys
+from pymods.parallel import ordered_results, parse_documents, record_documents
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+Cluster = collections.namedtuple('Cluster', 'ordinals keys')
+__pdoc__['Cluster'] = 'A group of records found to be duplicates of each other.'
+__pdoc__['Cluster.ordinals'] = 'Zero-based positions of the records in the reader, ascending.'
+__pdoc__['Cluster.keys'] = 'The records\' keys (see Record.key), in the same order.'
+
+Signature = collections.namedtuple('Signature', 'key blocks bands minhash')
+__pdoc__['Signature.key'] = 'The record key (see Record.key), or None.'
+__pdoc__['Signature.blocks'] = 'List of hashed exact blocking keys.'
+__pdoc__['Signature.bands'] = 'List of hashed MinHash bands.'
+__pdoc__['Signature.minhash'] = 'MinHash values as an array of unsigned 32 bit integers.'
+
+_WORD = re.compile(r'\w+')
+# Mersenne prime modulus for the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def normalize(text):
+    """
+    :param text: A string.
+    :return: text case-folded, with punctuation removed and whitespace collapsed.
+    """
+    return ' '.join(_WORD.findall(text.casefold()))
+
+
+class Deduper(object):
+    """
+    Finds clusters of duplicate records in one pass over a reader.
+
+    Two records are merged when they share a normalized title and year, an identifier
+    (of a type in identifier_types) or a PURL, or when they share a MinHash band and the
+    estimated Jaccard similarity of their title and name words is at least threshold.
+    """
+
+    def __init__(self, threshold=0.8, permutations=32, bands=8, identifier_types=None, seed=1, processes=1,
+                 chunk_size=500):
+        """
+        :param threshold: Minimum estimated similarity for records matched by MinHash.
+        :param permutations: Number of MinHash values per record. Must be a multiple of bands.
+        :param bands: Number of LSH bands the MinHash values are split into.
+        :param identifier_types: mods:identifier types to block on, e.g. ['doi', 'isbn'].
+            None uses every identifier; an empty list none.
+        :param seed: Seed for the MinHash permutations. Signatures are only comparable with the same seed.
+        :param processes: Number of worker processes computing signatures. None uses every CPU.
+        :param chunk_size: Number of records sent to a worker process at a time.
+        """
+        if permutations % bands:
+            raise ValueError('permutations must be a multiple of bands')
+        self.threshold = threshold
+        self.permutations = permutations
+        self.bands = bands
+        self.identifier_types = None if identifier_types is None else set(identifier_types)
+        self.seed = seed
+        self.processes = processes
+        self.chunk_size = chunk_size
+        rng = random.Random(seed)
+        self._coefficients = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(permutations)]
+
+    def signature(self, record):
+        """
+        :param record: A MODSRecord.
+        :return: The record's Signature.
+        """
+        blocks = []
+        title = normalize(record.titles[0]) if record.titles else ''
+        years = [key.start // 10000 for key in date_keys(record)]
+        if title and years:
+            blocks.append(_hash('title:{0}:{1}'.format(title, min(years))))
+        for identifier in record.identifiers:
+            if identifier.text and (self.identifier_types is None or identifier.type in self.identifier_types):
+                blocks.append(_hash('id:{0}:{1}'.format(identifier.type, normalize(identifier.text))))
+        for purl in record.purl:
+            blocks.append(_hash('purl:' + purl.strip().rstrip('/')))
+        words = set(_WORD.findall(' '.join(record.titles).casefold()))
+        for name in record.names:
+            if name.text:
+                words.update(_WORD.findall(name.text.casefold()))
+        if not words:
+            return Signature(record.key, blocks, [], None)
+        hashes = [_hash(word) for word in words]
+        minhash = array.array('I', [min((a * value + b) % _PRIME for value in hashes) & 0xffffffff
+                                    for a, b in self._coefficients])
+        rows = self.permutations // self.bands
+        bands = [_hash('{0}:{1}'.format(band, minhash[band * rows:(band + 1) * rows].tobytes().hex()))
+                 for band in range(self.bands)]
+        return Signature(record.key, blocks, bands, minhash)
+
+    def signatures(self, reader):
+        """
+        :param reader: Any pymods reader of MODSRecords, or iterable of MODSRecords. Worker processes
+            require a pymods reader.
+        :return: An iterator of Signature elements, in reader order. In worker processes, a malformed
+            record raises MalformedRecord, or is added to reader.errors if the reader is resilient.
+        """
+        if self.processes == 1:
+            for record in reader:
+                yield self.signature(record)
+            return
+        workers = self.processes or os.cpu_count()
+        chunks = ((self, reader.iter_elem, reader.resilient, documents)
+                  for documents in record_documents(reader, self.chunk_size))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            for signatures, errors in ordered_results(executor, _documents_signatures, chunks, 2 * workers):
+                reader.errors.extend(errors)
+                for signature in signatures:
+                    yield signature
+
+    def clusters(self, reader):
+        """
+        :param reader: Any pymods reader of MODSRecords, or iterable of MODSRecords. Worker processes
+            require a pymods reader.
+        :return: A list of Cluster elements with at least two records, ordered by their first record.
+        """
+        parents = []
+        keys = []
+        minhashes = []
+        blocks = {}
+        bands = {}
+        for ordinal, signature in enumerate(self.signatures(reader)):
+            parents.append(ordinal)
+            keys.append(signature.key)
+            minhashes.append(signature.minhash)
+            for block in signature.blocks:
+                first = blocks.setdefault(block, ordinal)
+                if first != ordinal:
+                    _union(parents, first, ordinal)
+            for band in signature.bands:
+                first = bands.setdefault(band, ordinal)
+                if first != ordinal and self.similarity(minhashes[first], signature.minhash) >= self.threshold:
+                    _union(parents, first, ordinal)
+        members = collections.defaultdict(list)
+        for ordinal in range(len(parents)):
+            members[_find(parents, ordinal)].append(ordinal)
+        return [Cluster(ordinals, [keys[ordinal] for ordinal in ordinals])
+                for root, ordinals in sorted(members.items(), key=lambda item: item[1][0]) if len(ordinals) > 1]
+
+    def similarity(self, first, second):
+        """
+        :param first: MinHash values from a Signature.
+        :param second: MinHash values from a Signature.
+        :return: The estimated Jaccard similarity of the two records' words.
+        """
+        return sum(1 for a, b in zip(first, second) if a == b) / self.permutations
+
+
+def _find(parents, item):
+    root = item
+    while parents[root] != root:
+        root = parents[root]
+    # path compression
+    while parents[item] != root:
+        parents[item], item = root, parents[item]
+    return root
+
+
+def _union(parents, first, second):
+    first, second = _find(parents, first), _find(parents, second)
+    if first != second:
+        # the earlier record is the root, which keeps clusters in reader order
+        parents[max(first, second)] = min(first, second)
+
+
+def _documents_signatures(arguments):
+    deduper, iter_elem, resilient, documents = arguments
+    records, errors = parse_documents(documents, iter_elem, resilient)
+    return [deduper.signature(record) for span, record in records], errors
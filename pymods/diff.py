@@ -0,0 +1,136 @@
+"""
+Structural diff between two versions of a collection. Records are aligned by key through
+hash partitions written to temporary files, so memory is bounded by the size of a
+partition rather than of the collections. Records are compared by fingerprint first, and
+property-level differences are only extracted for records whose fingerprints differ.
+"""
+
+import collections
+import hashlib
+import os
+import pickle
+import tempfile
+
+from lxml import etree
+
+from pymods.fingerprint import CHANGED, DELETED, NEW, canonicalize, fingerprint
+
+# diff() and the names imported from pymods.fingerprint are left out, so that star imports
+# of this module don't replace the pymods.diff and pymods.fingerprint modules
+__all__ = ['Difference', 'properties', 'plain', 'field_differences']
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+Difference = collections.namedtuple('Difference', 'status key old new fields')
+__pdoc__['Difference.status'] = "One of 'new', 'changed' or 'deleted'."
+__pdoc__['Difference.key'] = 'Record key (see Record.key), or the hex fingerprint of records without one.'
+__pdoc__['Difference.old'] = 'The record in the old collection, or None for new records.'
+__pdoc__['Difference.new'] = 'The record in the new collection, or None for deleted records.'
+__pdoc__['Difference.fields'] = ('For changed records, an OrderedDict of property name to (old value, new value) '
+                                 'for the properties that differ; otherwise None.')
+
+
+def properties(record):
+    """
+    :param record: A record.
+    :return: Sorted list of the names of the record class's properties, e.g. 'titles'.
+    """
+    record_class = type(record)
+    return sorted(name for name in dir(record_class) if isinstance(getattr(record_class, name), property))
+
+
+def plain(value):
+    """
+    Convert an accessor value to a comparable form: the elem attribute of named tuples
+    is dropped, and elements are replaced by their canonical serialization.
+
+    :param value: A value returned by a record property.
+    :return: The value as nested tuples, lists, strings and bytes.
+    """
+    if isinstance(value, etree._Element):
+        return canonicalize(value)
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return tuple(plain(item) for name, item in zip(value._fields, value) if name != 'elem')
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    return value
+
+
+def field_differences(old, new, fields=None):
+    """
+    :param old: A record.
+    :param new: A record.
+    :param fields: Names of the properties to compare. Defaults to every property of old's class.
+    :return: An OrderedDict of property name to (old value, new value) for properties that differ.
+        Values are in the form returned by plain(); a property that raises is read as None.
+    """
+    differences = collections.OrderedDict()
+    for name in fields or properties(old):
+        values = []
+        for record in (old, new):
+            try:
+                values.append(plain(getattr(record, name)))
+            except Exception:
+                values.append(None)
+        if values[0] != values[1]:
+            differences[name] = tuple(values)
+    return differences
+
+
+def _partition(key, partitions):
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=4).digest(), 'little') % partitions
+
+
+def _write_partitions(reader, directory, name, partitions):
+    files = [open(os.path.join(directory, '{0}-{1}'.format(name, number)), 'wb') for number in range(partitions)]
+    try:
+        for span, record in reader.iter_located():
+            digest = fingerprint(record)
+            key = record.key or digest.hex()
+            pickle.dump((key, digest, span), files[_partition(key, partitions)], pickle.HIGHEST_PROTOCOL)
+    finally:
+        for partition in files:
+            partition.close()
+
+
+def _read_partition(directory, name, number):
+    with open(os.path.join(directory, '{0}-{1}'.format(name, number)), 'rb') as partition:
+        while True:
+            try:
+                yield pickle.load(partition)
+            except EOFError:
+                return
+
+
+def diff(old_reader, new_reader, fields=None, partitions=16):
+    """
+    Compare two versions of a collection. Records are matched by key; if a key occurs more
+    than once in a file, its last record is used.
+
+    :param old_reader: A pymods reader of the old collection.
+    :param new_reader: A pymods reader of the new collection.
+    :param fields: Names of the properties compared for changed records. Defaults to every property.
+    :param partitions: Number of partitions the keys are spread over. Only one partition
+        of fingerprints from the old collection is held in memory at a time.
+    :return: An iterator of Difference elements for new, changed and deleted records,
+        grouped by partition.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        _write_partitions(old_reader, directory, 'old', partitions)
+        _write_partitions(new_reader, directory, 'new', partitions)
+        with old_reader.scanner() as old_scanner, new_reader.scanner() as new_scanner:
+            for number in range(partitions):
+                old = dict((key, (digest, span)) for key, digest, span in _read_partition(directory, 'old', number))
+                new = collections.OrderedDict((key, (digest, span))
+                                              for key, digest, span in _read_partition(directory, 'new', number))
+                for key, (digest, span) in new.items():
+                    previous = old.pop(key, None)
+                    if previous is None:
+                        yield Difference(NEW, key, None, new_reader.parse_span(new_scanner, span), None)
+                    elif previous[0] != digest:
+                        old_record = old_reader.parse_span(old_scanner, previous[1])
+                        new_record = new_reader.parse_span(new_scanner, span)
+                        yield Difference(CHANGED, key, old_record, new_record,
+                                         field_differences(old_record, new_record, fields))
+                for key, (digest, span) in old.items():
+                    yield Difference(DELETED, key, old_reader.parse_span(old_scanner, span), None, None)
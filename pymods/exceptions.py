@@ -15,3 +15,34 @@ class NameSpaceInvalid(PymodsException):
 class ElementNotFound(PymodsException):
     def __str__(self):
         return "Record does not contain the specified element"
+
+
+class OAIError(PymodsException):
+    def __init__(self, code, message=None):
+        super(OAIError, self).__init__(code, message)
+        self.code = code
+        self.message = message
+
+    def __str__(self):
+        return "OAI-PMH error {0}: {1}".format(self.code, self.message)
+
+
+class CheckpointMismatch(PymodsException):
+    def __init__(self, checkpoint):
+        super(CheckpointMismatch, self).__init__(checkpoint)
+        self.checkpoint = checkpoint
+
+    def __str__(self):
+        return "No record with key {0} ends at byte {1}".format(self.checkpoint.key, self.checkpoint.offset)
+
+
+class MalformedRecord(PymodsException):
+    def __init__(self, ordinal, offset, length, message):
+        super(MalformedRecord, self).__init__(ordinal, offset, length, message)
+        self.ordinal = ordinal
+        self.offset = offset
+        self.length = length
+        self.message = message
+
+    def __str__(self):
+        return "Malformed record {0} at byte {1}: {2}".format(self.ordinal, self.offset, self.message)
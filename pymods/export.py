@@ -0,0 +1,161 @@
+"""
+Streaming tabular (CSV/TSV) export of record properties.
+"""
+
+import collections
+import csv
+import io
+
+from pymods.record import OAIRecord, interned
+from pymods.scanner import local_name
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+Column = collections.namedtuple('Column', 'header property field delimiter')
+__pdoc__['Column.header'] = 'Column header.'
+__pdoc__['Column.property'] = "Record property to read, e.g. 'subjects'."
+__pdoc__['Column.field'] = "Field of each value to read, e.g. 'uri' for Subject.uri. Defaults to the value's text."
+__pdoc__['Column.delimiter'] = 'String used to join multiple values.'
+
+
+def column(spec, delimiter='|', header=None):
+    """
+    Build a Column from a 'property' or 'property.field' string.
+
+    :param spec: e.g. 'titles', 'subjects.uri' or 'collection.title'.
+    :param delimiter: String used to join multiple values.
+    :param header: Column header. Defaults to spec.
+    :return: A Column.
+    """
+    record_property, _, field = spec.partition('.')
+    return Column(header or spec, record_property, field or None, delimiter)
+
+
+def cell(value, field, delimiter):
+    """
+    Flatten a property value into a single string.
+
+    :param value: The value of a record property: a string, a named tuple, a list of either, or None.
+    :param field: Named tuple field to read from each value, or None.
+    :param delimiter: String used to join multiple values.
+    :return: A string.
+    :raises ValueError: if field is None and the values are named tuples without a text field.
+    """
+    if value is None:
+        return ''
+    if not isinstance(value, list):
+        value = [value]
+    if field is None:
+        # named tuples are represented by their text
+        value = [getattr(item, 'text', item) for item in value]
+    else:
+        value = [getattr(item, field) for item in value]
+    try:
+        return delimiter.join(item for item in value if item)
+    except TypeError:
+        if field is not None:
+            raise
+        # e.g. Collection, which has location, title and url fields but no text
+        item = next(item for item in value if isinstance(item, tuple))
+        raise ValueError("{0} values have no text, export one of their fields instead: {1}".format(
+            type(item).__name__, ', '.join(name for name in item._fields if name != 'elem')))
+
+
+class TabularExporter(object):
+    """
+    Writes one row per record. Each property named by the columns is read once per
+    record, however many columns use it, and rows are written in large blocks.
+    """
+
+    def __init__(self, columns, dialect='excel-tab', block_size=1000, intern=False):
+        """
+        :param columns: A list of Column elements or column spec strings (see column()).
+        :param dialect: A csv dialect. 'excel-tab' for TSV, 'excel' for CSV.
+        :param block_size: Number of rows buffered between writes.
+        :param intern: Share repeated strings (types, authorities, role terms) between rows,
+            see pymods.record.intern_strings().
+        """
+        self.columns = [column(spec) if isinstance(spec, str) else spec for spec in columns]
+        self.dialect = dialect
+        self.block_size = block_size
+        self.intern = intern
+        self.properties = list(collections.OrderedDict.fromkeys(col.property for col in self.columns))
+
+    def row(self, record):
+        """
+        :param record: A record.
+        :return: A list of cell strings.
+        """
+        values = {name: getattr(record, name) for name in self.properties}
+        return [cell(values[col.property], col.field, col.delimiter) for col in self.columns]
+
+    def rows(self, reader):
+        """
+        :param reader: Any pymods reader, or iterable of records.
+        :return: An iterator of rows, not including the header.
+        """
+        for record in reader:
+            if self.intern:
+                with interned():
+                    row = self.row(record)
+            else:
+                row = self.row(record)
+            yield row
+
+    def export(self, reader, output, header=True):
+        """
+        :param reader: Any pymods reader, or iterable of records.
+        :param output: A file path or a text file object opened with newline=''.
+        :param header: Whether to write a header row.
+        :return: Number of records written.
+        """
+        if not hasattr(output, 'write'):
+            with open(output, 'w', encoding='utf-8', newline='') as f:
+                return self.export(reader, f, header)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, dialect=self.dialect)
+        if header:
+            writer.writerow([col.header for col in self.columns])
+        count = 0
+        for row in self.rows(reader):
+            writer.writerow(row)
+            count += 1
+            if count % self.block_size == 0:
+                output.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+        output.write(buffer.getvalue())
+        return count
+
+
+class DCExporter(TabularExporter):
+    """
+    Writes one row per Dublin Core record. All the requested elements are read in a single
+    pass over each record with DCRecord.get_elements.
+    """
+
+    def __init__(self, elems, delimiters=None, join='|', dialect='excel-tab', block_size=1000):
+        """
+        :param elems: A list of elements in Clark notation, or '{*}elem' to match any namespace,
+            e.g. ['{*}title', '{http://purl.org/dc/terms/}spatial']. Headers are the local names.
+        :param delimiters: A dict of elem to the character separating values within one element.
+        :param join: String used to join multiple values.
+        :param dialect: A csv dialect. 'excel-tab' for TSV, 'excel' for CSV.
+        :param block_size: Number of rows buffered between writes.
+        """
+        super(DCExporter, self).__init__([Column(local_name(elem), elem, None, join) for elem in elems],
+                                         dialect=dialect, block_size=block_size)
+        self.elems = list(elems)
+        self.delimiters = delimiters or {}
+
+    def row(self, record):
+        """
+        :param record: A DCRecord, or an OAIRecord with Dublin Core metadata.
+        :return: A list of cell strings.
+        """
+        if isinstance(record, OAIRecord):
+            record = record.metadata
+        if record is None:
+            return [''] * len(self.columns)
+        values = record.get_elements(self.elems, self.delimiters)
+        return [col.delimiter.join(values[col.property]) for col in self.columns]
@@ -0,0 +1,104 @@
+"""
+Record fingerprints and change detection between runs. Fingerprints are hashes of the
+canonical (exclusive C14N) serialization of a record, stored by record key in SQLite.
+"""
+
+import collections
+import hashlib
+import sqlite3
+
+from lxml import etree
+
+# fingerprint() is left out so that pymods.fingerprint stays this module
+__all__ = ['NEW', 'CHANGED', 'DELETED', 'Change', 'canonicalize', 'FingerprintStore']
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+NEW = 'new'
+CHANGED = 'changed'
+DELETED = 'deleted'
+
+Change = collections.namedtuple('Change', 'status key record')
+__pdoc__['Change.status'] = "One of 'new', 'changed' or 'deleted'."
+__pdoc__['Change.key'] = 'Record key (see Record.key).'
+__pdoc__['Change.record'] = 'The record, or None for deleted records.'
+
+
+def canonicalize(record):
+    """
+    :param record: A record element.
+    :return: Exclusive C14N serialization of the record as bytes. Namespace declarations
+        inherited from the surrounding document but unused by the record are dropped.
+    """
+    return etree.tostring(record, method='c14n', exclusive=True, with_comments=False)
+
+
+def fingerprint(record):
+    """
+    :param record: A record element.
+    :return: SHA-1 digest of the record's canonical form as bytes.
+    """
+    return hashlib.sha1(canonicalize(record)).digest()
+
+
+class FingerprintStore(object):
+    """
+    SQLite backed store of record fingerprints, used to find the records that changed
+    since the last run.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Location of the SQLite state file. Created if it does not exist.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS fingerprints '
+                                '(key TEXT PRIMARY KEY, digest BLOB NOT NULL, run INTEGER NOT NULL)')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS runs (run INTEGER PRIMARY KEY)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT count(*) FROM fingerprints').fetchone()[0]
+
+    def changes(self, reader):
+        """
+        Compare every record from reader against the stored fingerprints. The state file
+        is only updated once reader is exhausted, so an interrupted run is simply repeated.
+
+        Records without a key are keyed by their fingerprint, so they are reported as new
+        when they first appear and as deleted once they change.
+
+        :param reader: Any pymods reader, or iterable of records.
+        :return: An iterator of Change elements for new, changed and deleted records.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute('BEGIN')
+        try:
+            run = cursor.execute('SELECT coalesce(max(run), 0) + 1 FROM runs').fetchone()[0]
+            cursor.execute('INSERT INTO runs VALUES (?)', (run,))
+            for record in reader:
+                digest = fingerprint(record)
+                key = record.key or digest.hex()
+                row = cursor.execute('SELECT digest FROM fingerprints WHERE key = ?', (key,)).fetchone()
+                cursor.execute('INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?)', (key, digest, run))
+                if row is None:
+                    yield Change(NEW, key, record)
+                elif row[0] != digest:
+                    yield Change(CHANGED, key, record)
+            deleted = cursor.execute('SELECT key FROM fingerprints WHERE run < ?', (run,)).fetchall()
+            cursor.execute('DELETE FROM fingerprints WHERE run < ?', (run,))
+            for key, in deleted:
+                yield Change(DELETED, key, None)
+        except BaseException:
+            cursor.execute('ROLLBACK')
+            raise
+        cursor.execute('COMMIT')
@@ -0,0 +1,300 @@
+"""
+OAI-PMH harvesting. OAIHarvester fetches pages in a worker thread while the previous page
+is parsed, yielding records as soon as their end tag is parsed. PagedOAIReader reads a
+harvest saved to disk as one file per page.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import glob
+import html
+import os
+import re
+import urllib.parse
+import urllib.request
+
+from lxml import etree
+
+from pymods.exceptions import OAIError
+from pymods.reader import OAIFeedReader, OAIReader
+
+# harvest() is left out so that pymods.harvest stays this module
+__all__ = ['fetch', 'resumption_token', 'OAIHarvester', 'PageIndex', 'request_token', 'record_identifier',
+           'index_page', 'PagedOAIReader']
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+_RESUMPTION_TOKEN = re.compile(rb'<(?:[\w.-]+:)?resumptionToken(?:\s[^>]*)?>([^<]+)<')
+_REQUEST_TOKEN = re.compile(rb'<(?:[\w.-]+:)?request\s[^>]*?resumptionToken\s*=\s*(["\'])(.*?)\1')
+_ERROR = re.compile(rb'<(?:[\w.-]+:)?error\s[^>]*?code\s*=\s*["\']([^"\']+)["\'][^>]*>([^<]*)<')
+# the header, and so its identifier, comes first in an OAI-PMH record
+_IDENTIFIER = re.compile(rb'<(?:[\w.-]+:)?identifier(?:\s[^>]*)?>([^<]*)<')
+
+
+def fetch(url, timeout=60):
+    """
+    Default page fetcher.
+
+    :param url: Request URL.
+    :param timeout: Socket timeout in seconds.
+    :return: The response body as bytes.
+    """
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def resumption_token(page):
+    """
+    Find the resumptionToken of a ListRecords response without parsing it.
+
+    :param page: A response body as bytes.
+    :return: The token, or None if this is the last page.
+    """
+    # the token is the last element of the response
+    match = _RESUMPTION_TOKEN.search(page, max(0, len(page) - 8192))
+    if match is None:
+        return None
+    return etree.fromstring(b'<t>' + match.group(1) + b'</t>').text.strip() or None
+
+
+class OAIHarvester(object):
+    """
+    Harvests a ListRecords response set, following resumptionToken chains. Iterate with
+    `async for` to receive OAIRecord objects.
+
+        async for record in OAIHarvester('https://example.org/oai', 'mods'):
+            print(record.oai_urn, record.metadata.titles)
+    """
+
+    def __init__(self, base_url, metadata_prefix='mods', set_spec=None, from_date=None, until_date=None,
+                 fetch=fetch, executor=None, chunk_size=65536):
+        """
+        :param base_url: The repository's OAI-PMH base URL.
+        :param metadata_prefix: metadataPrefix argument, e.g. 'mods' or 'oai_dc'.
+        :param set_spec: Optional set argument.
+        :param from_date: Optional from argument.
+        :param until_date: Optional until argument.
+        :param fetch: A blocking callable taking a URL and returning the response body as bytes.
+        :param executor: A concurrent.futures executor for fetches. Defaults to the event loop's.
+        :param chunk_size: Number of bytes fed to the parser at a time.
+        """
+        self.base_url = base_url
+        self.arguments = {'verb': 'ListRecords', 'metadataPrefix': metadata_prefix}
+        for name, value in (('set', set_spec), ('from', from_date), ('until', until_date)):
+            if value is not None:
+                self.arguments[name] = value
+        self.fetch = fetch
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.pages = 0
+
+    def __aiter__(self):
+        return self.records()
+
+    def url(self, token=None):
+        """
+        :param token: A resumptionToken, or None for the first request.
+        :return: The request URL.
+        """
+        arguments = self.arguments if token is None else {'verb': 'ListRecords', 'resumptionToken': token}
+        return '{0}?{1}'.format(self.base_url, urllib.parse.urlencode(arguments))
+
+    async def records(self):
+        """
+        :return: An asynchronous iterator of OAIRecord elements in harvest order.
+        """
+        loop = asyncio.get_running_loop()
+        pending = loop.run_in_executor(self.executor, self.fetch, self.url())
+        while pending is not None:
+            page = await pending
+            self.pages += 1
+            token = resumption_token(page)
+            # start on the next page before parsing this one
+            pending = loop.run_in_executor(self.executor, self.fetch, self.url(token)) if token else None
+            try:
+                self._check_error(page)
+                feed = OAIFeedReader()
+                for start in range(0, len(page), self.chunk_size):
+                    for record in feed.feed(page[start:start + self.chunk_size]):
+                        yield record
+                    await asyncio.sleep(0)
+                for record in feed.close():
+                    yield record
+            except BaseException:
+                if pending is not None:
+                    pending.cancel()
+                raise
+
+    def _check_error(self, page):
+        # errors immediately follow the request element
+        match = _ERROR.search(page, 0, 8192)
+        if match is not None:
+            code = match.group(1).decode('utf-8')
+            if code != 'noRecordsMatch':
+                raise OAIError(code, match.group(2).decode('utf-8').strip())
+
+
+def harvest(base_url, metadata_prefix='mods', **kwargs):
+    """
+    Synchronous convenience wrapper around OAIHarvester.
+
+    :param base_url: The repository's OAI-PMH base URL.
+    :param metadata_prefix: metadataPrefix argument.
+    :param kwargs: Other OAIHarvester arguments.
+    :return: A list of OAIRecord elements.
+    """
+    async def collect():
+        return [record async for record in OAIHarvester(base_url, metadata_prefix, **kwargs)]
+    return asyncio.run(collect())
+
+
+PageIndex = collections.namedtuple('PageIndex', 'path request_token next_token entries')
+__pdoc__['PageIndex'] = 'Summary of one saved ListRecords page.'
+__pdoc__['PageIndex.path'] = 'Location of the page file.'
+__pdoc__['PageIndex.request_token'] = 'resumptionToken the page was requested with, or None for the first page.'
+__pdoc__['PageIndex.next_token'] = 'resumptionToken of the next page, or None for the last page.'
+__pdoc__['PageIndex.entries'] = 'List of (oai_urn, RecordSpan) tuples in page order. oai_urn is None if not found.'
+
+
+def request_token(page):
+    """
+    Find the resumptionToken echoed in a response's request element.
+
+    :param page: A response body as bytes.
+    :return: The token, or None.
+    """
+    match = _REQUEST_TOKEN.search(page, 0, 8192)
+    if match is None:
+        return None
+    return html.unescape(match.group(2).decode('utf-8')) or None
+
+
+def record_identifier(record):
+    """
+    Find the header identifier of an OAI-PMH record without parsing it.
+
+    :param record: The record's bytes.
+    :return: The identifier (see OAIRecord.oai_urn), or None.
+    """
+    match = _IDENTIFIER.search(record)
+    if match is None:
+        return None
+    return html.unescape(match.group(1).decode('utf-8'))
+
+
+def index_page(path):
+    """
+    Locate and identify the records of a saved ListRecords page. Runs in worker processes.
+    Records are identified from their bytes, not parsed.
+
+    :param path: Location of the page file.
+    :return: A PageIndex.
+    """
+    with OAIReader(path).scanner() as scanner:
+        entries = [(record_identifier(scanner.read(span)), span) for span in scanner]
+        head = bytes(scanner.data[:8192])
+        tail = bytes(scanner.data[max(0, len(scanner.data) - 8192):])
+    return PageIndex(path, request_token(head), resumption_token(tail), entries)
+
+
+def _map_page(arguments):
+    path, spans, func = arguments
+    reader = OAIReader(path)
+    with reader.scanner() as scanner:
+        records = (reader.parse_span(scanner, span) for span in spans)
+        return [func(record) for record in records if record is not None]
+
+
+def _natural_key(path):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', os.path.basename(path))]
+
+
+class PagedOAIReader(object):
+    """
+    Reader for a directory of saved ListRecords pages. Pages are indexed in parallel worker
+    processes, ordered by their resumptionToken chain (falling back to file name order), and
+    records superseded by a later version with the same oai_urn are dropped.
+
+    Iterating parses each current record once, in this process; PagedOAIReader.map() parses
+    and processes them in the worker processes.
+    """
+
+    def __init__(self, directory, pattern='*.xml', processes=None):
+        """
+        :param directory: Directory of ListRecords response files.
+        :param pattern: Glob pattern selecting page files.
+        :param processes: Number of worker processes. Defaults to the number of CPUs; 1 indexes in-process.
+        """
+        self.directory = directory
+        self.pattern = pattern
+        self.processes = processes
+        self._pages = None
+
+    @property
+    def pages(self):
+        """
+        :return: A list of PageIndex elements in harvest order.
+        """
+        if self._pages is None:
+            paths = sorted(glob.glob(os.path.join(self.directory, self.pattern)), key=_natural_key)
+            self._pages = self._chain(list(self._pool_map(index_page, paths)))
+        return self._pages
+
+    def current(self):
+        """
+        :return: A list of (page, spans) tuples holding only the latest version of each record.
+        """
+        latest = {}
+        for page_number, page in enumerate(self.pages):
+            for entry_number, (urn, span) in enumerate(page.entries):
+                latest[urn] = page_number, entry_number
+        # records without an identifier are never superseded
+        return [(page, [span for entry_number, (urn, span) in enumerate(page.entries)
+                        if urn is None or latest[urn] == (page_number, entry_number)])
+                for page_number, page in enumerate(self.pages)]
+
+    def __iter__(self):
+        for page, spans in self.current():
+            reader = OAIReader(page.path)
+            with reader.scanner() as scanner:
+                for span in spans:
+                    record = reader.parse_span(scanner, span)
+                    if record is not None:
+                        yield record
+
+    def map(self, func):
+        """
+        Apply func to every current record in the worker processes.
+
+        :param func: A picklable (module level) function taking an OAIRecord and returning a picklable value.
+        :return: An iterator of results in harvest order.
+        """
+        arguments = [(page.path, spans, func) for page, spans in self.current()]
+        for results in self._pool_map(_map_page, arguments):
+            for result in results:
+                yield result
+
+    def _pool_map(self, func, arguments):
+        if self.processes == 1:
+            return map(func, arguments)
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.processes)
+        return self._shutdown_after(executor, executor.map(func, arguments))
+
+    def _shutdown_after(self, executor, results):
+        try:
+            for result in results:
+                yield result
+        finally:
+            executor.shutdown()
+
+    def _chain(self, pages):
+        by_token = {page.request_token: page for page in pages if page.request_token is not None}
+        first = [page for page in pages if page.request_token is None]
+        ordered = []
+        page = first[0] if len(first) == 1 else None
+        while page is not None and page not in ordered:
+            ordered.append(page)
+            page = by_token.get(page.next_token)
+        # pages outside the chain keep file name order
+        return ordered + [page for page in pages if page not in ordered]
@@ -0,0 +1,88 @@
+"""
+Helpers for processing a reader's records in worker processes. lxml elements can't be
+pickled, so records are sent to workers as small standalone documents (see
+RecordScanner.wrap) and parsed there.
+"""
+
+import collections
+
+from lxml import etree
+
+from pymods.exceptions import MalformedRecord
+from pymods.reader import RecordError
+from pymods.record import record_parser
+
+
+def record_documents(reader, chunk_size=500):
+    """
+    Slice a reader's file into standalone record documents.
+
+    :param reader: A pymods reader.
+    :param chunk_size: Number of records per chunk.
+    :return: An iterator of lists of (RecordSpan, document bytes) tuples.
+    """
+    with reader.scanner() as scanner:
+        documents = []
+        for span in scanner.spans():
+            documents.append((span, scanner.wrap(span)))
+            if len(documents) == chunk_size:
+                yield documents
+                documents = []
+        if documents:
+            yield documents
+
+
+def parse_document(document, iter_elem):
+    """
+    Parse a record document in a worker, using the namespace-dispatching record classes.
+
+    :param document: Bytes from record_documents().
+    :param iter_elem: The reader's record element, e.g. reader.iter_elem.
+    :return: The record. Raises etree.XMLSyntaxError if the record is malformed.
+    """
+    return next(etree.fromstring(document, record_parser()).iter(iter_elem), None)
+
+
+def parse_documents(documents, iter_elem, resilient=False):
+    """
+    Parse a chunk of record documents in a worker, skipping spans whose element is in
+    another namespace. lxml's syntax errors can't be pickled, so a malformed record is
+    raised as a MalformedRecord, or returned as a RecordError if resilient.
+
+    :param documents: A list of (RecordSpan, document bytes) tuples from record_documents().
+    :param iter_elem: The reader's record element, e.g. reader.iter_elem.
+    :param resilient: Whether to return malformed records rather than raise, e.g. reader.resilient.
+    :return: A tuple of a list of (RecordSpan, record) tuples and a list of RecordError elements.
+    """
+    records = []
+    errors = []
+    for span, document in documents:
+        try:
+            record = parse_document(document, iter_elem)
+        except etree.XMLSyntaxError as e:
+            if not resilient:
+                raise MalformedRecord(span.ordinal, span.offset, span.length, str(e))
+            errors.append(RecordError(span.ordinal, span.offset, span.length, str(e)))
+            continue
+        if record is not None:
+            records.append((span, record))
+    return records, errors
+
+
+def ordered_results(executor, func, arguments, window):
+    """
+    Like executor.map, but reads arguments only a few steps ahead of the results consumed.
+
+    :param executor: A concurrent.futures executor.
+    :param func: Function to call.
+    :param arguments: An iterable of single arguments to func.
+    :param window: Maximum number of calls in flight.
+    :return: An iterator of results in argument order.
+    """
+    pending = collections.deque()
+    for argument in arguments:
+        pending.append(executor.submit(func, argument))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
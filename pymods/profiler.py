@@ -0,0 +1,261 @@
+"""
+Collection profiles: element and attribute coverage and value frequencies, counted in
+one pass over a reader. Values are counted with bounded-memory top-k sketches, and
+profiles from separate workers (or separate files) can be merged.
+"""
+
+import collections
+import concurrent.futures
+import json
+import os
+
+from pymods.constants import NAMESPACES, NS_MAP
+from pymods.parallel import ordered_results, parse_documents, record_documents
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+# namespace URI to the prefix used in profile paths
+PREFIXES = dict((uri.strip('{}'), prefix) for prefix, uri in NAMESPACES.items())
+PREFIXES.update((uri, prefix) for prefix, uri in NS_MAP.items())
+PREFIXES['http://www.w3.org/XML/1998/namespace'] = 'xml'
+
+
+def _name(tag, namespace):
+    if not tag.startswith('{'):
+        return tag
+    if tag.startswith(namespace):
+        return tag[len(namespace):]
+    uri, local = tag[1:].split('}', 1)
+    prefix = PREFIXES.get(uri)
+    return '{0}:{1}'.format(prefix, local) if prefix else tag
+
+
+class TopK(object):
+    """
+    Space-saving sketch of the most frequent values in a stream. At most capacity values
+    are kept. Counts may overestimate a value's true count by at most its error, and any
+    value occurring more than total / capacity times is kept.
+    """
+
+    def __init__(self, capacity=20):
+        """
+        :param capacity: Maximum number of values kept.
+        """
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, value, count=1):
+        """
+        :param value: A hashable value.
+        :param count: Number of occurrences to add.
+        """
+        self.total += count
+        counts = self.counts
+        if value in counts:
+            counts[value] += count
+        elif len(counts) < self.capacity:
+            counts[value] = count
+            self.errors[value] = 0
+        else:
+            # replace the least frequent value; the newcomer inherits its count as error
+            evicted = min(counts, key=counts.__getitem__)
+            floor = counts.pop(evicted)
+            del self.errors[evicted]
+            counts[value] = floor + count
+            self.errors[value] = floor
+
+    def minimum(self):
+        """
+        :return: Upper bound on the count of any value not kept.
+        """
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def merge(self, other):
+        """
+        Add another sketch's counts to this one.
+
+        :param other: A TopK.
+        :return: self
+        """
+        floor, other_floor = self.minimum(), other.minimum()
+        counts, errors = {}, {}
+        for value in set(self.counts) | set(other.counts):
+            counts[value] = self.counts.get(value, floor) + other.counts.get(value, other_floor)
+            errors[value] = self.errors.get(value, floor) + other.errors.get(value, other_floor)
+        kept = sorted(counts, key=counts.__getitem__, reverse=True)[:self.capacity]
+        self.counts = dict((value, counts[value]) for value in kept)
+        self.errors = dict((value, errors[value]) for value in kept)
+        self.total += other.total
+        return self
+
+    def most_common(self, n=None):
+        """
+        :param n: Number of values to return. Defaults to all kept values.
+        :return: A list of (value, count, error) tuples, most frequent first.
+        """
+        ordered = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:n]
+        return [(value, count, self.errors[value]) for value, count in ordered]
+
+
+class Profile(object):
+    """
+    Counts, for every element and attribute path in a set of records, how often it occurs,
+    how many records contain it, and its most frequent values.
+
+    Paths are relative to the record element, e.g. 'genre/@authority' or
+    'name/role/roleTerm'. Names in the record's own namespace are unprefixed, other
+    namespaces use the prefixes in pymods.constants (e.g. 'accessCondition/@xlink:href').
+    """
+
+    def __init__(self, capacity=20, max_length=200):
+        """
+        :param capacity: Number of distinct values kept per path.
+        :param max_length: Values are truncated to this many characters before counting.
+        """
+        self.capacity = capacity
+        self.max_length = max_length
+        self.records = 0
+        self.paths = {}
+        self.values = {}
+        self._names = {}
+
+    def add(self, record):
+        """
+        :param record: A record.
+        """
+        namespace = record.tag[:record.tag.find('}') + 1]
+        names = self._names.get(namespace)
+        if names is None:
+            names = self._names[namespace] = {}
+        seen = set()
+        self._walk(record, '', namespace, names, seen)
+        paths = self.paths
+        for path in seen:
+            paths[path][1] += 1
+        self.records += 1
+
+    def _walk(self, element, parent, namespace, names, seen):
+        for child in element:
+            tag = child.tag
+            if not isinstance(tag, str):
+                continue
+            name = names.get(tag)
+            if name is None:
+                name = names[tag] = _name(tag, namespace)
+            path = parent + name
+            self._count(path, child.text, seen)
+            for attribute, value in child.attrib.items():
+                name = names.get(attribute)
+                if name is None:
+                    name = names[attribute] = _name(attribute, namespace)
+                self._count('{0}/@{1}'.format(path, name), value, seen)
+            if len(child):
+                self._walk(child, path + '/', namespace, names, seen)
+
+    def _count(self, path, text, seen):
+        try:
+            self.paths[path][0] += 1
+        except KeyError:
+            self.paths[path] = [1, 0]
+        seen.add(path)
+        if text is not None:
+            text = text.strip()
+            if text:
+                try:
+                    values = self.values[path]
+                except KeyError:
+                    values = self.values[path] = TopK(self.capacity)
+                values.add(text[:self.max_length])
+
+    def merge(self, other):
+        """
+        Add another profile's counts to this one.
+
+        :param other: A Profile.
+        :return: self
+        """
+        self.records += other.records
+        for path, (occurrences, records) in other.paths.items():
+            counts = self.paths.setdefault(path, [0, 0])
+            counts[0] += occurrences
+            counts[1] += records
+        for path, values in other.values.items():
+            if path in self.values:
+                self.values[path].merge(values)
+            else:
+                self.values[path] = values
+        return self
+
+    def coverage(self, path):
+        """
+        :param path: An element or attribute path, e.g. 'abstract'.
+        :return: Fraction of records containing path.
+        """
+        if not self.records:
+            return 0.0
+        return self.paths.get(path, (0, 0))[1] / self.records
+
+    def to_dict(self, n=None):
+        """
+        :param n: Number of values to report per path. Defaults to all kept values.
+        :return: An OrderedDict with the record count and an entry per path, in path order.
+        """
+        paths = collections.OrderedDict()
+        for path in sorted(self.paths):
+            occurrences, records = self.paths[path]
+            values = self.values.get(path)
+            paths[path] = collections.OrderedDict([
+                ('occurrences', occurrences),
+                ('records', records),
+                ('coverage', round(records / self.records, 4)),
+                ('values', [collections.OrderedDict([('value', value), ('count', count), ('error', error)])
+                            for value, count, error in values.most_common(n)] if values else [])])
+        return collections.OrderedDict([('records', self.records), ('paths', paths)])
+
+    def to_json(self, n=None, **kwargs):
+        """
+        :param n: Number of values to report per path. Defaults to all kept values.
+        :param kwargs: Passed to json.dumps, e.g. indent=2.
+        :return: The profile as a JSON string (see Profile.to_dict).
+        """
+        return json.dumps(self.to_dict(n), **kwargs)
+
+
+def _profile_documents(arguments):
+    iter_elem, resilient, capacity, max_length, documents = arguments
+    records, errors = parse_documents(documents, iter_elem, resilient)
+    result = Profile(capacity, max_length)
+    for span, record in records:
+        result.add(record)
+    return result, errors
+
+
+def profile(reader, capacity=20, max_length=200, processes=1, chunk_size=500):
+    """
+    Profile every record from a reader in one pass.
+
+    :param reader: Any pymods reader, or iterable of records. Worker processes require a pymods reader.
+    :param capacity: Number of distinct values kept per path.
+    :param max_length: Values are truncated to this many characters before counting.
+    :param processes: Number of worker processes. None uses every CPU.
+    :param chunk_size: Number of records sent to a worker process at a time.
+    :return: A Profile. In worker processes, a malformed record raises MalformedRecord, or is added
+        to reader.errors if the reader is resilient.
+    """
+    result = Profile(capacity, max_length)
+    if processes == 1:
+        for record in reader:
+            result.add(record)
+        return result
+    workers = processes or os.cpu_count()
+    chunks = ((reader.iter_elem, reader.resilient, capacity, max_length, documents)
+              for documents in record_documents(reader, chunk_size))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial, errors in ordered_results(executor, _profile_documents, chunks, 2 * workers):
+            result.merge(partial)
+            reader.errors.extend(errors)
+    return result
@@ -1,32 +1,122 @@
+import collections
+import random
+from itertools import islice
+
 from lxml import etree
 
-from pymods.record import MODSRecord, OAIRecord
-from pymods.constants import NAMESPACES
+from pymods.checkpoint import Checkpoint, Checkpointer, load_checkpoint
+from pymods.exceptions import CheckpointMismatch, NameSpaceInvalid
+from pymods.record import MODSRecord, OAIRecord, record_lookup
+from pymods.constants import NAMESPACES, RECORD_TAGS
+from pymods.scanner import RecordScanner, local_name
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+RecordError = collections.namedtuple('RecordError', 'ordinal offset length message')
+__pdoc__['RecordError'] = 'A malformed record quarantined by a resilient reader.'
+__pdoc__['RecordError.ordinal'] = 'Zero-based position of the record in the document.'
+__pdoc__['RecordError.offset'] = 'Byte offset of the record start tag.'
+__pdoc__['RecordError.length'] = 'Length of the record in bytes.'
+__pdoc__['RecordError.message'] = 'Parser error message.'
+
+
+# keyword arguments for etree.XMLParser, by preset name
+PARSER_PRESETS = {
+    # lxml's defaults
+    'default': {},
+    # drop nodes no accessor reads: whitespace-only text between elements, comments and
+    # processing instructions; skip building the xml:id table
+    'fast': {'remove_blank_text': True, 'remove_comments': True, 'remove_pis': True, 'collect_ids': False,
+             'no_network': True, 'load_dtd': False},
+    # lift libxml2's safety limits on text node size and tree depth, for very large records
+    'huge': {'huge_tree': True},
+    # untrusted input: never fetch or load DTDs or external entities, don't expand entities,
+    # and fail on any well-formedness error
+    'strict': {'recover': False, 'no_network': True, 'load_dtd': False, 'resolve_entities': False,
+               'huge_tree': False},
+}
+__pdoc__['PARSER_PRESETS'] = 'etree.XMLParser keyword arguments for the reader parser presets.'
 
 
 def parse(source, parser=None):
     return etree.parse(source, parser=parser)
 
 
+def preset_parser(preset, lookup):
+    """
+    Build a parser from one of PARSER_PRESETS.
+
+    'fast' removes whitespace-only text between elements, comments and processing
+    instructions. MODSRecord accessor results are unchanged, except where a comment or
+    processing instruction inside a record would otherwise have been read as a child
+    element. 'huge' parses text nodes over 10 MB and very deep trees. 'strict' is for
+    untrusted files: no DTD or network access, entity references are left unexpanded.
+
+    :param preset: A PARSER_PRESETS key, or None for 'default'.
+    :param lookup: The element class lookup to set on the parser.
+    :return: An etree.XMLParser.
+    """
+    try:
+        options = PARSER_PRESETS[preset or 'default']
+    except KeyError:
+        raise ValueError('unknown parser preset {0!r}, expected one of {1}'.format(
+            preset, ', '.join(sorted(PARSER_PRESETS))))
+    parser = etree.XMLParser(**options)
+    parser.set_element_class_lookup(lookup)
+    return parser
+
+
 class Reader(etree.XMLParser):
     """
     lxml parser
     """
 
-    def __init__(self, file_location, iter_elem, parser=None):
+    nested_records = True
+
+    def __init__(self, file_location, iter_elem, parser=None, streaming=False, resilient=False, checkpoint=None,
+                 resume_from=None):
         """
         Basic XML parser & iterator
 
         :param file_location: XML encoded file
         :param iter_elem: element to use as record iterator
         :param parser: a custom etree.XMLParser (required for custom etree.ElementBase subclasses)
+        :param streaming: parse record by record so memory use does not grow with the document
+            (implied by the options below)
+        :param resilient: parse record by record, quarantining malformed records in Reader.errors
+            instead of aborting the whole document
+        :param checkpoint: a Checkpointer, or a file path to save checkpoints to every 1000 records
+        :param resume_from: a Checkpoint, or a checkpoint file path, to resume reading from. Reading
+            raises CheckpointMismatch if the record the checkpoint was saved after is not in the file
         """
         super(Reader, self).__init__()
 
-        if parser is not None:
-            self.iterator = parse(file_location, parser=parser).iter(iter_elem)
-        else:
-            self.iterator = parse(file_location).iter(iter_elem)
+        if checkpoint is not None and not isinstance(checkpoint, Checkpointer):
+            checkpoint = Checkpointer(checkpoint)
+        if resume_from is not None and not isinstance(resume_from, Checkpoint):
+            resume_from = load_checkpoint(resume_from)
+
+        self.file_location = file_location
+        self.iter_elem = iter_elem
+        self.parser = parser
+        self.streaming = streaming or resilient or checkpoint is not None or resume_from is not None
+        self.resilient = resilient
+        self.checkpoint = checkpoint
+        self.resume_from = resume_from
+        self.errors = []
+        self._iterator = None
+
+    @property
+    def iterator(self):
+        """
+        Iterator over the parsed document. The document is parsed on first use.
+        """
+        if self._iterator is None:
+            if self.streaming:
+                self._iterator = (record for span, record in self.iter_located())
+            else:
+                self._iterator = parse(self.file_location, parser=self.parser).iter(self.iter_elem)
+        return self._iterator
 
     def __next__(self):
         return next(self.iterator)
@@ -34,6 +124,174 @@ class Reader(etree.XMLParser):
     def __iter__(self):
         return self
 
+    def head(self, n):
+        """
+        Parse only the first n records of the document.
+
+        :param n: Number of records to return.
+        :return: An iterator of records.
+        """
+        return (record for span, record in islice(self.iter_located(), n))
+
+    def skip(self, n):
+        """
+        Skip the first n records of the document. Skipped records are located
+        by scanning and are never parsed.
+
+        :param n: Number of records to skip.
+        :return: An iterator of the remaining records.
+        """
+        return (record for span, record in self.iter_located(start=n))
+
+    def sample(self, k, seed=None):
+        """
+        Reservoir sample of k records. Record boundaries are found by scanning
+        and only the selected records are parsed.
+
+        :param k: Sample size.
+        :param seed: Optional seed for the random number generator.
+        :return: A list of at most k records in document order.
+        """
+        rng = random.Random(seed)
+        reservoir = []
+        with self.scanner() as scanner:
+            for span in scanner:
+                if span.ordinal < k:
+                    reservoir.append(span)
+                else:
+                    position = rng.randint(0, span.ordinal)
+                    if position < k:
+                        reservoir[position] = span
+            reservoir.sort()
+            records = [self.parse_span(scanner, span) for span in reservoir]
+        return [record for record in records if record is not None]
+
+    def batches(self, max_records=1000, max_bytes=None):
+        """
+        Group records into lists, closing a list when it holds max_records records or when
+        the next record would take its raw size in the file over max_bytes. A record larger
+        than max_bytes is yielded in a list of its own. Records are parsed one at a time, and
+        the reader keeps no reference to a list once it is yielded, so memory is bounded by
+        the batch being consumed. A parsed record takes several times its raw size.
+
+        Reading begins at the resume_from checkpoint, if any. With a checkpoint, the records
+        of a batch are marked completed when the next batch is requested, or when the
+        iterator is exhausted, so a run stopped while processing a batch resumes at its
+        first record.
+
+        :param max_records: Maximum number of records per batch, or None for no limit.
+        :param max_bytes: Maximum total size in bytes of the records in a batch, or None for no limit.
+        :return: An iterator of lists of records.
+        """
+        if max_records is None and max_bytes is None:
+            raise ValueError('batches needs max_records or max_bytes')
+        for name, limit in (('max_records', max_records), ('max_bytes', max_bytes)):
+            if limit is not None and limit < 1:
+                raise ValueError('{0} must be at least 1, not {1}'.format(name, limit))
+        return self._batches(max_records, max_bytes)
+
+    def _batches(self, max_records, max_bytes):
+        located = []
+        size = 0
+        for span, record in self._located():
+            if located and max_bytes is not None and size + span.length > max_bytes:
+                yield from self._release(located)
+                located = []
+                size = 0
+            located.append((span, record))
+            size += span.length
+            if len(located) == max_records:
+                # yield before the next record is parsed
+                yield from self._release(located)
+                located = []
+                size = 0
+        if located:
+            yield from self._release(located)
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+
+    def _release(self, located):
+        yield [record for span, record in located]
+        # the caller has asked for the next batch, so it is done with this one
+        if self.checkpoint is not None:
+            for span, record in located:
+                self.checkpoint.completed(span, record)
+
+    def iter_located(self, start=0):
+        """
+        Iterate over the document record by record, parsing each record on its own
+        rather than building a tree of the whole document.
+
+        If the reader was given a checkpoint, a record is marked completed when the
+        next one is requested. Reading begins at the resume_from checkpoint, if any.
+
+        :param start: Ordinal of the first record to parse. Earlier records are scanned but not parsed.
+        :return: An iterator of (RecordSpan, record) pairs.
+        """
+        for span, record in self._located(start):
+            yield span, record
+            if self.checkpoint is not None:
+                self.checkpoint.completed(span, record)
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+
+    def _located(self, start=0):
+        offset, ordinal = 0, 0
+        if self.resume_from is not None:
+            offset, ordinal = self.resume_from.offset, self.resume_from.ordinal
+        with self.scanner() as scanner:
+            if self.resume_from is not None:
+                self._check_resume(scanner)
+            for span in scanner.spans(offset, ordinal):
+                if span.ordinal < start:
+                    continue
+                record = self.parse_span(scanner, span)
+                if record is not None:
+                    yield span, record
+
+    def _check_resume(self, scanner):
+        """
+        Make sure the resume_from checkpoint belongs to the reader's file: the last record it
+        marks completed must end at its offset and have its key. The records before the
+        offset are scanned anyway, to find the namespace declarations in scope there.
+
+        :param scanner: An open RecordScanner over the reader's file.
+        """
+        checkpoint = self.resume_from
+        for span in scanner.spans():
+            end = span.offset + span.length
+            if end >= checkpoint.offset:
+                if end == checkpoint.offset and span.ordinal + 1 == checkpoint.ordinal:
+                    record = self.parse_span(scanner, span)
+                    if record is not None and record.key == checkpoint.key:
+                        return
+                break
+        raise CheckpointMismatch(checkpoint)
+
+    def parse_span(self, scanner, span):
+        """
+        Parse one record located by a scanner from scanner().
+
+        :param scanner: An open RecordScanner over the reader's file.
+        :param span: A RecordSpan from the scanner.
+        :return: The record, or None if the span's element is not a record of this reader
+            or, for a resilient reader, is malformed (see Reader.errors).
+        """
+        try:
+            fragment = etree.fromstring(scanner.wrap(span), self.parser)
+        except etree.XMLSyntaxError as e:
+            if not self.resilient:
+                raise
+            self.errors.append(RecordError(span.ordinal, span.offset, span.length, str(e)))
+            return None
+        return next(fragment.iter(self.iter_elem), None)
+
+    def scanner(self):
+        """
+        :return: An unopened RecordScanner for the reader's file and record element.
+        """
+        return RecordScanner(self.file_location, local_name(self.iter_elem), nested=self.nested_records)
+
     # def __index__(self):
     #     """"""
     #
@@ -46,16 +304,25 @@ class MODSReader(Reader):
     Customized lxml parser for the MODSRecord class. Iterates on mods:mods elements.
     """
 
-    def __init__(self, file_location):
+    nested_records = False
+
+    def __init__(self, file_location, streaming=False, resilient=False, checkpoint=None, resume_from=None,
+                 preset=None):
         """
         Parser/iterator for the MODSRecord class. Iterates on mods:mods elements.
 
         :param file_location:
+        :param streaming: parse record by record instead of building a tree of the whole document.
+        :param resilient: quarantine malformed records in MODSReader.errors and keep going.
+        :param checkpoint: a Checkpointer or file path; periodically save the reader's position.
+        :param resume_from: a Checkpoint or checkpoint file path to resume reading from.
+        :param preset: parser preset, one of 'default', 'fast', 'huge' or 'strict' (see preset_parser).
         """
         mods_parser_registration = etree.ElementDefaultClassLookup(element=MODSRecord)
-        mods_parser = etree.XMLParser()
-        mods_parser.set_element_class_lookup(mods_parser_registration)
-        super(MODSReader, self).__init__(file_location, '{0}mods'.format(NAMESPACES['mods']), parser=mods_parser)
+        mods_parser = preset_parser(preset, mods_parser_registration)
+        super(MODSReader, self).__init__(file_location, '{0}mods'.format(NAMESPACES['mods']), parser=mods_parser,
+                                         streaming=streaming, resilient=resilient, checkpoint=checkpoint,
+                                         resume_from=resume_from)
 
 
 class OAIReader(Reader):
@@ -63,13 +330,156 @@ class OAIReader(Reader):
     Customized lxml parser for the OAIRecord class. Iterates over oai:record elements in any namespace (repox or oai-pmh).
     """
 
-    def __init__(self, file_location):
+    def __init__(self, file_location, streaming=False, resilient=False, checkpoint=None, resume_from=None,
+                 preset=None):
         """
         Parser/iterator for the OAIRecord class. Iterates over record elements in any namespace (repox or oai-pmh).
 
         :param file_location:
+        :param streaming: parse record by record instead of building a tree of the whole document.
+        :param resilient: quarantine malformed records in OAIReader.errors and keep going.
+        :param checkpoint: a Checkpointer or file path; periodically save the reader's position.
+        :param resume_from: a Checkpoint or checkpoint file path to resume reading from.
+        :param preset: parser preset, one of 'default', 'fast', 'huge' or 'strict' (see preset_parser).
+        """
+        oai_parser_registration = record_lookup(OAIRecord)
+        oai_parser = preset_parser(preset, oai_parser_registration)
+        super(OAIReader, self).__init__(file_location, '{*}record', parser=oai_parser,
+                                        streaming=streaming, resilient=resilient, checkpoint=checkpoint,
+                                        resume_from=resume_from)
+
+
+def record_tag(source):
+    """
+    Find the record element of a document by reading up to its first record.
+
+    :param source: A file path or a binary file object (which is rewound afterwards).
+    :return: The tag of the first element in RECORD_TAGS, in Clark notation.
+    """
+    try:
+        for event, elem in etree.iterparse(source, events=('start',)):
+            if elem.tag in RECORD_TAGS:
+                return elem.tag
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+    raise NameSpaceInvalid
+
+
+class RecordReader(Reader):
+    """
+    Reader for documents in any supported format: MODS, OAI-PMH, repox, oai_dc, qualified DC
+    and MARCXML. The record element is detected from the document once, and a single
+    namespace-dispatching lookup creates each element in its record class.
+    """
+
+    def __init__(self, file_location, streaming=False, resilient=False, checkpoint=None, resume_from=None,
+                 preset=None):
+        """
+        Parser/iterator for documents of any supported format.
+
+        :param file_location:
+        :param streaming: parse record by record instead of building a tree of the whole document.
+        :param resilient: quarantine malformed records in RecordReader.errors and keep going.
+        :param checkpoint: a Checkpointer or file path; periodically save the reader's position.
+        :param resume_from: a Checkpoint or checkpoint file path to resume reading from.
+        :param preset: parser preset, one of 'default', 'fast', 'huge' or 'strict' (see preset_parser).
+        """
+        iter_elem = record_tag(file_location)
+        record_parser = preset_parser(preset, record_lookup())
+        super(RecordReader, self).__init__(file_location, iter_elem, parser=record_parser,
+                                           streaming=streaming, resilient=resilient, checkpoint=checkpoint,
+                                           resume_from=resume_from)
+        # as in MODSReader, a mods:mods start tag inside a record ends an unterminated record
+        self.nested_records = iter_elem != '{0}mods'.format(NAMESPACES['mods'])
+
+
+class FeedReader(object):
+    """
+    Push-style reader for data that arrives in pieces (pipes, sockets, chunked HTTP bodies).
+    Bytes are fed in as they arrive and records are returned as soon as their end tag is
+    parsed. Returned records are detached from the document so memory use is bounded by
+    record size rather than stream length.
+    """
+
+    def __init__(self, iter_elem, lookup=None):
         """
-        oai_parser_registration = etree.ElementDefaultClassLookup(element=OAIRecord)
-        oai_parser = etree.XMLParser()
-        oai_parser.set_element_class_lookup(oai_parser_registration)
-        super(OAIReader, self).__init__(file_location, '{*}record', parser=oai_parser)
+        :param iter_elem: element to use as record iterator
+        :param lookup: an element class lookup (required for custom etree.ElementBase subclasses)
+        """
+        self.iter_elem = iter_elem
+        self.parser = etree.XMLPullParser(events=('start', 'end'), tag=iter_elem)
+        if lookup is not None:
+            self.parser.set_element_class_lookup(lookup)
+        self._depth = 0
+
+    def feed(self, data):
+        """
+        :param data: The next chunk of the document as bytes.
+        :return: A list of records completed by this chunk.
+        """
+        self.parser.feed(data)
+        return self._completed()
+
+    def close(self):
+        """
+        Signal the end of the document.
+
+        :return: A list of any remaining completed records.
+        """
+        self.parser.close()
+        return self._completed()
+
+    def stream(self, source, chunk_size=65536):
+        """
+        Read a binary file object (e.g. sys.stdin.buffer or socket.makefile('rb')) to
+        the end, yielding records as they complete.
+
+        :param source: A binary file object.
+        :param chunk_size: Maximum number of bytes to read at a time.
+        :return: An iterator of records.
+        """
+        # read1 returns whatever is available rather than waiting for a full chunk
+        read = getattr(source, 'read1', source.read)
+        data = read(chunk_size)
+        while data:
+            for record in self.feed(data):
+                yield record
+            data = read(chunk_size)
+        for record in self.close():
+            yield record
+
+    def _completed(self):
+        records = []
+        for event, elem in self.parser.read_events():
+            if event == 'start':
+                self._depth += 1
+                continue
+            self._depth -= 1
+            if self._depth == 0:
+                # only outermost matches are records, e.g. not a marc:record inside an OAI record
+                parent = elem.getparent()
+                if parent is not None:
+                    parent.remove(elem)
+                records.append(elem)
+        return records
+
+
+class MODSFeedReader(FeedReader):
+    """
+    Push-style reader for the MODSRecord class. Returns mods:mods elements.
+    """
+
+    def __init__(self):
+        super(MODSFeedReader, self).__init__('{0}mods'.format(NAMESPACES['mods']),
+                                             lookup=etree.ElementDefaultClassLookup(element=MODSRecord))
+
+
+class OAIFeedReader(FeedReader):
+    """
+    Push-style reader for the OAIRecord class. Returns record elements in any namespace (repox or oai-pmh).
+    """
+
+    def __init__(self):
+        super(OAIFeedReader, self).__init__('{*}record',
+                                            lookup=record_lookup(OAIRecord))
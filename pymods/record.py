@@ -1,9 +1,14 @@
 import collections
+import contextlib
+import functools
 import re
+import sys
+import threading
 
 from lxml import etree
 
 from pymods.constants import NAMESPACES, DATE_FIELDS
+from pymods.dates import date_keys
 
 __pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
 
@@ -95,13 +100,55 @@ __pdoc__['SubjectPart'] = 'Used internally to reformat subject texts.'
 mods = NAMESPACES['mods']
 
 
+# whether _shared interns in the calling thread, see intern_strings()
+_interning = threading.local()
+
+
+def _shared(value):
+    # applied to low-cardinality strings in accessor results (types, authorities, role terms, date tags)
+    if value is None or not getattr(_interning, 'enabled', False):
+        return value
+    return sys.intern(value)
+
+
+def intern_strings(enabled=True):
+    """
+    Share one copy of repeated low-cardinality strings between accessor results, e.g. the
+    type, authority and authorityURI of Name, Subject and Genre elements, role terms and
+    Date types. Saves memory when many results are held at once. Off by default, and
+    applies to the calling thread only.
+
+    :param enabled: Whether to intern strings.
+    :return: Whether interning was enabled before the call.
+    """
+    previous = getattr(_interning, 'enabled', False)
+    _interning.enabled = enabled
+    return previous
+
+
+@contextlib.contextmanager
+def interned():
+    """
+    Context manager enabling intern_strings() for its block, in the calling thread.
+    """
+    previous = intern_strings(True)
+    try:
+        yield
+    finally:
+        intern_strings(previous)
+
+
 class Record(etree.ElementBase):
     """
     Base record class. Subclass of etree.ElementBase.
     """
 
-    def _init(self):
-        super(Record, self)._init()
+    @property
+    def key(self):
+        """
+        :return: An identifier for the record, or None.
+        """
+        return None
 
 
 class MODSRecord(Record):
@@ -118,9 +165,6 @@ class MODSRecord(Record):
     * {non-sort character} {title}: {subtitle} for titles.
     """
 
-    def _init(self):
-        super(MODSRecord, self)._init()
-
     @property
     def abstract(self):
         """
@@ -129,8 +173,8 @@ class MODSRecord(Record):
         :return: A list of Abstract elements with text, type, and displayLabel attributes.
         """
         return [Abstract(getattr(abstract, 'text', ''),
-                         abstract.attrib.get('type'),
-                         abstract.attrib.get('displayLabel'),
+                         _shared(abstract.attrib.get('type')),
+                         _shared(abstract.attrib.get('displayLabel')),
                          abstract)
                 for abstract in self.iterfind('./{0}abstract'.format(mods))]
 
@@ -188,6 +232,15 @@ class MODSRecord(Record):
         except TypeError:
             return None
 
+    @property
+    def date_keys(self):
+        """
+        Normalized, sortable keys for the dates in mods:originInfo elements (see pymods.dates).
+
+        :return: List of DateKey elements with YYYYMMDD integer start and end attributes.
+        """
+        return date_keys(self)
+
     @property
     def digital_origin(self):
         """
@@ -250,8 +303,8 @@ class MODSRecord(Record):
         """
         return [Genre(genre.text,
                       genre.attrib.get('valueURI'),
-                      genre.attrib.get('authority'),
-                      genre.attrib.get('authorityURI'),
+                      _shared(genre.attrib.get('authority')),
+                      _shared(genre.attrib.get('authorityURI')),
                       genre)
                 for genre in self.iterfind('./{0}genre'.format(mods))]
 
@@ -363,6 +416,13 @@ class MODSRecord(Record):
         """
         return [issuance.text for issuance in self.iterfind('.//{0}issuance'.format(mods))]
 
+    @property
+    def key(self):
+        """
+        :return: The record's fedora PID, falling back to its IID, or None.
+        """
+        return self.pid or self.iid
+
     @property
     def language(self):
         """
@@ -372,17 +432,17 @@ class MODSRecord(Record):
         """
         return [Language(language.find('./{0}languageTerm[@type="text"]'.format(mods)).text,
                          language.find('./{0}languageTerm[@type="code"]'.format(mods)).text,
-                         language.find('./{0}languageTerm[@type="text"]'.format(mods)).attrib.get('authority'),
+                         _shared(language.find('./{0}languageTerm[@type="text"]'.format(mods)).attrib.get('authority')),
                          language)
                 if len(language) > 1
                 else Language(None,
                               language.find('./{0}languageTerm'.format(mods)).text,
-                              language.find('./{0}languageTerm'.format(mods)).attrib.get('authority'),
+                              _shared(language.find('./{0}languageTerm'.format(mods)).attrib.get('authority')),
                               language)
         if language.find('./{0}languageTerm'.format(mods)).text.islower()
         else Language(language.find('./{0}languageTerm'.format(mods)).text,
                       None,
-                      language.find('./{0}languageTerm'.format(mods)).attrib.get('authority'),
+                      _shared(language.find('./{0}languageTerm'.format(mods)).attrib.get('authority')),
                       language)
                 for language in self.iterfind('{0}language'.format(mods))]
 
@@ -394,10 +454,10 @@ class MODSRecord(Record):
         :return: A list of Name elements with text, uri, authority, and authorityURI attributes.
         """
         return [Name(name._name_text(),
-                     name.attrib.get('type'),
+                     _shared(name.attrib.get('type')),
                      name.attrib.get('valueURI'),
-                     name.attrib.get('authority'),
-                     name.attrib.get('authorityURI'),
+                     _shared(name.attrib.get('authority')),
+                     _shared(name.attrib.get('authorityURI')),
                      name._name_role(),
                      name)
                 for name in self.iterfind('./{0}name'.format(mods))]
@@ -419,7 +479,7 @@ class MODSRecord(Record):
 
         :return: A list containing Note elements with text, type, and displayLabel attributes.
         """
-        return [Note(note.text, note.attrib.get('type'), note.attrib.get('displayLabel'), note)
+        return [Note(note.text, _shared(note.attrib.get('type')), _shared(note.attrib.get('displayLabel')), note)
                 for note in self.iterfind('./{0}note'.format(mods))]
 
     @property
@@ -459,7 +519,7 @@ class MODSRecord(Record):
 
         :return: A list of PublicationPlace elements with text and type attributes.
         """
-        return [PublicationPlace(place.text, place.attrib.get('type'), place)
+        return [PublicationPlace(place.text, _shared(place.attrib.get('type')), place)
                 for place in self.iterfind('./{0}originInfo/{0}place/{0}placeTerm'.format(mods))]
 
     @property
@@ -490,7 +550,7 @@ class MODSRecord(Record):
         :return: A list containing Rights elements with text, type, and uri.
         """
         return [Rights(rights.text,
-                       rights.attrib.get('type'),
+                       _shared(rights.attrib.get('type')),
                        rights.attrib.get('{http://www.w3.org/1999/xlink}href'),
                        rights)
                 for rights in self.iterfind('{0}accessCondition'.format(mods))]
@@ -504,14 +564,14 @@ class MODSRecord(Record):
         """
         return [Subject(subject._subject_text(),
                         subject[0].attrib.get('valueURI'),
-                        subject.attrib.get('authority'),
-                        subject.attrib.get('authorityURI'),
+                        _shared(subject.attrib.get('authority')),
+                        _shared(subject.attrib.get('authorityURI')),
                         subject)
                 if subject.attrib.get('valueURI') is None
                 else Subject(subject._subject_text(),
                              subject.attrib.get('valueURI'),
-                             subject.attrib.get('authority'),
-                             subject.attrib.get('authorityURI'),
+                             _shared(subject.attrib.get('authority')),
+                             _shared(subject.attrib.get('authorityURI')),
                              subject)
                 for subject in self.iterfind('{0}subject'.format(mods))
                 if 'geographicCode' not in subject[0].tag]
@@ -574,10 +634,10 @@ class MODSRecord(Record):
 
     def _date_text(self, date_pair):
         if len(date_pair) == 1:
-            return date_pair[0].text, date_pair[0].tag
+            return date_pair[0].text, _shared(date_pair[0].tag)
         elif len(date_pair) == 2:
             date_list = sorted([date.text for date in date_pair])
-            return '{0} - {1}'.format(date_list[0], date_list[1]), date_pair[0].tag
+            return '{0} - {1}'.format(date_list[0], date_list[1]), _shared(date_pair[0].tag)
 
     def _get_dates(self, elem):
         return [date for date in elem.find('./{0}originInfo'.format(mods)).iterchildren()
@@ -597,19 +657,29 @@ class MODSRecord(Record):
                     for identifier in self.iterfind('.//{0}identifier'.format(mods)) if
                     identifier.attrib.get('type') == id_type]
         else:
-            return [Identifier(identifier.text, identifier.attrib.get('type'), identifier)
+            return [Identifier(identifier.text, _shared(identifier.attrib.get('type')), identifier)
                     for identifier in self.iterfind('.//{0}identifier'.format(mods))]
 
     def _name_part(self, elem=None):
         if elem is None:
             elem = self
-        return [NamePart(name.text, name.attrib.get('type'), name) for name in
+        return [NamePart(name.text, _shared(name.attrib.get('type')), name) for name in
                 elem.iterfind('./{0}namePart'.format(mods))]
 
     def _name_role(self, elem=None):
         if elem is None:
             elem = self
-        return Role(elem._name_role_text(), elem._name_role_code(), elem._name_role_authority(), elem)
+        # one pass, equivalent to _name_role_text(), _name_role_code() and _name_role_authority()
+        text, code, authority = None, None, None
+        for number, term in enumerate(elem.iter('{0}roleTerm'.format(mods))):
+            if number == 0:
+                authority = term.get('authority')
+            term_type = term.get('type')
+            if term_type == 'text' and text is None:
+                text = term.text
+            elif term_type == 'code' and code is None:
+                code = term.text
+        return Role(_shared(text), _shared(code), _shared(authority), elem)
 
     def _name_role_authority(self):
         try:
@@ -633,11 +703,14 @@ class MODSRecord(Record):
         if elem is None:
             elem = self
         if elem.attrib.get('type') == 'personal':
-            family = ', '.join(x.text for x in elem._name_part() if x.type == 'family')
-            given = ', '.join(x.text for x in elem._name_part() if x.type == 'given')
-            terms_of_address = ', '.join(x.text for x in elem._name_part() if x.type == 'termsOfAddress')
-            date = ', '.join(x.text for x in elem._name_part() if x.type == 'date')
-            untyped_name = ', '.join(x.text for x in elem._name_part() if x.type is None)
+            name_parts = {'family': [], 'given': [], 'termsOfAddress': [], 'date': [], None: []}
+            for name_part in elem.iterfind('./{0}namePart'.format(mods)):
+                name_parts.get(name_part.get('type'), []).append(name_part.text)
+            family = ', '.join(name_parts['family'])
+            given = ', '.join(name_parts['given'])
+            terms_of_address = ', '.join(name_parts['termsOfAddress'])
+            date = ', '.join(name_parts['date'])
+            untyped_name = ', '.join(name_parts[None])
             return '{family}{given}{termsOfAddress}{untyped_name}{date}'.format(
                 family=family + ', ' if family else '',
                 given=given if given else '',
@@ -664,9 +737,9 @@ class MODSRecord(Record):
     def _subject_part(self, elem=None):
         if elem is None:
             elem = self
-        return [SubjectPart(term._name_text(), term.tag, term)
+        return [SubjectPart(term._name_text(), _shared(term.tag), term)
                 if 'name' in term.tag
-                else SubjectPart(term.text, term.tag, term)
+                else SubjectPart(term.text, _shared(term.tag), term)
                 for term in elem.iterchildren()]
 
     def _subject_text(self):
@@ -714,8 +787,12 @@ class OAIRecord(Record):
     parser and class to return.
     """
 
-    def _init(self):
-        super(OAIRecord, self)._init()
+    @property
+    def key(self):
+        """
+        :return: The OAI ID as a string.
+        """
+        return self.oai_urn
 
     @property
     def oai_urn(self):
@@ -743,37 +820,53 @@ class OAIRecord(Record):
         """
         Exposes the metadata content of an OAIRecord.
 
-        :return: A reparsed root element either in the MODSRecord or DCRecord class, as appropriate.
+        Records read with a namespace-dispatching lookup (see record_lookup) already hold their
+        metadata in the matching class and it is returned in place. Otherwise the metadata is
+        reparsed into a new document.
+
+        The element is looked up once and kept on this OAIRecord, so repeated access returns the
+        same object (and a MARCRecord keeps its field index, see MARCRecord).
+
+        :return: The metadata root element in the MODSRecord, DCRecord or MARCRecord class, as appropriate.
         """
+        try:
+            return self.__dict__['_metadata']
+        except KeyError:
+            pass
+        content = None
         record_data = self.find('./{*}metadata')
         if record_data is not None:
-            try:
-                if 'mods' in record_data[0].tag:
-                    mods_parser_registration = etree.ElementDefaultClassLookup(element=MODSRecord)
-                    mods_parser = etree.XMLParser()
-                    mods_parser.set_element_class_lookup(mods_parser_registration)
-                    return etree.XML(etree.tostring(record_data[0], encoding='UTF-8').decode('utf-8'),
-                                     parser=mods_parser)
-                elif 'qualified' in record_data[0].tag:
-                    qdc_parser_registration = etree.ElementDefaultClassLookup(element=DCRecord)
-                    qdc_parser = etree.XMLParser()
-                    qdc_parser.set_element_class_lookup(qdc_parser_registration)
-                    return etree.XML(etree.tostring(record_data[0], encoding='UTF-8').decode('utf-8'),
-                                     parser=qdc_parser)
-                elif 'dc' in record_data[0].tag:
-                    dc_parser_registration = etree.ElementDefaultClassLookup(element=DCRecord)
-                    dc_parser = etree.XMLParser()
-                    dc_parser.set_element_class_lookup(dc_parser_registration)
-                    return etree.XML(etree.tostring(record_data[0], encoding='UTF-8').decode('utf-8'),
-                                     parser=dc_parser)
-                elif 'MARC21' in record_data[0].tag:
-                    marcxml_parser_registration = etree.ElementDefaultClassLookup(element=MARCRecord)
-                    marcxml_parser = etree.XMLParser()
-                    marcxml_parser.set_element_class_lookup(marcxml_parser_registration)
-                    return etree.XML(etree.tostring(record_data[0], encoding='UTF-8').decode('utf-8'),
-                                     parser=marcxml_parser)
-            except IndexError:
-                pass
+            content = next(record_data.iterchildren(etree.Element), None)
+            if content is not None and not isinstance(content, METADATA_CLASSES):
+                content = etree.fromstring(etree.tostring(content), parser=record_parser())
+            if not isinstance(content, METADATA_CLASSES):
+                content = None
+        self.__dict__['_metadata'] = content
+        return content
+
+
+class _ElementTargets(dict):
+    """
+    Maps child tags to the (position, delimiter) pairs of the requested elements they match.
+    """
+
+    def __init__(self, elems, delimiters):
+        super(_ElementTargets, self).__init__()
+        self.elems = elems
+        self.delimiters = dict(delimiters)
+
+    def resolve(self, tag):
+        local = '{*}' + tag.rpartition('}')[2]
+        targets = self[tag] = [(index, self.delimiters.get(elem)) for index, elem in enumerate(self.elems)
+                               if elem == tag or elem == local]
+        return targets
+
+
+# lru_cache is safe to call from several threads; two threads resolving the same new tag
+# store equal lists
+@functools.lru_cache(maxsize=256)
+def _element_targets(elems, delimiters):
+    return _ElementTargets(elems, delimiters)
 
 
 class DCRecord(Record):
@@ -781,9 +874,6 @@ class DCRecord(Record):
     Record class for Dublin Core and Qualified Dublin Core elements.
     """
 
-    def _init(self):
-        super(DCRecord, self)._init()
-
     def get_element(self, elem, delimiter=None):
         """
         :param elem: An element. It can be named explicitly by namespace using Clark Notation,
@@ -791,19 +881,204 @@ class DCRecord(Record):
         :param delimiter: A character used to separate values within a single element.
         :return: A list of element values.
         """
-        if self.find('{0}'.format(elem)) is not None:
+        items = self.findall(elem)
+        if items:
             if delimiter is None:
-                return [item.text for item in self.findall('{0}'.format(elem)) if item.text]
+                return [item.text for item in items if item.text]
             else:
                 return [split_text.strip()
-                        for item in self.findall('{0}'.format(elem)) if item.text
+                        for item in items if item.text
                         for split_text in item.text.split(delimiter)]
 
+    def get_elements(self, elems, delimiters=None):
+        """
+        Read several elements in a single pass over the record's children.
+
+        :param elems: A list of child elements named in Clark Notation, or in the form '{*}elem'
+            to match elem in any namespace.
+        :param delimiters: A dict of elem to the character used to separate values within a single element.
+        :return: An OrderedDict of elem to a list of element values, in the order of elems.
+        """
+        elems = tuple(elems)
+        targets_by_tag = _element_targets(elems, tuple(sorted((delimiters or {}).items())))
+        found = [[] for elem in elems]
+        for item in self:
+            tag = item.tag
+            targets = targets_by_tag.get(tag)
+            if targets is None:
+                if not isinstance(tag, str):
+                    continue  # comments and processing instructions
+                targets = targets_by_tag.resolve(tag)
+            text = item.text
+            if not text:
+                continue
+            for index, delimiter in targets:
+                if delimiter is None:
+                    found[index].append(text)
+                else:
+                    found[index].extend(split_text.strip() for split_text in text.split(delimiter))
+        return collections.OrderedDict(zip(elems, found))
+
+
+class DataField(collections.namedtuple('DataField', 'tag ind1 ind2 subfields codes elem')):
+    """
+    A MARC data field. Indexing by subfield code returns the first value of that subfield,
+    e.g. field['a']; integer indexes behave as for any tuple.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, code):
+        if isinstance(code, str):
+            return self.codes[code][0]
+        return super(DataField, self).__getitem__(code)
+
+    def get(self, code, default=None):
+        """
+        :param code: A subfield code.
+        :param default: Value returned if the field has no such subfield.
+        :return: The first value of the subfield.
+        """
+        try:
+            return self.codes[code][0]
+        except KeyError:
+            return default
+
+    def get_all(self, code):
+        """
+        :param code: A subfield code.
+        :return: A list of every value of the subfield, in field order.
+        """
+        return self.codes.get(code, [])
+
+
+__pdoc__['DataField.tag'] = 'Value of elem@tag attribute.'
+__pdoc__['DataField.ind1'] = 'Value of elem@ind1 attribute.'
+__pdoc__['DataField.ind2'] = 'Value of elem@ind2 attribute.'
+__pdoc__['DataField.subfields'] = 'List of (code, value) tuples in field order.'
+__pdoc__['DataField.codes'] = 'Dict of subfield code to list of values.'
+__pdoc__['DataField.elem'] = 'lxml.etree.Element.'
+
 
 class MARCRecord(Record):
     """
-    Record class for MARC records.
+    Record class for MARCXML records.
+
+    Control and data fields are indexed by tag on first use, so record['001'] returns a
+    control field's text and record['245']['a'] the first 245$a, without searching the
+    record for each lookup. Integer indexes still return child elements. The index is
+    not updated when the record is modified; call MARCRecord.reindex() after changes.
+
+    The index is stored on the Python proxy object, not on the element. lxml only keeps
+    a proxy while something references it, so hold on to the record while reading its
+    fields: the same element reached again after its proxy was released (e.g. by
+    iterating over its parent once more) is a new proxy and is indexed again.
+    OAIRecord.metadata keeps its MARCRecord, so record.metadata['245'] followed by
+    record.metadata['100'] indexes the fields once.
+    """
+
+    def __getitem__(self, tag):
+        if isinstance(tag, str):
+            return self._index[tag][0]
+        return super(MARCRecord, self).__getitem__(tag)
+
+    def __contains__(self, tag):
+        if isinstance(tag, str):
+            return tag in self._index
+        return super(MARCRecord, self).__contains__(tag)
+
+    @property
+    def _index(self):
+        try:
+            return self.__dict__['_field_index']
+        except KeyError:
+            return self.reindex()
+
+    def reindex(self):
+        """
+        Rebuild the field index in a single pass over the record's fields.
+
+        :return: A dict of tag to a list of control field texts or DataField elements.
+        """
+        namespace = self.tag[:self.tag.find('}') + 1]
+        control_tag = '{0}controlfield'.format(namespace)
+        subfield_tag = '{0}subfield'.format(namespace)
+        index = {}
+        for field in self.iterchildren(control_tag, '{0}datafield'.format(namespace)):
+            if field.tag == control_tag:
+                value = field.text or ''
+            else:
+                subfields = [(subfield.get('code'), subfield.text or '')
+                             for subfield in field.iterchildren(subfield_tag)]
+                codes = {}
+                for code, text in subfields:
+                    codes.setdefault(code, []).append(text)
+                value = DataField(field.get('tag'), field.get('ind1', ' '), field.get('ind2', ' '),
+                                  subfields, codes, field)
+            index.setdefault(field.get('tag'), []).append(value)
+        self.__dict__['_field_index'] = index
+        return index
+
+    def fields(self, tag, ind1=None, ind2=None):
+        """
+        :param tag: A field tag, e.g. '650'.
+        :param ind1: Only return data fields with this first indicator.
+        :param ind2: Only return data fields with this second indicator.
+        :return: A list of control field texts or DataField elements, in record order.
+        """
+        fields = self._index.get(tag, [])
+        if ind1 is not None:
+            fields = [field for field in fields if field.ind1 == ind1]
+        if ind2 is not None:
+            fields = [field for field in fields if field.ind2 == ind2]
+        return fields
+
+    @property
+    def leader(self):
+        """
+        :return: The record leader as a string.
+        """
+        leader = self.find('{0}leader'.format(self.tag[:self.tag.find('}') + 1]))
+        if leader is not None:
+            return leader.text
+
+
+METADATA_CLASSES = (MODSRecord, DCRecord, MARCRecord)
+
+NAMESPACE_CLASSES = [(NAMESPACES['mods'], MODSRecord),
+                     (NAMESPACES['oai_dc'], OAIRecord),
+                     (NAMESPACES['repox'], OAIRecord),
+                     (NAMESPACES['oai_dc_record'], DCRecord),
+                     (NAMESPACES['qdc'], DCRecord),
+                     (NAMESPACES['dc'], DCRecord),
+                     (NAMESPACES['dcterms'], DCRecord),
+                     ('{http://purl.org/dc/terms/}', DCRecord),
+                     (NAMESPACES['marc'], MARCRecord)]
+__pdoc__['NAMESPACE_CLASSES'] = 'Record class used for the elements of each namespace.'
+
+_parsers = threading.local()
+
+
+def record_lookup(default=Record):
+    """
+    Build an element class lookup that dispatches on namespace, so a single parser
+    creates MODS, OAI, Dublin Core and MARC elements in their record classes.
+
+    :param default: Class for elements in any other namespace.
+    :return: An etree.ElementNamespaceClassLookup.
     """
+    lookup = etree.ElementNamespaceClassLookup(etree.ElementDefaultClassLookup(element=default))
+    for namespace, record_class in NAMESPACE_CLASSES:
+        lookup.get_namespace(namespace.strip('{}'))[None] = record_class
+    return lookup
+
 
-    def _init(self):
-        super(MARCRecord, self)._init()
+def record_parser():
+    """
+    :return: A parser using record_lookup. Parsers are not thread safe, so one is kept per thread.
+    """
+    try:
+        return _parsers.parser
+    except AttributeError:
+        _parsers.parser = etree.XMLParser()
+        _parsers.parser.set_element_class_lookup(record_lookup())
+        return _parsers.parser
@@ -0,0 +1,187 @@
+"""
+Metadata quality rules. Rules are declared against record properties, and a RuleSet reads
+each property once per record however many rules use it, so a set of checks costs about
+one pass over the records.
+"""
+
+import collections
+import concurrent.futures
+import os
+
+from lxml import etree
+
+from pymods.parallel import ordered_results, parse_document, record_documents
+from pymods.reader import Reader
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+Rule = collections.namedtuple('Rule', 'name properties check')
+__pdoc__['Rule'] = 'A quality rule. A record passes if check(*values of properties) is true.'
+__pdoc__['Rule.name'] = 'Rule name used in reports.'
+__pdoc__['Rule.properties'] = "Tuple of record property names, e.g. ('rights',)."
+__pdoc__['Rule.check'] = 'Function called with the property values.'
+
+Violation = collections.namedtuple('Violation', 'ordinal key rules')
+__pdoc__['Violation.ordinal'] = 'Zero-based position of the record in the reader.'
+__pdoc__['Violation.key'] = 'The record key (see Record.key), or None.'
+__pdoc__['Violation.rules'] = 'List of the names of the rules the record failed.'
+
+Report = collections.namedtuple('Report', 'records counts violations')
+__pdoc__['Report.records'] = 'Number of records checked.'
+__pdoc__['Report.counts'] = 'OrderedDict of rule name to number of records failing it.'
+__pdoc__['Report.violations'] = 'List of Violation elements.'
+
+# stands in for a property whose accessor raised, failing every rule that reads it
+_FAILED = object()
+
+
+def rule(name, properties, check):
+    """
+    Declare a rule.
+
+    :param name: Rule name used in reports.
+    :param properties: A property name or list of property names, e.g. 'purl' or ['rights', 'purl'].
+    :param check: Function called with the value of each property, returning True if the record passes.
+        When rules are run in worker processes on platforms that don't fork, check must be picklable
+        (a module level function).
+    :return: A Rule.
+    """
+    if isinstance(properties, str):
+        properties = (properties,)
+    return Rule(name, tuple(properties), check)
+
+
+def _has_value(value):
+    return bool(value)
+
+
+def _rightsstatements_uri(rights):
+    return any(item.uri and item.uri.startswith('http://rightsstatements.org/') for item in rights)
+
+
+def _lcsh_uri(subjects):
+    return any(subject.authority == 'lcsh' and subject.uri for subject in subjects)
+
+
+HAS_TYPE_OF_RESOURCE = rule('type_of_resource', 'type_of_resource', _has_value)
+HAS_RIGHTSSTATEMENTS_URI = rule('rightsstatements_uri', 'rights', _rightsstatements_uri)
+HAS_LCSH_URI = rule('lcsh_uri', 'subjects', _lcsh_uri)
+HAS_PURL = rule('purl', 'purl', _has_value)
+
+
+class RuleSet(object):
+    """
+    Evaluates a list of rules against records. The properties the rules read are
+    collected into one plan, and each is read once per record.
+    """
+
+    def __init__(self, rules, processes=1, chunk_size=500):
+        """
+        :param rules: A list of Rule elements.
+        :param processes: Number of worker processes for RuleSet.violations(). None uses every CPU.
+        :param chunk_size: Number of records sent to a worker process at a time.
+        """
+        self.rules = list(rules)
+        self.properties = list(collections.OrderedDict.fromkeys(
+            name for each_rule in self.rules for name in each_rule.properties))
+        self.processes = processes
+        self.chunk_size = chunk_size
+
+    def evaluate(self, record):
+        """
+        :param record: A record.
+        :return: A list of the names of the rules the record fails.
+        """
+        values = {}
+        for name in self.properties:
+            try:
+                values[name] = getattr(record, name)
+            except Exception:
+                values[name] = _FAILED
+        failed = []
+        for each_rule in self.rules:
+            arguments = [values[name] for name in each_rule.properties]
+            if _FAILED in arguments or not each_rule.check(*arguments):
+                failed.append(each_rule.name)
+        return failed
+
+    def violations(self, reader):
+        """
+        :param reader: Any pymods reader, or iterable of records. Worker processes require a pymods reader.
+        :return: An iterator of Violation elements, in reader order.
+        """
+        for checked, violations in self._checked(reader):
+            for violation in violations:
+                yield violation
+
+    def report(self, reader):
+        """
+        :param reader: Any pymods reader, or iterable of records. Worker processes require a pymods reader.
+        :return: A Report. Records of a pymods reader that could not be parsed are counted under 'well_formed'.
+        """
+        records = 0
+        counts = collections.OrderedDict((each_rule.name, 0) for each_rule in self.rules)
+        all_violations = []
+        for checked, violations in self._checked(reader):
+            records += checked
+            all_violations.extend(violations)
+            for violation in violations:
+                for name in violation.rules:
+                    counts[name] = counts.get(name, 0) + 1
+        return Report(records, counts, all_violations)
+
+    def _checked(self, reader):
+        """
+        :return: An iterator of (number of records checked, list of Violation elements) tuples.
+        """
+        if not isinstance(reader, Reader):
+            # an iterable of records, which is never run in worker processes
+            for ordinal, record in enumerate(reader):
+                failed = self.evaluate(record)
+                yield 1, [Violation(ordinal, record.key, failed)] if failed else []
+            return
+        if self.processes == 1:
+            # the same code path as the worker processes, so results don't depend on processes
+            for documents in record_documents(reader, self.chunk_size):
+                yield _evaluate(self, reader.iter_elem, documents)
+            return
+        workers = self.processes or os.cpu_count()
+        chunks = ((reader.iter_elem, documents) for documents in record_documents(reader, self.chunk_size))
+        # the rule set is handed over when the workers start, which doesn't pickle it on platforms that fork
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_install,
+                                                    initargs=(self,)) as executor:
+            for result in ordered_results(executor, _evaluate_documents, chunks, 2 * workers):
+                yield result
+
+
+_worker_rule_set = None
+
+
+def _install(rule_set):
+    global _worker_rule_set
+    _worker_rule_set = rule_set
+
+
+def _evaluate_documents(arguments):
+    iter_elem, documents = arguments
+    return _evaluate(_worker_rule_set, iter_elem, documents)
+
+
+def _evaluate(rule_set, iter_elem, documents):
+    checked = 0
+    violations = []
+    for span, document in documents:
+        try:
+            record = parse_document(document, iter_elem)
+        except etree.XMLSyntaxError:
+            checked += 1
+            violations.append(Violation(span.ordinal, None, ['well_formed']))
+            continue
+        if record is None:
+            # the span's element is in another namespace
+            continue
+        checked += 1
+        failed = rule_set.evaluate(record)
+        if failed:
+            violations.append(Violation(span.ordinal, record.key, failed))
+    return checked, violations
@@ -0,0 +1,307 @@
+"""
+Lightweight record boundary scanning. Locates records in an XML file by byte offset
+without building an element tree, so individual records can be parsed on demand.
+"""
+
+import bisect
+import collections
+import io
+import mmap
+import re
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+RecordSpan = collections.namedtuple('RecordSpan', 'ordinal offset length')
+__pdoc__['RecordSpan.ordinal'] = 'Zero-based position of the record in the document.'
+__pdoc__['RecordSpan.offset'] = 'Byte offset of the record start tag.'
+__pdoc__['RecordSpan.length'] = 'Length of the record in bytes, including its end tag.'
+
+# remainder of a tag, honouring quoted attribute values which may contain '>'
+_TAG_TAIL = rb'(?:[^>"\']|"[^"]*"|\'[^\']*\')*?(/?)>'
+
+_ROOT = re.compile(rb'<!--.*?-->|<\?.*?\?>|<!DOCTYPE(?:[^\[>]|\[.*?\])*>|<([A-Za-z_][\w.:-]*)' + _TAG_TAIL,
+                   re.DOTALL)
+_QUALIFIER = re.compile(rb'(/?)(?:[A-Za-z_][\w.-]*:)?')
+_TAIL = re.compile(_TAG_TAIL, re.DOTALL)
+# markup between records, for tracking the namespace declarations of open elements
+_MARKUP = re.compile(rb'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<!DOCTYPE(?:[^\[>]|\[.*?\])*>|<(/?)[A-Za-z_][\w.:-]*' +
+                     _TAG_TAIL, re.DOTALL)
+_XMLNS = re.compile(rb'\s(xmlns(?::[\w.-]+)?)\s*=\s*("[^"]*"|\'[^\']*\')')
+_QNAME = re.compile(rb'<([^\s/>]+)')
+# markup in which tag-like text is not markup
+_SKIPPED = ((b'<!--', b'-->'), (b'<![CDATA[', b']]>'))
+# how far ahead to look for comments and CDATA sections at a time
+_WINDOW = 1 << 20
+
+
+def local_name(tag):
+    """
+    :param tag: A tag in Clark notation, e.g. '{http://www.loc.gov/mods/v3}mods' or '{*}record'.
+    :return: The tag's local name.
+    """
+    return tag.rsplit('}', 1)[-1]
+
+
+def _declaration(tag, qname):
+    # the namespace declared for qname's prefix in tag, or None
+    prefix = qname.rpartition(b':')[0]
+    name = b'xmlns:' + prefix if prefix else b'xmlns'
+    for match in _XMLNS.finditer(tag):
+        if match.group(1) == name:
+            return match.group(2)[1:-1]
+    return None
+
+
+class RecordScanner(object):
+    """
+    Finds the byte spans of record elements in an XML file using regular expressions
+    over a memory map of the file. Only the outermost matching elements are reported.
+
+    Records are matched on local name alone; the namespace is checked when a span is parsed.
+    Files must use an ASCII compatible encoding (UTF-8, Latin-1, etc.).
+    """
+
+    def __init__(self, source, record_name, nested=True):
+        """
+        :param source: A file path or a binary file object.
+        :param record_name: Local name of the record element, e.g. 'mods'.
+        :param nested: Whether record elements may contain elements with the same local name
+            (e.g. a marc:record inside an OAI record). If False, a start tag inside a record
+            ends the previous, unterminated, record.
+        """
+        self.source = source
+        self.record_name = record_name
+        self.nested = nested
+        # a literal leading pattern lets the regex engine use its fast substring search
+        self._name = re.compile(re.escape(record_name.encode('ascii')) + rb'(?=[\s>]|/>)')
+        self._file = None
+        self._owns_file = False
+        self.data = None
+        self.prefix = b''
+        self.suffix = b''
+        # namespace declarations of the elements open between the root and the records:
+        # the markup up to _cursor has been read, and _contexts[i] applies from _points[i]
+        self._stack = []
+        self._cursor = None
+        self._points = []
+        self._contexts = []
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self):
+        """
+        Map the source into memory and read the document context (prolog and root start tag).
+
+        :return: self
+        """
+        if hasattr(self.source, 'read'):
+            self._file = self.source
+        else:
+            self._file = open(self.source, 'rb')
+            self._owns_file = True
+        try:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, ValueError, OSError, io.UnsupportedOperation):
+            # empty files can't be mapped, in-memory file objects have no descriptor
+            self.data = self._file.read()
+        self._read_context()
+        return self
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = None
+        if self._owns_file:
+            self._file.close()
+        self._file = None
+
+    def __iter__(self):
+        return self.spans()
+
+    def spans(self, offset=0, ordinal=0):
+        """
+        Scan for records.
+
+        :param offset: Byte offset to start scanning from. Must not fall inside a record.
+        :param ordinal: Ordinal to assign the first record found.
+        :return: An iterator of RecordSpan elements.
+        """
+        self._context(offset)
+        for span in self._spans(offset, ordinal):
+            self._skip(span)
+            yield span
+
+    def _spans(self, offset, ordinal=0):
+        depth = 0
+        start = None
+        for position, end, closing, empty in self._tags(offset):
+            if closing:
+                if depth == 0:
+                    continue
+                depth -= 1
+                if depth == 0:
+                    yield RecordSpan(ordinal, start, end - start)
+                    ordinal += 1
+            elif empty:
+                if depth == 0:
+                    yield RecordSpan(ordinal, position, end - position)
+                    ordinal += 1
+            elif depth == 0:
+                start = position
+                start_tag = self.data[position:end]
+                depth = 1
+            elif self.nested and not self._sibling(start_tag, self.data[position:end]):
+                depth += 1
+            else:
+                # the open record is unterminated
+                yield RecordSpan(ordinal, start, position - start)
+                ordinal += 1
+                start = position
+                start_tag = self.data[position:end]
+                depth = 1
+        if depth > 0:
+            # unterminated record
+            yield RecordSpan(ordinal, start, len(self.data) - start)
+
+    def _sibling(self, record_tag, tag):
+        """
+        :param record_tag: Start tag of the open record.
+        :param tag: A start tag with the record name inside it.
+        :return: Whether tag starts a record in the same namespace as the open record, rather
+            than a nested one (e.g. a MARC record inside an OAI-PMH record), which means the
+            open record is unterminated.
+        """
+        qname = _QNAME.match(tag).group(1)
+        if qname != _QNAME.match(record_tag).group(1):
+            return False
+        declared = _declaration(tag, qname)
+        return declared is None or declared == _declaration(record_tag, qname)
+
+    def _tags(self, offset):
+        """
+        Find record start and end tags by searching for the record name and checking the
+        text before it, which is much faster than tokenizing every tag in the document.
+
+        :return: An iterator of (tag start, tag end, is end tag, is empty element) tuples.
+        """
+        data = self.data
+        skip_start, skip_end = self._skipped(offset)
+        for match in self._name.finditer(data, offset):
+            name_start = match.start()
+            while name_start >= skip_end:
+                skip_start, skip_end = self._skipped(skip_end)
+            if skip_start <= name_start:
+                continue
+            position = data.rfind(b'<', max(offset, name_start - 256), name_start)
+            if position < 0:
+                continue
+            qualifier = _QUALIFIER.fullmatch(data, position + 1, name_start)
+            if qualifier is None:
+                continue
+            tail = _TAIL.match(data, match.end())
+            if tail is None:
+                continue
+            yield position, tail.end(), bool(qualifier.group(1)), bool(tail.group(1))
+
+    def _skipped(self, offset):
+        """
+        :return: The (start, end) of the next comment or CDATA section within a window
+            after offset, or the (end, end) of the window if there is none.
+        """
+        limit = min(len(self.data), offset + _WINDOW)
+        found = limit, limit
+        for opener, closer in _SKIPPED:
+            start = self.data.find(opener, offset, found[0] + len(opener) - 1)
+            if start >= 0:
+                end = self.data.find(closer, start + len(opener))
+                found = start, len(self.data) if end < 0 else end + len(closer)
+        return found
+
+    def read(self, span):
+        """
+        :param span: A RecordSpan.
+        :return: The raw bytes of the record.
+        """
+        return self.data[span.offset:span.offset + span.length]
+
+    def wrap(self, span):
+        """
+        :param span: A RecordSpan.
+        :return: A well-formed document containing only the record, wrapped in the
+            original root element so namespace declarations remain in scope. Declarations
+            made by elements between the root and the record (e.g. an OAI-PMH ListRecords
+            element) are copied onto an extra element around the record.
+        """
+        declarations = self._context(span.offset)
+        if not declarations:
+            return self.prefix + self.read(span) + self.suffix
+        return self.prefix + b'<context' + declarations + b'>' + self.read(span) + b'</context>' + self.suffix
+
+    def _read_context(self):
+        for match in _ROOT.finditer(self.data):
+            qname = match.group(1)
+            if qname is None:
+                continue
+            if qname.split(b':')[-1] == self.record_name.encode('ascii'):
+                # the root is itself a record
+                self.prefix = self.data[:match.start()]
+                self.suffix = b''
+            else:
+                self.prefix = self.data[:match.end()]
+                self.suffix = b'</' + qname + b'>'
+                self._cursor = match.end()
+            break
+
+    def _context(self, offset):
+        """
+        :param offset: A byte offset outside any record.
+        :return: The namespace declarations in scope at offset that are not made by the root.
+        """
+        if self._cursor is None:
+            return b''
+        if offset > self._cursor:
+            # read up to offset, stepping over records, which leave the open elements unchanged
+            for span in self._spans(self._cursor):
+                if span.offset >= offset:
+                    break
+                self._skip(span)
+            if offset > self._cursor:
+                self._read_markup(self._cursor, offset)
+                self._cursor = offset
+        index = bisect.bisect_right(self._points, offset) - 1
+        return self._contexts[index] if index >= 0 else b''
+
+    def _skip(self, span):
+        if self._cursor is None:
+            return
+        if span.offset > self._cursor:
+            self._read_markup(self._cursor, span.offset)
+        self._cursor = max(self._cursor, span.offset + span.length)
+
+    def _read_markup(self, start, end):
+        stack = self._stack
+        for match in _MARKUP.finditer(self.data, start, end):
+            closing, empty = match.group(1), match.group(2)
+            if closing is None or empty:
+                # comments, processing instructions and empty elements
+                continue
+            if closing:
+                if stack and stack.pop():
+                    self._changed(match.end())
+            else:
+                stack.append(b''.join(declaration.group(0) for declaration in _XMLNS.finditer(match.group(0))))
+                if stack[-1]:
+                    self._changed(match.end())
+
+    def _changed(self, position):
+        declarations = collections.OrderedDict()
+        for element in self._stack:
+            for match in _XMLNS.finditer(element):
+                declarations.pop(match.group(1), None)
+                declarations[match.group(1)] = match.group(0)
+        self._points.append(position)
+        self._contexts.append(b''.join(declarations.values()))
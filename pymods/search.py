@@ -0,0 +1,299 @@
+"""
+Persistent full-text index over record titles, abstracts, notes and subjects. The index
+is an SQLite file holding one postings row per term and record, with the term's
+positions stored as delta-encoded varints. Queries are ranked with BM25, quoted phrases
+are matched on positions, and hits resolve back to records through their byte offsets
+in the source file.
+"""
+
+import collections
+import math
+import os
+import re
+import sqlite3
+
+from pymods.fingerprint import fingerprint
+from pymods.parallel import parse_document
+from pymods.scanner import RecordScanner, RecordSpan, local_name
+
+# the star import in pymods would otherwise replace the pymods.fingerprint module
+__all__ = ['FIELDS', 'K1', 'B', 'Hit', 'IndexUpdate', 'tokenize', 'field_texts', 'encode_positions',
+           'decode_positions', 'SearchIndex']
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+# record properties indexed, in position order
+FIELDS = ('titles', 'abstract', 'note', 'subjects')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+Hit = collections.namedtuple('Hit', 'key score source iter_elem ordinal offset length')
+__pdoc__['Hit.key'] = 'The record key (see Record.key), or the hex fingerprint of records without one.'
+__pdoc__['Hit.score'] = 'BM25 score.'
+__pdoc__['Hit.source'] = 'Absolute path of the indexed file.'
+__pdoc__['Hit.iter_elem'] = 'Tag of the record element.'
+__pdoc__['Hit.ordinal'] = 'Zero-based position of the record in the file.'
+__pdoc__['Hit.offset'] = 'Byte offset of the record start tag.'
+__pdoc__['Hit.length'] = 'Length of the record in bytes.'
+
+IndexUpdate = collections.namedtuple('IndexUpdate', 'added changed deleted unchanged')
+__pdoc__['IndexUpdate'] = 'Number of records added, reindexed, removed and left as they were by SearchIndex.update().'
+
+_TOKEN = re.compile(r'\w+')
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+    """
+    :param text: A string.
+    :return: A list of case-folded word tokens.
+    """
+    return _TOKEN.findall(text.casefold())
+
+
+def field_texts(record):
+    """
+    :param record: A MODSRecord.
+    :return: A list of the text values of the indexed fields, in FIELDS order.
+    """
+    texts = list(record.titles)
+    texts.extend(abstract.text for abstract in record.abstract)
+    texts.extend(note.text for note in record.note)
+    texts.extend(subject.text for subject in record.subjects)
+    return [text for text in texts if text]
+
+
+def encode_positions(positions):
+    """
+    :param positions: Ascending list of non-negative integers.
+    :return: The gaps between positions as varint bytes.
+    """
+    encoded = bytearray()
+    previous = 0
+    for position in positions:
+        gap = position - previous
+        previous = position
+        while gap > 0x7f:
+            encoded.append(gap & 0x7f | 0x80)
+            gap >>= 7
+        encoded.append(gap)
+    return bytes(encoded)
+
+
+def decode_positions(encoded):
+    """
+    :param encoded: Bytes from encode_positions().
+    :return: The list of positions.
+    """
+    positions = []
+    position = gap = shift = 0
+    for byte in encoded:
+        gap |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            position += gap
+            positions.append(position)
+            gap = shift = 0
+    return positions
+
+
+def _postings(texts):
+    positions = collections.defaultdict(list)
+    position = 0
+    for text in texts:
+        for token in tokenize(text):
+            positions[token].append(position)
+            position += 1
+        # leave a gap so phrases don't match across two values
+        position += 1
+    return positions, position - len(texts)
+
+
+class SearchIndex(object):
+    """
+    SQLite backed inverted index of records. SearchIndex.update() indexes a reader's file
+    and, run again, reindexes only the records whose fingerprint changed.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Location of the SQLite index. Created if it does not exist.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        # the index can always be rebuilt from its source files, so trade durability for write speed
+        self.connection.execute('PRAGMA synchronous = OFF')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS documents (doc_id INTEGER PRIMARY KEY, key TEXT NOT NULL, '
+                                'digest BLOB NOT NULL, source TEXT NOT NULL, iter_elem TEXT NOT NULL, '
+                                'ordinal INTEGER NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL, '
+                                'tokens INTEGER NOT NULL, UNIQUE (source, key))')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, doc_id INTEGER NOT NULL, '
+                                'frequency INTEGER NOT NULL, positions BLOB NOT NULL, '
+                                'PRIMARY KEY (term, doc_id)) WITHOUT ROWID')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS postings_doc_id ON postings (doc_id)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT count(*) FROM documents').fetchone()[0]
+
+    def update(self, reader):
+        """
+        Bring the index up to date with a reader's file. Records are matched to indexed
+        records by key; unchanged records only have their location updated, and records
+        no longer in the file are removed. If a key occurs more than once in the file, its
+        last record is indexed.
+
+        :param reader: A pymods reader of MODSRecords.
+        :return: An IndexUpdate.
+        """
+        source = os.path.abspath(reader.file_location)
+        cursor = self.connection.cursor()
+        # key: (doc_id, digest indexed by this update, digest before this update)
+        seen = {}
+        cursor.execute('BEGIN')
+        try:
+            indexed = dict((key, (doc_id, digest)) for doc_id, key, digest in cursor.execute(
+                'SELECT doc_id, key, digest FROM documents WHERE source = ?', (source,)))
+            for span, record in reader.iter_located():
+                digest = fingerprint(record)
+                key = record.key or digest.hex()
+                location = span.ordinal, span.offset, span.length
+                if key in seen:
+                    doc_id, previous, before = seen[key]
+                else:
+                    doc_id, before = indexed.pop(key, (None, None))
+                    previous = before
+                seen[key] = doc_id, digest, before
+                if previous == digest:
+                    cursor.execute('UPDATE documents SET ordinal = ?, offset = ?, length = ? WHERE doc_id = ?',
+                                   location + (doc_id,))
+                    continue
+                positions, tokens = _postings(field_texts(record))
+                if doc_id is None:
+                    cursor.execute('INSERT INTO documents VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                   (key, digest, source, reader.iter_elem) + location + (tokens,))
+                    doc_id = cursor.lastrowid
+                    seen[key] = doc_id, digest, before
+                else:
+                    cursor.execute('UPDATE documents SET digest = ?, ordinal = ?, offset = ?, length = ?, tokens = ? '
+                                   'WHERE doc_id = ?', (digest,) + location + (tokens, doc_id))
+                    cursor.execute('DELETE FROM postings WHERE doc_id = ?', (doc_id,))
+                cursor.executemany('INSERT INTO postings VALUES (?, ?, ?, ?)',
+                                   [(term, doc_id, len(term_positions), encode_positions(term_positions))
+                                    for term, term_positions in positions.items()])
+            for doc_id, digest in indexed.values():
+                cursor.execute('DELETE FROM postings WHERE doc_id = ?', (doc_id,))
+                cursor.execute('DELETE FROM documents WHERE doc_id = ?', (doc_id,))
+        except BaseException:
+            cursor.execute('ROLLBACK')
+            raise
+        cursor.execute('COMMIT')
+        added = sum(1 for doc_id, digest, before in seen.values() if before is None)
+        changed = sum(1 for doc_id, digest, before in seen.values() if before not in (None, digest))
+        return IndexUpdate(added, changed, len(indexed), len(seen) - added - changed)
+
+    def search(self, query, limit=10):
+        """
+        Ranked search. Quoted phrases, e.g. '"fire line" safety', must all occur in a hit;
+        other words are optional and only affect the ranking.
+
+        :param query: Query string.
+        :param limit: Maximum number of hits, or None for all.
+        :return: A list of Hit elements, best first.
+        """
+        phrases = []
+        words = []
+        for phrase, word in _QUERY.findall(query):
+            if phrase:
+                tokens = tokenize(phrase)
+                if tokens:
+                    phrases.append(tokens)
+            else:
+                words.extend(tokenize(word))
+        terms = list(collections.OrderedDict.fromkeys(words + [token for tokens in phrases for token in tokens]))
+        if not terms:
+            return []
+        documents, average = self.connection.execute('SELECT count(*), avg(tokens) FROM documents').fetchone()
+        postings = dict((term, self._postings(term)) for term in terms)
+        if phrases:
+            candidates = None
+            for tokens in phrases:
+                matched = self._phrase(tokens, postings)
+                candidates = matched if candidates is None else candidates & matched
+        else:
+            candidates = set(doc_id for term in terms for doc_id in postings[term])
+        if not candidates:
+            return []
+        lengths = self._lengths(candidates)
+        scores = dict.fromkeys(candidates, 0.0)
+        for term in terms:
+            term_postings = postings[term]
+            idf = math.log(1 + (documents - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            for doc_id in candidates:
+                posting = term_postings.get(doc_id)
+                if posting is not None:
+                    frequency = posting[0]
+                    norm = K1 * (1 - B + B * lengths[doc_id] / average)
+                    scores[doc_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return self._hits(ranked)
+
+    def record(self, hit):
+        """
+        Read a hit's record from its source file.
+
+        :param hit: A Hit.
+        :return: The record. Offsets are those of the last update, so the file should not
+            have changed since. The markup before the record is scanned for namespace declarations.
+        """
+        with RecordScanner(hit.source, local_name(hit.iter_elem)) as scanner:
+            document = scanner.wrap(RecordSpan(hit.ordinal, hit.offset, hit.length))
+        return parse_document(document, hit.iter_elem)
+
+    def _postings(self, term):
+        return dict((doc_id, (frequency, positions)) for doc_id, frequency, positions in self.connection.execute(
+            'SELECT doc_id, frequency, positions FROM postings WHERE term = ?', (term,)))
+
+    def _phrase(self, tokens, postings):
+        candidates = set(postings[tokens[0]])
+        for token in tokens[1:]:
+            candidates &= set(postings[token])
+        matched = set()
+        for doc_id in candidates:
+            starts = set(decode_positions(postings[tokens[0]][doc_id][1]))
+            for offset, token in enumerate(tokens[1:], 1):
+                starts &= set(position - offset for position in decode_positions(postings[token][doc_id][1]))
+                if not starts:
+                    break
+            if starts:
+                matched.add(doc_id)
+        return matched
+
+    def _lengths(self, doc_ids):
+        lengths = {}
+        doc_ids = list(doc_ids)
+        # stay under SQLite's default limit on bound parameters
+        for start in range(0, len(doc_ids), 500):
+            chunk = doc_ids[start:start + 500]
+            lengths.update(self.connection.execute('SELECT doc_id, tokens FROM documents WHERE doc_id IN ({0})'.format(
+                ', '.join('?' * len(chunk))), chunk))
+        return lengths
+
+    def _hits(self, ranked):
+        hits = []
+        for doc_id, score in ranked:
+            row = self.connection.execute('SELECT key, source, iter_elem, ordinal, offset, length FROM documents '
+                                          'WHERE doc_id = ?', (doc_id,)).fetchone()
+            hits.append(Hit(row[0], score, *row[1:]))
+        return hits
@@ -0,0 +1,135 @@
+"""
+Bulk loading of MODS records into normalized SQLite tables.
+"""
+
+import collections
+import sqlite3
+
+from pymods.record import interned
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+# table name -> columns, mirroring the named tuples in pymods.record. Every table
+# also has an integer record_id column referencing records.record_id.
+TABLES = collections.OrderedDict([
+    ('records', ('key', 'title', 'type_of_resource')),
+    ('names', ('text', 'type', 'uri', 'authority', 'authorityURI', 'role_text', 'role_code', 'role_authority')),
+    ('subjects', ('text', 'uri', 'authority', 'authorityURI')),
+    ('genres', ('text', 'uri', 'authority', 'authorityURI')),
+    ('identifiers', ('text', 'type')),
+    ('dates', ('text', 'type')),
+    ('rights', ('text', 'type', 'uri')),
+])
+__pdoc__['TABLES'] = 'Table names and their columns (excluding record_id).'
+
+# (table, column) pairs indexed once loading is done
+INDEXES = (('records', 'key'),
+           ('names', 'record_id'), ('names', 'uri'),
+           ('subjects', 'record_id'), ('subjects', 'uri'),
+           ('genres', 'record_id'),
+           ('identifiers', 'record_id'), ('identifiers', 'text'),
+           ('dates', 'record_id'),
+           ('rights', 'record_id'), ('rights', 'uri'))
+
+
+def record_rows(record):
+    """
+    Flatten a MODSRecord into table rows.
+
+    :param record: A MODSRecord.
+    :return: A dict of table name to a list of row tuples, without record_id.
+    """
+    titles = record.titles
+    return {'records': [(record.key, titles[0] if titles else None, record.type_of_resource)],
+            'names': [(name.text, name.type, name.uri, name.authority, name.authorityURI,
+                       name.role.text, name.role.code, name.role.authority) for name in record.names],
+            'subjects': [(subject.text, subject.uri, subject.authority, subject.authorityURI)
+                         for subject in record.subjects],
+            'genres': [(genre.text, genre.uri, genre.authority, genre.authorityURI) for genre in record.genre],
+            'identifiers': [(identifier.text, identifier.type) for identifier in record.identifiers],
+            'dates': [(date.text, date.type) for date in record.dates or []],
+            'rights': [(rights.text, rights.type, rights.uri) for rights in record.rights]}
+
+
+class SQLiteSink(object):
+    """
+    Writes records from a MODSReader into the normalized tables in TABLES. Rows are
+    inserted with executemany, batch_size records per transaction, and indexes are
+    (re)built after the load.
+    """
+
+    def __init__(self, path, batch_size=50000, intern=False):
+        """
+        :param path: Location of the SQLite database. Created if it does not exist.
+        :param batch_size: Number of records per transaction.
+        :param intern: Share repeated strings (types, authorities, role terms) between the
+            buffered rows while loading, see pymods.record.intern_strings().
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.intern = intern
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        # the load can always be repeated, so trade durability for write speed
+        self.connection.execute('PRAGMA synchronous = OFF')
+        self.connection.execute('PRAGMA journal_mode = MEMORY')
+        for table, columns in TABLES.items():
+            primary_key = 'PRIMARY KEY' if table == 'records' else 'NOT NULL'
+            self.connection.execute('CREATE TABLE IF NOT EXISTS {0} (record_id INTEGER {1}, {2})'.format(
+                table, primary_key, ', '.join(columns)))
+        self._inserts = {table: 'INSERT INTO {0} VALUES ({1})'.format(table, ', '.join('?' * (len(columns) + 1)))
+                         for table, columns in TABLES.items()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def load(self, reader):
+        """
+        :param reader: A MODSReader, or any iterable of MODSRecords.
+        :return: Number of records loaded.
+        """
+        if self.intern:
+            with interned():
+                return self._load(reader)
+        return self._load(reader)
+
+    def _load(self, reader):
+        self.drop_indexes()
+        record_id = self.connection.execute('SELECT coalesce(max(record_id), 0) FROM records').fetchone()[0]
+        count = 0
+        batch = {table: [] for table in TABLES}
+        for record in reader:
+            record_id += 1
+            count += 1
+            for table, rows in record_rows(record).items():
+                batch[table].extend((record_id,) + row for row in rows)
+            if count % self.batch_size == 0:
+                self._write(batch)
+        self._write(batch)
+        self.create_indexes()
+        return count
+
+    def create_indexes(self):
+        for table, column in INDEXES:
+            self.connection.execute('CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})'.format(table, column))
+        self.connection.execute('ANALYZE')
+
+    def drop_indexes(self):
+        for table, column in INDEXES:
+            self.connection.execute('DROP INDEX IF EXISTS {0}_{1}'.format(table, column))
+
+    def _write(self, batch):
+        self.connection.execute('BEGIN')
+        try:
+            for table, rows in batch.items():
+                self.connection.executemany(self._inserts[table], rows)
+                del rows[:]
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
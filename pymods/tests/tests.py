@@ -1,7 +1,42 @@
+import asyncio
+import collections
+import http.server
+import io
+import json
 import os
+import tempfile
+import threading
 import unittest
-
-from pymods.reader import MODSReader, OAIReader
+import urllib.parse
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from lxml import etree
+
+import pymods
+from pymods.authority import AuthorityStore, normalize_uri
+from pymods.checkpoint import Checkpoint, Checkpointer, load_checkpoint
+from pymods.export import Column, DCExporter, TabularExporter, column
+from pymods.crosswalk import crosswalk, mods_to_dc
+from pymods.dates import MISSING, date_columns, date_key, overlapping
+from pymods.dedupe import Deduper, normalize
+from pymods.diff import diff, field_differences, plain
+from pymods.exceptions import CheckpointMismatch, MalformedRecord, NameSpaceInvalid, OAIError
+from pymods.fingerprint import FingerprintStore, fingerprint
+from pymods.harvest import OAIHarvester, PagedOAIReader, harvest, record_identifier
+from pymods.profiler import TopK, profile
+from pymods.reader import MODSFeedReader, MODSReader, OAIFeedReader, OAIReader, RecordReader, PARSER_PRESETS
+from pymods.record import DCRecord, MARCRecord, MODSRecord, OAIRecord, intern_strings, interned, record_parser
+from pymods.rules import HAS_LCSH_URI, HAS_PURL, HAS_RIGHTSSTATEMENTS_URI, HAS_TYPE_OF_RESOURCE, RuleSet, rule
+from pymods.search import SearchIndex, decode_positions, encode_positions
+from pymods.sink import SQLiteSink
+from pymods.scanner import RecordScanner
+from pymods.transform import Transform, compiled
+from pymods.validate import Validator
+from pymods.writer import Writer
 
 test_dir_path = os.path.abspath(os.path.dirname(__file__))
 
@@ -481,10 +516,1379 @@ class DCRecordTests(unittest.TestCase):
                     'Outside']
         self.assertEqual(expected, self.second_record.metadata.get_element('./{http://purl.org/dc/terms/}spatial', delimiter=';'))
 
+    def test_dc_missing(self):
+        self.assertIsNone(self.first_record.metadata.get_element('{*}subject'))
+
+    def test_dc_elements(self):
+        expected = {'{*}title': ['Jessie N. Munroe letter to Mrs. Gilpin, January 16, 1912'],
+                    '{http://purl.org/dc/terms/}spatial': ['Coconut Grove (Miami, Fla.)', 'Canterbury', 'Outside'],
+                    '{*}contributor': ['Primus; Jurassic 5'],
+                    '{*}coverage': []}
+        elements = self.second_record.metadata.get_elements(
+            ['{*}title', '{http://purl.org/dc/terms/}spatial', '{*}contributor', '{*}coverage'],
+            delimiters={'{http://purl.org/dc/terms/}spatial': ';'})
+        self.assertEqual(expected, elements)
+        self.assertEqual(list(expected), list(elements))
+
+    def test_dc_export(self):
+        output = io.StringIO(newline='')
+        exporter = DCExporter(['{*}title', '{*}isPartOf'], dialect='excel')
+        self.assertEqual(3, exporter.export(OAIReader(os.path.join(test_dir_path, 'dcterms_xml.xml')), output))
+        lines = output.getvalue().splitlines()
+        self.assertEqual('title,isPartOf', lines[0])
+        self.assertTrue(lines[2].endswith(
+            ',University of Miami. Library. Special Collections|Alan Crockwell Collection|ASM0447'))
+
     def test_oai_urn(self):
         expected = 'oai:lib.fsu.edu.umiami:oai:uofm.library.umiami:oai:merrick.library.miami.edu:asm0447/25'
         self.assertEqual(expected, self.third_record.oai_urn)
 
 
+class SamplingTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.reader = MODSReader(os.path.join(test_dir_path, 'title_xml.xml'))
+
+    def test_head(self):
+        expected = [["Gravity's Rainbow"], ['Homer Simpson: A retrospective']]
+        self.assertEqual(expected, [record.titles for record in self.reader.head(2)])
+
+    def test_skip(self):
+        expected = [['A Title: Should never be alone']]
+        self.assertEqual(expected, [record.titles for record in self.reader.skip(2)])
+
+    def test_sample_size(self):
+        self.assertEqual(2, len(self.reader.sample(2, seed=7)))
+
+    def test_sample_seeded(self):
+        first = [record.titles for record in self.reader.sample(1, seed=7)]
+        second = [record.titles for record in self.reader.sample(1, seed=7)]
+        self.assertEqual(first, second)
+
+    def test_sample_larger_than_collection(self):
+        self.assertEqual(3, len(self.reader.sample(10)))
+
+    def test_oai_skip(self):
+        expected = 'oai:lib.fsu.edu.umiami:oai:uofm.library.umiami:oai:merrick.library.miami.edu:asm0447/25'
+        records = OAIReader(os.path.join(test_dir_path, 'dcterms_xml.xml'))
+        self.assertEqual(expected, list(records.skip(2))[0].oai_urn)
+
+    def test_spans(self):
+        with RecordScanner(os.path.join(test_dir_path, 'title_xml.xml'), 'mods') as scanner:
+            spans = list(scanner)
+            self.assertEqual([0, 1, 2], [span.ordinal for span in spans])
+            self.assertTrue(all(scanner.read(span).startswith(b'<mods') for span in spans))
+
+    def test_spans_skip_distant_comments(self):
+        data = (b'<modsCollection xmlns="http://www.loc.gov/mods/v3"><mods/>' + b' ' * (2 << 20) +
+                b'<!-- <mods> --><mods/></modsCollection>')
+        with RecordScanner(io.BytesIO(data), 'mods') as scanner:
+            self.assertEqual(2, len(list(scanner)))
+
+
+class AncestorNamespaceTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.path = os.path.join(test_dir_path, 'ancestor_namespace_xml.xml')
+        self.expected = [['One'], ['Two'], ['Three']]
+
+    def test_tree(self):
+        self.assertEqual(self.expected, [record.titles for record in MODSReader(self.path)])
+
+    def test_streaming(self):
+        self.assertEqual(self.expected, [record.titles for record in MODSReader(self.path, streaming=True)])
+
+    def test_head(self):
+        self.assertEqual(self.expected[:1], [record.titles for record in MODSReader(self.path).head(1)])
+
+    def test_batches(self):
+        self.assertEqual([self.expected[:2], self.expected[2:]],
+                         [[record.titles for record in batch] for batch in MODSReader(self.path).batches(2)])
+
+    def test_resilient(self):
+        reader = MODSReader(self.path, resilient=True)
+        self.assertEqual(self.expected, [record.titles for record in reader])
+        self.assertEqual([], reader.errors)
+
+    def test_oai(self):
+        expected = ['oai:example.org:1', 'oai:example.org:2', 'oai:example.org:3']
+        self.assertEqual(expected, [record.oai_urn for record in OAIReader(self.path, streaming=True)])
+
+    def test_wrap_out_of_order(self):
+        with RecordScanner(self.path, 'mods', nested=False) as scanner:
+            spans = list(scanner)
+        with RecordScanner(self.path, 'mods', nested=False) as scanner:
+            titles = [etree.fromstring(scanner.wrap(span)).findtext('.//{http://www.loc.gov/mods/v3}title')
+                      for span in reversed(spans)]
+        self.assertEqual(['Three', 'Two', 'One'], titles)
+
+
+class ResilientReaderTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.reader = MODSReader(os.path.join(test_dir_path, 'malformed_xml.xml'), resilient=True)
+        self.records = list(self.reader)
+
+    def test_good_records(self):
+        expected = [['First'], ['Last']]
+        self.assertEqual(expected, [record.titles for record in self.records])
+
+    def test_quarantined_ordinals(self):
+        self.assertEqual([1, 2, 3], [error.ordinal for error in self.reader.errors])
+
+    def test_quarantined_offsets(self):
+        with open(os.path.join(test_dir_path, 'malformed_xml.xml'), 'rb') as f:
+            data = f.read()
+        for error in self.reader.errors:
+            self.assertTrue(data[error.offset:error.offset + error.length].startswith(b'<mods>'))
+
+    def test_quarantined_message(self):
+        self.assertIn('nbsp', self.reader.errors[0].message)
+
+    def test_strict_raises(self):
+        with self.assertRaises(etree.XMLSyntaxError):
+            next(MODSReader(os.path.join(test_dir_path, 'malformed_xml.xml')))
+
+
+class ResilientOAIReaderTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.reader = OAIReader(os.path.join(test_dir_path, 'malformed_oai_xml.xml'), resilient=True)
+        self.records = list(self.reader)
+
+    def test_good_records(self):
+        expected = ['oai:test:1', 'oai:test:2', 'oai:test:4', 'oai:test:5']
+        self.assertEqual(expected, [record.oai_urn for record in self.records])
+
+    def test_unterminated_record(self):
+        self.assertEqual([2], [error.ordinal for error in self.reader.errors])
+
+    def test_nested_records(self):
+        leaders = [record.metadata.leader for record in self.records[1:3]]
+        self.assertEqual(['00000nam a2200000 a 4500'] * 2, leaders)
+
+
+class CheckpointTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'run.checkpoint')
+        self.source = os.path.join(test_dir_path, 'title_xml.xml')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_checkpoint_saved(self):
+        records = MODSReader(self.source, checkpoint=Checkpointer(self.path, every=1))
+        first = next(records)
+        next(records)
+        checkpoint = load_checkpoint(self.path)
+        self.assertEqual(1, checkpoint.ordinal)
+        self.assertEqual(first.key, checkpoint.key)
+
+    def test_resume(self):
+        expected = [record.titles for record in MODSReader(self.source)][1:]
+        records = MODSReader(self.source, checkpoint=Checkpointer(self.path, every=1))
+        next(records)
+        next(records)
+        resumed = MODSReader(self.source, resume_from=self.path)
+        self.assertEqual(expected, [record.titles for record in resumed])
+
+    def test_missing_checkpoint(self):
+        self.assertIsNone(load_checkpoint(self.path))
+
+    def test_changed_key(self):
+        records = MODSReader(self.source, checkpoint=Checkpointer(self.path, every=1))
+        next(records)
+        next(records)
+        checkpoint = load_checkpoint(self.path)._replace(key='pid:other')
+        with self.assertRaises(CheckpointMismatch):
+            next(MODSReader(self.source, resume_from=checkpoint))
+
+    def test_offset_inside_record(self):
+        with self.assertRaises(CheckpointMismatch):
+            next(MODSReader(self.source, resume_from=Checkpoint(200, 1, None)))
+
+
+class FingerprintTests(unittest.TestCase):
+    """
+
+    """
+    collection = ('<modsCollection xmlns="http://www.loc.gov/mods/v3">'
+                  '<mods><identifier type="fedora">pid:1</identifier><titleInfo><title>{0}</title></titleInfo></mods>'
+                  '<mods><identifier type="fedora">pid:2</identifier><titleInfo><title>Two</title></titleInfo></mods>'
+                  '{1}</modsCollection>')
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = FingerprintStore(os.path.join(self.temp_dir.name, 'state.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def changes(self, first_title, extra=''):
+        path = os.path.join(self.temp_dir.name, 'collection.xml')
+        with open(path, 'w') as f:
+            f.write(self.collection.format(first_title, extra))
+        return [(change.status, change.key) for change in self.store.changes(MODSReader(path))]
+
+    def test_canonical_fingerprint(self):
+        prefixed = next(MODSReader(io.BytesIO(b'<m:mods xmlns:m="http://www.loc.gov/mods/v3" xmlns:x="urn:x">'
+                                              b'<m:titleInfo><m:title>A</m:title></m:titleInfo></m:mods>')))
+        default = next(MODSReader(io.BytesIO(b'<m:mods xmlns:m="http://www.loc.gov/mods/v3" >'
+                                             b'<m:titleInfo><m:title>A</m:title></m:titleInfo></m:mods>')))
+        self.assertEqual(fingerprint(prefixed), fingerprint(default))
+
+    def test_package_module(self):
+        self.assertIs(fingerprint, pymods.fingerprint.fingerprint)
+        self.assertIs(FingerprintStore, pymods.FingerprintStore)
+
+    def test_first_run(self):
+        self.assertEqual([('new', 'pid:1'), ('new', 'pid:2')], self.changes('One'))
+
+    def test_unchanged(self):
+        self.changes('One')
+        self.assertEqual([], self.changes('One'))
+
+    def test_changed_new_deleted(self):
+        extra = '<mods><identifier type="fedora">pid:3</identifier></mods>'
+        self.changes('One')
+        self.assertEqual([('changed', 'pid:1'), ('new', 'pid:3')], self.changes('Uno', extra))
+        self.assertEqual([('deleted', 'pid:3')], self.changes('Uno'))
+
+    def test_interrupted_run(self):
+        self.changes('One')
+        next(self.store.changes(MODSReader(io.BytesIO(b'<mods xmlns="http://www.loc.gov/mods/v3">'
+                                                      b'<identifier type="fedora">pid:9</identifier></mods>'))))
+        self.assertEqual(2, len(self.store))
+
+
+class SQLiteSinkTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.sink = SQLiteSink(':memory:', batch_size=2)
+
+    def tearDown(self):
+        self.sink.close()
+
+    def query(self, sql):
+        return self.sink.connection.execute(sql).fetchall()
+
+    def test_load_count(self):
+        self.assertEqual(3, self.sink.load(MODSReader(os.path.join(test_dir_path, 'rights_xml.xml'))))
+        self.assertEqual([(3,)], self.query('SELECT count(*) FROM records'))
+
+    def test_rights_rows(self):
+        self.sink.load(MODSReader(os.path.join(test_dir_path, 'rights_xml.xml')))
+        expected = [(1, 'http://rightsstatements.org/vocab/InC/1.0/'), (2, None), (3, None)]
+        self.assertEqual(expected, self.query('SELECT record_id, uri FROM rights ORDER BY record_id'))
+
+    def test_name_roles(self):
+        self.sink.load(MODSReader(os.path.join(test_dir_path, 'name_xml.xml')))
+        self.assertIn(('Olsen, Stanford', 'committee member'), self.query('SELECT text, role_text FROM names'))
+
+    def test_append(self):
+        self.sink.load(MODSReader(os.path.join(test_dir_path, 'rights_xml.xml')))
+        self.sink.load(MODSReader(os.path.join(test_dir_path, 'title_xml.xml')))
+        self.assertEqual([(6,)], self.query('SELECT max(record_id) FROM records'))
+
+    def test_interned_load(self):
+        with SQLiteSink(':memory:', intern=True) as sink:
+            sink.load(MODSReader(os.path.join(test_dir_path, 'name_xml.xml')))
+            interned_rows = sink.connection.execute('SELECT * FROM names ORDER BY rowid').fetchall()
+        self.sink.load(MODSReader(os.path.join(test_dir_path, 'name_xml.xml')))
+        self.assertEqual(self.query('SELECT * FROM names ORDER BY rowid'), interned_rows)
+        self.assertFalse(intern_strings(False))
+
+    def test_indexes(self):
+        self.sink.load(MODSReader(os.path.join(test_dir_path, 'rights_xml.xml')))
+        indexes = [row[0] for row in self.query("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        self.assertIn('subjects_uri', indexes)
+
+
+class TabularExportTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.exporter = TabularExporter(['titles', column('rights.uri', header='rights uri'),
+                                         Column('rights type', 'rights', 'type', '; ')])
+
+    def test_export(self):
+        output = io.StringIO(newline='')
+        count = self.exporter.export(MODSReader(os.path.join(test_dir_path, 'rights_xml.xml')), output)
+        self.assertEqual(3, count)
+        rows = output.getvalue().splitlines()
+        self.assertEqual('titles\trights uri\trights type', rows[0])
+        self.assertEqual('\thttp://rightsstatements.org/vocab/InC/1.0/\tuse and reproduction', rows[1])
+
+    def test_multi_value_join(self):
+        record = next(MODSReader(os.path.join(test_dir_path, 'name_xml.xml')))
+        row = TabularExporter([column('names', delimiter='|')]).row(record)
+        self.assertEqual('Olsen, Stanford|Delp, Roy', '|'.join(row[0].split('|')[:2]))
+
+    def test_csv_dialect(self):
+        output = io.StringIO(newline='')
+        TabularExporter(['titles'], dialect='excel').export(
+            MODSReader(os.path.join(test_dir_path, 'title_xml.xml')), output, header=False)
+        self.assertEqual(["Gravity's Rainbow", 'Homer Simpson: A retrospective'],
+                         output.getvalue().splitlines()[:2])
+
+    def test_empty_property(self):
+        record = next(MODSReader(os.path.join(test_dir_path, 'title_xml.xml')))
+        self.assertEqual(['', ''], TabularExporter(['dates', 'collection.url']).row(record))
+
+    def test_property_without_text(self):
+        record = next(MODSReader(os.path.join(test_dir_path, 'abstract_xml.xml')))
+        with self.assertRaisesRegex(ValueError, 'location, title, url'):
+            TabularExporter(['collection']).row(record)
+
+
+class FeedReaderTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        with open(os.path.join(test_dir_path, 'title_xml.xml'), 'rb') as f:
+            self.data = f.read()
+
+    def test_records_before_close(self):
+        reader = MODSFeedReader()
+        first_end = self.data.index(b'</mods>') + len(b'</mods>')
+        self.assertEqual([], reader.feed(self.data[:first_end - 1]))
+        records = reader.feed(self.data[first_end - 1:first_end])
+        self.assertEqual([["Gravity's Rainbow"]], [record.titles for record in records])
+
+    def test_byte_chunks(self):
+        reader = MODSFeedReader()
+        records = []
+        for position in range(len(self.data)):
+            records.extend(reader.feed(self.data[position:position + 1]))
+        records.extend(reader.close())
+        self.assertEqual(3, len(records))
+        self.assertEqual(['A Title: Should never be alone'], records[2].titles)
+
+    def test_records_detached(self):
+        records = MODSFeedReader().feed(self.data)
+        self.assertTrue(all(record.getparent() is None for record in records))
+
+    def test_stream(self):
+        read_end, write_end = os.pipe()
+        writer = threading.Thread(target=lambda: (os.write(write_end, self.data), os.close(write_end)))
+        writer.start()
+        with os.fdopen(read_end, 'rb') as source:
+            records = list(MODSFeedReader().stream(source, chunk_size=64))
+        writer.join()
+        self.assertEqual(3, len(records))
+
+    def test_oai_outermost_records(self):
+        data = (b'<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><ListRecords><record><header>'
+                b'<identifier>oai:test:1</identifier></header><metadata>'
+                b'<marc:record xmlns:marc="http://www.loc.gov/MARC21/slim"/></metadata></record></ListRecords></OAI-PMH>')
+        records = OAIFeedReader().feed(data)
+        self.assertEqual(['oai:test:1'], [record.oai_urn for record in records])
+
+
+class StandInOAIHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves a three page ListRecords response set.
+    """
+    page = ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><responseDate>2020-01-01T00:00:00Z</responseDate>'
+            '<request verb="ListRecords">http://localhost/oai</request><ListRecords>{0}{1}</ListRecords></OAI-PMH>')
+    record = ('<record><header><identifier>oai:test:{0}</identifier><datestamp>2020-01-01</datestamp></header>'
+              '<metadata><mods xmlns="http://www.loc.gov/mods/v3"><titleInfo><title>Title {0}</title></titleInfo>'
+              '</mods></metadata></record>')
+    tokens = {None: ('page2', range(0, 3)), 'page2': ('page3', range(3, 5)), 'page3': (None, range(5, 6))}
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        token = query.get('resumptionToken', [None])[0]
+        if query.get('metadataPrefix') == ['bogus'] or token not in self.tokens:
+            body = self.page.format('', '').replace(
+                '<ListRecords></ListRecords>', '<error code="cannotDisseminateFormat">Unknown format</error>')
+        else:
+            next_token, numbers = self.tokens[token]
+            body = self.page.format(''.join(self.record.format(number) for number in numbers),
+                                    '<resumptionToken>{0}</resumptionToken>'.format(next_token) if next_token
+                                    else '<resumptionToken completeListSize="6"/>')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+class OAIHarvesterTests(unittest.TestCase):
+    """
+
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInOAIHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = 'http://127.0.0.1:{0}/oai'.format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_package_module(self):
+        self.assertIs(harvest, pymods.harvest.harvest)
+        self.assertIs(OAIHarvester, pymods.harvest.OAIHarvester)
+
+    def test_harvest_order(self):
+        expected = ['oai:test:{0}'.format(number) for number in range(6)]
+        self.assertEqual(expected, [record.oai_urn for record in harvest(self.base_url, chunk_size=100)])
+
+    def test_typed_metadata(self):
+        records = harvest(self.base_url)
+        self.assertIsInstance(records[0].metadata, MODSRecord)
+        self.assertEqual(['Title 5'], records[5].metadata.titles)
+
+    def test_async_iteration(self):
+        async def first_page():
+            harvester = OAIHarvester(self.base_url)
+            async for record in harvester:
+                if record.oai_urn == 'oai:test:2':
+                    return harvester.pages
+        self.assertLessEqual(asyncio.run(first_page()), 2)
+
+    def test_oai_error(self):
+        with self.assertRaises(OAIError):
+            harvest(self.base_url, 'bogus')
+
+
+class RecordReaderTests(unittest.TestCase):
+    """
+
+    """
+    marc = (b'<?xml version="1.0" encoding="UTF-8"?><collection xmlns="http://www.loc.gov/MARC21/slim">'
+            b'<record><leader>00000nam a2200000 a 4500</leader><controlfield tag="001">1</controlfield></record>'
+            b'<record><leader>00000nam a2200000 a 4500</leader><controlfield tag="001">2</controlfield></record>'
+            b'</collection>')
+    oai_dc = (b'<records xmlns:oai_dc="http://www.openarchives.org/OAI/2.0/oai_dc/" '
+              b'xmlns:dc="http://purl.org/dc/elements/1.1/">'
+              b'<oai_dc:dc><dc:title>One</dc:title></oai_dc:dc><oai_dc:dc><dc:title>Two</dc:title></oai_dc:dc>'
+              b'</records>')
+
+    def test_mods(self):
+        records = list(RecordReader(os.path.join(test_dir_path, 'title_xml.xml')))
+        self.assertTrue(all(isinstance(record, MODSRecord) for record in records))
+        self.assertEqual([record.titles for record in MODSReader(os.path.join(test_dir_path, 'title_xml.xml'))],
+                         [record.titles for record in records])
+
+    def test_oai_metadata_in_place(self):
+        record = next(RecordReader(os.path.join(test_dir_path, 'dcterms_xml.xml')))
+        self.assertIsInstance(record, OAIRecord)
+        self.assertIsInstance(record.metadata, DCRecord)
+        self.assertIs(record.metadata.getparent().getparent(), record)
+
+    def test_marc(self):
+        records = list(RecordReader(io.BytesIO(self.marc)))
+        self.assertEqual(2, len(records))
+        self.assertTrue(all(isinstance(record, MARCRecord) for record in records))
+
+    def test_dc_streaming(self):
+        records = list(RecordReader(io.BytesIO(self.oai_dc), streaming=True))
+        self.assertEqual([['One'], ['Two']], [record.get_element('{*}title') for record in records])
+
+    def test_unknown_format(self):
+        with self.assertRaises(NameSpaceInvalid):
+            RecordReader(io.BytesIO(b'<root><item/></root>'))
+
+
+class MARCRecordTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.record = etree.fromstring(
+            '<record xmlns="http://www.loc.gov/MARC21/slim"><leader>00000nam a2200000 a 4500</leader>'
+            '<controlfield tag="001">ocm00001</controlfield>'
+            '<datafield tag="245" ind1="1" ind2="0"><subfield code="a">Letters :</subfield>'
+            '<subfield code="b">a selection</subfield></datafield>'
+            '<datafield tag="650" ind1=" " ind2="0"><subfield code="a">Florida</subfield>'
+            '<subfield code="x">History</subfield><subfield code="x">Sources</subfield></datafield>'
+            '<datafield tag="650" ind1=" " ind2="7"><subfield code="a">Letters</subfield></datafield>'
+            '</record>', parser=record_parser())
+
+    def test_class(self):
+        self.assertIsInstance(self.record, MARCRecord)
+
+    def test_control_field(self):
+        self.assertEqual('ocm00001', self.record['001'])
+        self.assertEqual('00000nam a2200000 a 4500', self.record.leader)
+
+    def test_oai_metadata_index(self):
+        oai = etree.fromstring('<record xmlns="http://www.openarchives.org/OAI/2.0/"><header>'
+                               '<identifier>oai:test:1</identifier></header><metadata>{0}</metadata></record>'.format(
+                                   etree.tostring(self.record).decode('utf-8')), parser=record_parser())
+        self.assertEqual('Letters :', oai.metadata['245']['a'])
+        index = oai.metadata._index
+        self.assertEqual('ocm00001', oai.metadata['001'])
+        self.assertIs(oai.metadata, oai.metadata)
+        self.assertIs(index, oai.metadata._index)
+
+    def test_index_per_proxy(self):
+        collection = etree.fromstring('<collection xmlns="http://www.loc.gov/MARC21/slim"><record>'
+                                      '<controlfield tag="001">ocm00001</controlfield></record></collection>',
+                                      parser=record_parser())
+        record = collection[0]
+        self.assertEqual('ocm00001', record['001'])
+        record[0].text = 'ocm00002'
+        # the held proxy keeps its index until reindex()
+        self.assertEqual('ocm00001', record['001'])
+        del record
+        self.assertEqual('ocm00002', collection[0]['001'])
+
+    def test_subfields(self):
+        self.assertEqual('Letters :', self.record['245']['a'])
+        self.assertEqual('a selection', self.record['245'].get('b'))
+        self.assertIsNone(self.record['245'].get('c'))
+        self.assertEqual(['History', 'Sources'], self.record['650'].get_all('x'))
+
+    def test_indicators(self):
+        self.assertEqual(2, len(self.record.fields('650')))
+        self.assertEqual(['Letters'], [field['a'] for field in self.record.fields('650', ind2='7')])
+
+    def test_missing_field(self):
+        self.assertNotIn('100', self.record)
+        with self.assertRaises(KeyError):
+            self.record['100']
+
+    def test_child_index(self):
+        self.assertEqual('{http://www.loc.gov/MARC21/slim}leader', self.record[0].tag)
+
+
+class CrosswalkTests(unittest.TestCase):
+    """
+
+    """
+    def test_package_module(self):
+        self.assertIs(crosswalk, pymods.crosswalk.crosswalk)
+        self.assertIs(mods_to_dc, pymods.mods_to_dc)
+
+    def test_titles(self):
+        for record in MODSReader(os.path.join(test_dir_path, 'title_xml.xml')):
+            self.assertEqual(record.titles, mods_to_dc(record)['title'])
+
+    def test_subjects(self):
+        for record in MODSReader(os.path.join(test_dir_path, 'subject_xml.xml')):
+            self.assertEqual([subject.text for subject in record.subjects], mods_to_dc(record)['subject'])
+
+    def test_dates(self):
+        for record in MODSReader(os.path.join(test_dir_path, 'originInfo_xml.xml')):
+            self.assertEqual([date.text for date in record.dates or []], mods_to_dc(record)['date'])
+
+    def test_name_roles(self):
+        record = next(MODSReader(os.path.join(test_dir_path, 'name_xml.xml')))
+        values = mods_to_dc(record)
+        self.assertIn('Steinbeck, John, 1902-1968', values['creator'])
+        self.assertIn('Olsen, Stanford', values['contributor'])
+        self.assertEqual(sorted(name.text for name in record.names if name.text),
+                         sorted(values['creator'] + values['contributor']))
+
+    def test_oai_dc(self):
+        records = list(crosswalk(MODSReader(os.path.join(test_dir_path, 'title_xml.xml')), oai_dc=True))
+        self.assertEqual(3, len(records))
+        self.assertIsInstance(records[0], DCRecord)
+        self.assertEqual(["Gravity's Rainbow"], records[0].get_element('{http://purl.org/dc/elements/1.1/}title'))
+        self.assertEqual('{http://www.openarchives.org/OAI/2.0/oai_dc/}dc', records[0].tag)
+
+
+class TransformTests(unittest.TestCase):
+    """
+
+    """
+    stylesheet = b'''<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform"
+        xmlns:mods="http://www.loc.gov/mods/v3">
+      <xsl:param name="label" select="'untitled'"/>
+      <xsl:template match="/mods:mods">
+        <mods:mods><mods:titleInfo><mods:title>
+          <xsl:value-of select="$label"/>: <xsl:value-of select="mods:titleInfo[1]/mods:title"/>
+        </mods:title></mods:titleInfo></mods:mods>
+      </xsl:template>
+    </xsl:stylesheet>'''
+
+    def setUp(self):
+        self.path = os.path.join(test_dir_path, 'title_xml.xml')
+
+    def test_compiled_per_thread(self):
+        self.assertIs(compiled(self.stylesheet), compiled(self.stylesheet))
+        other = []
+        thread = threading.Thread(target=lambda: other.append(compiled(self.stylesheet)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(compiled(self.stylesheet), other[0])
+
+    def test_result_class(self):
+        result = Transform(self.stylesheet)(next(MODSReader(self.path)))
+        self.assertIsInstance(result, MODSRecord)
+        self.assertEqual(["untitled: Gravity's Rainbow"], [title.strip() for title in result.titles])
+
+    def test_params(self):
+        transform = Transform(self.stylesheet, label=etree.XSLT.strparam('Book'))
+        self.assertTrue(transform(next(MODSReader(self.path))).titles[0].strip().startswith('Book: '))
+
+    def test_workers_keep_order(self):
+        serial = [record.titles for record in Transform(self.stylesheet).apply(MODSReader(self.path))]
+        threaded = [record.titles for record in Transform(self.stylesheet, workers=2).apply(MODSReader(self.path))]
+        self.assertEqual(3, len(threaded))
+        self.assertEqual(serial, threaded)
+
+    def test_writer(self):
+        output = io.BytesIO()
+        with Writer(output) as writer:
+            self.assertEqual(3, writer.write_all(Transform(self.stylesheet).apply(MODSReader(self.path))))
+        output.seek(0)
+        self.assertEqual(3, len([record.titles for record in MODSReader(output)]))
+
+
+class ValidatorTests(unittest.TestCase):
+    """
+
+    """
+    xsd = b'''<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="http://www.loc.gov/mods/v3"
+        elementFormDefault="qualified">
+      <xs:element name="mods">
+        <xs:complexType>
+          <xs:sequence><xs:any processContents="skip" minOccurs="0" maxOccurs="unbounded"/></xs:sequence>
+          <xs:attribute name="version" use="required"/>
+        </xs:complexType>
+      </xs:element>
+    </xs:schema>'''
+    collection = (b'<modsCollection xmlns="http://www.loc.gov/mods/v3">'
+                  b'<mods version="3.4"><identifier type="IID">ONE</identifier></mods>'
+                  b'<mods><identifier type="IID">TWO</identifier></mods>'
+                  b'<mods version="3.4"><identifier type="IID">THREE</identifier></mods>'
+                  b'<mods><identifier type="IID">FOUR</identifier></mods>'
+                  b'</modsCollection>')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.xsd_path = os.path.join(self.directory.name, 'mods.xsd')
+        with open(self.xsd_path, 'wb') as f:
+            f.write(self.xsd)
+        self.path = os.path.join(self.directory.name, 'records.xml')
+        with open(self.path, 'wb') as f:
+            f.write(self.collection)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record(self):
+        records = list(MODSReader(self.path))
+        validator = Validator(self.xsd_path)
+        self.assertTrue(validator.is_valid(records[0]))
+        self.assertEqual([], validator(records[0]))
+        self.assertIn('version', validator(records[1])[0])
+
+    def test_errors(self):
+        errors = list(Validator(self.xsd_path).errors(MODSReader(self.path, streaming=True)))
+        self.assertEqual([1, 3], [error.ordinal for error in errors])
+        self.assertEqual(['TWO', 'FOUR'], [error.key for error in errors])
+        for error in errors:
+            self.assertTrue(self.collection[error.offset:error.offset + error.length].startswith(b'<mods>'))
+
+    def test_parallel_errors(self):
+        serial = list(Validator(self.xsd_path).errors(MODSReader(self.path)))
+        parallel = list(Validator(self.xsd_path, processes=2, chunk_size=1).errors(MODSReader(self.path)))
+        self.assertEqual(serial, parallel)
+
+    def test_malformed_record(self):
+        with open(self.path, 'wb') as f:
+            f.write(self.collection.replace(b'TWO', b'T&nbsp;WO'))
+        serial = list(Validator(self.xsd_path).errors(MODSReader(self.path)))
+        parallel = list(Validator(self.xsd_path, processes=2, chunk_size=1).errors(MODSReader(self.path)))
+        self.assertEqual(serial, parallel)
+        self.assertEqual([1, 3], [error.ordinal for error in serial])
+        self.assertIsNone(serial[0].key)
+        self.assertIn('nbsp', serial[0].messages[0])
+
+    def test_other_namespace(self):
+        with open(self.path, 'wb') as f:
+            f.write(self.collection.replace(b'<mods><identifier type="IID">TWO</identifier></mods>',
+                                            b'<mods xmlns="urn:other"><identifier>TWO</identifier></mods>'))
+        self.assertEqual([3], [error.ordinal for error in Validator(self.xsd_path).errors(MODSReader(self.path))])
+        self.assertEqual([3], [error.ordinal for error in
+                               Validator(self.xsd_path, processes=2, chunk_size=1).errors(MODSReader(self.path))])
+
+
+class CountingRecord(object):
+    """
+    Stand-in record counting property reads.
+    """
+    def __init__(self, **values):
+        self.values = values
+        self.reads = collections.Counter()
+
+    def __getattr__(self, name):
+        self.reads[name] += 1
+        return self.values[name]
+
+
+class RuleSetTests(unittest.TestCase):
+    """
+
+    """
+    collection = (b'<modsCollection xmlns="http://www.loc.gov/mods/v3" xmlns:xlink="http://www.w3.org/1999/xlink">'
+                  b'<mods><identifier type="IID">GOOD</identifier><typeOfResource>text</typeOfResource>'
+                  b'<subject authority="lcsh" valueURI="http://id.loc.gov/authorities/subjects/sh85082767">'
+                  b'<topic>Maps</topic></subject>'
+                  b'<accessCondition type="use and reproduction" '
+                  b'xlink:href="http://rightsstatements.org/vocab/InC/1.0/">In Copyright</accessCondition>'
+                  b'<location><url>http://purl.flvc.org/fsu/fd/GOOD</url></location></mods>'
+                  b'<mods><identifier type="IID">BARE</identifier><subject authority="local"><topic>Maps</topic>'
+                  b'</subject></mods>'
+                  b'</modsCollection>')
+    rules = [HAS_TYPE_OF_RESOURCE, HAS_RIGHTSSTATEMENTS_URI, HAS_LCSH_URI, HAS_PURL]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'records.xml')
+        with open(self.path, 'wb') as f:
+            f.write(self.collection)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_evaluate(self):
+        good, bare = MODSReader(self.path)
+        rule_set = RuleSet(self.rules)
+        self.assertEqual([], rule_set.evaluate(good))
+        self.assertEqual(['type_of_resource', 'rightsstatements_uri', 'lcsh_uri', 'purl'], rule_set.evaluate(bare))
+
+    def test_shared_values(self):
+        record = CountingRecord(subjects=[], purl=['http://purl.flvc.org/fsu/fd/1'])
+        rule_set = RuleSet([HAS_LCSH_URI, HAS_PURL, rule('one_subject', 'subjects', lambda subjects: len(subjects) == 1),
+                            rule('purl_and_subject', ['purl', 'subjects'], lambda purl, subjects: purl or subjects)])
+        self.assertEqual(['lcsh_uri', 'one_subject'], rule_set.evaluate(record))
+        self.assertEqual({'subjects': 1, 'purl': 1}, record.reads)
+
+    def test_accessor_error_fails_rule(self):
+        self.assertEqual(['purl'], RuleSet([HAS_PURL]).evaluate(CountingRecord()))
+
+    def test_report(self):
+        report = RuleSet(self.rules).report(MODSReader(self.path))
+        self.assertEqual(2, report.records)
+        self.assertEqual([1, 1, 1, 1], list(report.counts.values()))
+        self.assertEqual(['BARE'], [violation.key for violation in report.violations])
+
+    def test_parallel_report(self):
+        self.assertEqual(RuleSet(self.rules).report(MODSReader(self.path)),
+                         RuleSet(self.rules, processes=2, chunk_size=1).report(MODSReader(self.path)))
+
+    def test_malformed_and_foreign_records(self):
+        with open(self.path, 'wb') as f:
+            f.write(self.collection.replace(b'</modsCollection>',
+                                            b'<mods><identifier type="IID">BAD&nbsp;</identifier></mods>'
+                                            b'<x:mods xmlns:x="urn:other"/>'
+                                            b'<mods><identifier type="IID">LAST</identifier></mods></modsCollection>'))
+        serial = RuleSet([HAS_PURL], chunk_size=2).report(MODSReader(self.path, resilient=True))
+        parallel = RuleSet([HAS_PURL], processes=2, chunk_size=2).report(MODSReader(self.path))
+        self.assertEqual(serial, parallel)
+        self.assertEqual(4, serial.records)
+        self.assertEqual([(1, 'BARE', ['purl']), (2, None, ['well_formed']), (4, 'LAST', ['purl'])],
+                         [tuple(violation) for violation in serial.violations])
+
+
+class ProfileTests(unittest.TestCase):
+    """
+
+    """
+    def test_top_k_exact(self):
+        sketch = TopK(3)
+        for value in 'abacab':
+            sketch.add(value)
+        self.assertEqual([('a', 3, 0), ('b', 2, 0), ('c', 1, 0)], sketch.most_common())
+
+    def test_top_k_bounded(self):
+        sketch = TopK(5)
+        for number in range(1000):
+            sketch.add('frequent' if number % 3 == 0 else str(number))
+        self.assertEqual(5, len(sketch.counts))
+        value, count, error = sketch.most_common(1)[0]
+        self.assertEqual('frequent', value)
+        self.assertTrue(count - error <= 334 <= count)
+
+    def test_top_k_merge(self):
+        first, second, combined = TopK(3), TopK(3), TopK(3)
+        for value in 'aab':
+            first.add(value)
+            combined.add(value)
+        for value in 'abbc':
+            second.add(value)
+            combined.add(value)
+        self.assertEqual(combined.most_common(), first.merge(second).most_common())
+        self.assertEqual(7, first.total)
+
+    def test_profile(self):
+        result = profile(MODSReader(os.path.join(test_dir_path, 'genre_xml.xml')))
+        self.assertEqual(3, result.records)
+        self.assertEqual(2, result.paths['genre/@authority'][1])
+        self.assertAlmostEqual(2 / 3, result.coverage('genre'))
+        self.assertEqual(0.0, result.coverage('abstract'))
+        self.assertEqual(['aat', 'lcgft'], [value for value, count, error in result.values['genre/@authority'].most_common()])
+
+    def test_prefixed_paths(self):
+        result = profile(MODSReader(os.path.join(test_dir_path, 'rights_xml.xml')))
+        self.assertIn('accessCondition/@xlink:href', result.paths)
+
+    def test_json(self):
+        result = json.loads(profile(MODSReader(os.path.join(test_dir_path, 'genre_xml.xml'))).to_json(n=1))
+        self.assertEqual(3, result['records'])
+        self.assertEqual({'value': 'aat', 'count': 1, 'error': 0}, result['paths']['genre/@authority']['values'][0])
+
+    def test_parallel_profile(self):
+        path = os.path.join(test_dir_path, 'subject_xml.xml')
+        self.assertEqual(profile(MODSReader(path)).to_dict(),
+                         profile(MODSReader(path), processes=2, chunk_size=1).to_dict())
+
+    def test_parallel_foreign_record(self):
+        collection = (b'<modsCollection xmlns="http://www.loc.gov/mods/v3"><mods><genre>maps</genre></mods>'
+                      b'<x:mods xmlns:x="urn:other"/></modsCollection>')
+        self.assertEqual(1, profile(MODSReader(io.BytesIO(collection)), processes=2).records)
+
+    def test_parallel_malformed_record(self):
+        path = os.path.join(test_dir_path, 'malformed_xml.xml')
+        with self.assertRaises(MalformedRecord) as raised:
+            profile(MODSReader(path), processes=2, chunk_size=1)
+        self.assertEqual(1, raised.exception.ordinal)
+        serial, parallel = MODSReader(path, resilient=True), MODSReader(path, resilient=True)
+        self.assertEqual(profile(serial).to_dict(), profile(parallel, processes=2, chunk_size=1).to_dict())
+        self.assertEqual(serial.errors, parallel.errors)
+
+
+class DateKeyTests(unittest.TestCase):
+    """
+
+    """
+    def test_date_key(self):
+        self.assertEqual((19661208, 19661208), date_key('1966-12-08'))
+        self.assertEqual((19870201, 19870228), date_key('1987-02'))
+        self.assertEqual((18500101, 18601231), date_key('1850 - 1860'))
+        self.assertEqual((18500101, 18591231), date_key('185u'))
+        self.assertEqual((18500101, 18501231), date_key('[ca. 1850?]'))
+        self.assertIsNone(date_key('2001-02-29'))
+        self.assertIsNone(date_key('undated'))
+
+    def test_point_pairs(self):
+        records = MODSReader(os.path.join(test_dir_path, 'originInfo_xml.xml'))
+        keys = [record.date_keys for record in records]
+        self.assertEqual([(17760704, 17760704, '{http://www.loc.gov/mods/v3}dateIssued')],
+                         [key[:3] for key in keys[0]])
+        self.assertEqual([(19841014, 19841014)], [key[:2] for key in keys[1]])
+        self.assertEqual([], keys[2])
+
+    def test_start_end_pair(self):
+        record = etree.fromstring(b'<mods xmlns="http://www.loc.gov/mods/v3"><originInfo>'
+                                  b'<dateCreated point="end">1860</dateCreated>'
+                                  b'<dateCreated point="start">1850-06</dateCreated></originInfo></mods>',
+                                  record_parser())
+        self.assertEqual([(18500601, 18601231)], [key[:2] for key in record.date_keys])
+
+    @unittest.skipIf(numpy is None, 'requires numpy')
+    def test_date_columns(self):
+        columns = date_columns(MODSReader(os.path.join(test_dir_path, 'originInfo_xml.xml')))
+        self.assertEqual(7, len(columns.keys))
+        self.assertEqual([17760704, 19841014] + [MISSING] * 5, columns.start.tolist())
+        self.assertEqual([1], overlapping(columns, 19800101, 19891231).tolist())
+        self.assertEqual([0, 1], overlapping(columns, 17000101, 20001231).tolist())
+
+
+class SearchIndexTests(unittest.TestCase):
+    """
+
+    """
+    template = ('<modsCollection xmlns="http://www.loc.gov/mods/v3">'
+                '<mods><identifier type="IID">FIRE</identifier><titleInfo><title>Fire line system</title></titleInfo>'
+                '<subject><topic>Fire prevention</topic></subject></mods>'
+                '<mods><identifier type="IID">TAX</identifier><titleInfo><title>{0}</title></titleInfo>'
+                '<abstract>One mill tax apportioned</abstract></mods>'
+                '{1}</modsCollection>')
+    extra = ('<mods><identifier type="IID">LINE</identifier><titleInfo><title>Line fire</title></titleInfo>'
+             '<note>The line fire of fire lines</note></mods>')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'records.xml')
+        self.write('Tax rolls', self.extra)
+        self.index = SearchIndex(os.path.join(self.directory.name, 'index.db'))
+        self.index.update(MODSReader(self.path))
+
+    def tearDown(self):
+        self.index.close()
+        self.directory.cleanup()
+
+    def write(self, title, extra):
+        with open(self.path, 'w') as f:
+            f.write(self.template.format(title, extra))
+
+    def test_positions(self):
+        positions = [0, 3, 4, 200, 70000]
+        self.assertEqual(positions, decode_positions(encode_positions(positions)))
+
+    def test_ranked(self):
+        self.assertEqual(['LINE', 'FIRE'], [hit.key for hit in self.index.search('fire')])
+        self.assertEqual(['TAX'], [hit.key for hit in self.index.search('MILL')])
+        self.assertEqual([], self.index.search('absent'))
+
+    def test_phrase(self):
+        self.assertEqual(['FIRE'], [hit.key for hit in self.index.search('"fire line"')])
+        self.assertEqual(['LINE'], [hit.key for hit in self.index.search('"line fire" system')])
+        # phrases don't match across field values
+        self.assertEqual([], self.index.search('"system fire"'))
+
+    def test_record(self):
+        hit = self.index.search('apportioned')[0]
+        self.assertEqual(['Tax rolls'], self.index.record(hit).titles)
+
+    def test_incremental_update(self):
+        self.write('Mill rate', '')
+        update = self.index.update(MODSReader(self.path))
+        self.assertEqual((0, 1, 1, 1), update)
+        self.assertEqual(2, len(self.index))
+        self.assertEqual(['TAX'], [hit.key for hit in self.index.search('rate')])
+        self.assertEqual([], self.index.search('rolls'))
+        self.assertEqual(['FIRE'], [hit.key for hit in self.index.search('fire')])
+
+    def test_duplicate_keys(self):
+        # the last record with a key is indexed
+        self.write('Tax rolls', '<mods><identifier type="IID">TAX</identifier><titleInfo><title>Mill rate</title>'
+                                '</titleInfo></mods>')
+        self.assertEqual((0, 1, 1, 1), self.index.update(MODSReader(self.path)))
+        self.assertEqual(['TAX'], [hit.key for hit in self.index.search('rate')])
+        self.assertEqual([], self.index.search('rolls'))
+        self.assertEqual(['Mill rate'], self.index.record(self.index.search('rate')[0]).titles)
+
+    def test_duplicate_keyless_records(self):
+        record = '<mods><titleInfo><title>Untitled map</title></titleInfo></mods>'
+        self.write('Tax rolls', record + record)
+        self.assertEqual((1, 0, 1, 2), self.index.update(MODSReader(self.path)))
+        hits = self.index.search('map')
+        self.assertEqual(1, len(hits))
+        self.assertEqual(3, hits[0].ordinal)
+
+
+class DeduperTests(unittest.TestCase):
+    """
+
+    """
+    records = [('fsu:1', 'Fire Line System', '1966-12-08', '', 'Smith, John'),
+               ('uf:9', 'Fire line system.', '1966', '', ''),
+               ('fsu:2', 'Tax rolls', '1901', '<identifier type="doi">10.1000/182</identifier>', ''),
+               ('uf:3', 'Tax roll book', '1950', '<identifier type="doi">10.1000/182 </identifier>', ''),
+               ('fsu:4', 'Letters of the Jones family of Tallahassee Florida', '1880', '', 'Jones, Mary'),
+               ('uf:5', 'Jones family letters, Tallahassee, Florida', '1890', '', 'Jones, Mary'),
+               ('fsu:6', 'Broward NOW News', '1987', '', '')]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'records.xml')
+        with open(self.path, 'w') as f:
+            f.write('<modsCollection xmlns="http://www.loc.gov/mods/v3">')
+            for pid, title, date, identifiers, name in self.records:
+                f.write('<mods><identifier type="fedora">{0}</identifier>{3}<titleInfo><title>{1}</title></titleInfo>'
+                        '<originInfo><dateCreated>{2}</dateCreated></originInfo>'.format(pid, title, date, identifiers))
+                if name:
+                    f.write('<name><namePart>{0}</namePart></name>'.format(name))
+                f.write('</mods>')
+            f.write('</modsCollection>')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_normalize(self):
+        self.assertEqual('fire line system', normalize(' Fire  line,system. '))
+
+    def test_clusters(self):
+        clusters = Deduper(threshold=0.5).clusters(MODSReader(self.path))
+        self.assertEqual([[0, 1], [2, 3], [4, 5]], [cluster.ordinals for cluster in clusters])
+        self.assertEqual(['fsu:1', 'uf:9'], clusters[0].keys)
+
+    def test_threshold(self):
+        clusters = Deduper(threshold=1.0).clusters(MODSReader(self.path))
+        self.assertEqual([[0, 1], [2, 3]], [cluster.ordinals for cluster in clusters])
+
+    def test_identifier_types(self):
+        clusters = Deduper(threshold=1.0, identifier_types=['isbn']).clusters(MODSReader(self.path))
+        self.assertEqual([[0, 1]], [cluster.ordinals for cluster in clusters])
+
+    def test_similarity(self):
+        deduper = Deduper(permutations=128, bands=16)
+        signatures = list(deduper.signatures(MODSReader(self.path)))
+        self.assertEqual(1.0, deduper.similarity(signatures[0].minhash, signatures[0].minhash))
+        # the word sets have a Jaccard similarity of 0.75
+        self.assertAlmostEqual(0.75, deduper.similarity(signatures[4].minhash, signatures[5].minhash), delta=0.15)
+        self.assertLess(deduper.similarity(signatures[0].minhash, signatures[6].minhash), 0.1)
+
+    def test_parallel_clusters(self):
+        self.assertEqual(Deduper(threshold=0.5).clusters(MODSReader(self.path)),
+                         Deduper(threshold=0.5, processes=2, chunk_size=2).clusters(MODSReader(self.path)))
+
+    def test_parallel_foreign_and_malformed_records(self):
+        with open(self.path) as f:
+            text = f.read()
+        with open(self.path, 'w') as f:
+            f.write(text.replace('</modsCollection>', '<x:mods xmlns:x="urn:other"/><mods><note>&nbsp;</note></mods>'
+                                                      '</modsCollection>'))
+        with self.assertRaises(MalformedRecord) as raised:
+            list(Deduper(processes=2).signatures(MODSReader(self.path)))
+        self.assertEqual(8, raised.exception.ordinal)
+        serial, parallel = MODSReader(self.path, resilient=True), MODSReader(self.path, resilient=True)
+        self.assertEqual(Deduper(threshold=0.5).clusters(serial),
+                         Deduper(threshold=0.5, processes=2, chunk_size=2).clusters(parallel))
+        self.assertEqual(serial.errors, parallel.errors)
+        self.assertEqual([8], [error.ordinal for error in parallel.errors])
+
+
+
+class DiffTests(unittest.TestCase):
+    """
+
+    """
+    old = ('<modsCollection xmlns="http://www.loc.gov/mods/v3">'
+           '<mods><identifier type="IID">SAME</identifier><titleInfo><title>Same</title></titleInfo></mods>'
+           '<mods><identifier type="IID">EDITED</identifier><titleInfo><title>Before</title></titleInfo>'
+           '<genre authority="aat">maps</genre></mods>'
+           '<mods><identifier type="IID">GONE</identifier></mods>'
+           '</modsCollection>')
+    new = ('<modsCollection xmlns="http://www.loc.gov/mods/v3">'
+           '<mods><identifier type="IID">ADDED</identifier></mods>'
+           '<mods><identifier type="IID">EDITED</identifier><titleInfo><title>After</title></titleInfo>'
+           '<genre authority="aat">maps</genre></mods>'
+           '<mods><identifier type="IID">SAME</identifier>\n  <titleInfo><title>Same</title></titleInfo></mods>'
+           '</modsCollection>')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = []
+        for name, content in (('old.xml', self.old), ('new.xml', self.new)):
+            self.paths.append(os.path.join(self.directory.name, name))
+            with open(self.paths[-1], 'w') as f:
+                f.write(content)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_plain(self):
+        genre = next(MODSReader(self.paths[0]).skip(1)).genre
+        self.assertEqual([('maps', None, 'aat', None)], plain(genre))
+
+    def test_package_module(self):
+        self.assertIs(diff, pymods.diff.diff)
+        self.assertIs(plain, pymods.plain)
+
+    def test_diff(self):
+        differences = sorted(diff(MODSReader(self.paths[0]), MODSReader(self.paths[1]), partitions=3))
+        self.assertEqual([('changed', 'EDITED'), ('changed', 'SAME'), ('deleted', 'GONE'), ('new', 'ADDED')],
+                         [difference[:2] for difference in differences])
+        changed, reformatted, deleted, added = differences
+        self.assertEqual({'titles': (['Before'], ['After'])}, changed.fields)
+        # whitespace changes the fingerprint but no property
+        self.assertEqual({}, reformatted.fields)
+        self.assertEqual(['After'], changed.new.titles)
+        self.assertEqual('GONE', deleted.old.iid)
+        self.assertIsNone(deleted.new)
+        self.assertEqual('ADDED', added.new.iid)
+
+    def test_field_differences(self):
+        old, new = next(MODSReader(self.paths[0]).skip(1)), next(MODSReader(self.paths[1]).skip(1))
+        self.assertEqual({}, field_differences(old, new, ['genre', 'iid']))
+
+
+class AuthorityStoreTests(unittest.TestCase):
+    """
+
+    """
+    ntriples = ('<http://id.loc.gov/authorities/subjects/sh85140205> '
+                '<http://www.w3.org/2004/02/skos/core#prefLabel> "Maps"@en .\n'
+                '<http://id.loc.gov/authorities/subjects/sh85140205> '
+                '<http://www.loc.gov/mads/rdf/v1#authoritativeLabel> "Maps (Cartography)"@en .\n'
+                '<http://id.loc.gov/authorities/subjects/sh85140205> '
+                '<http://www.w3.org/2004/02/skos/core#prefLabel> "Cartes"@fr .\n'
+                '<http://id.loc.gov/authorities/subjects/sh85140205> '
+                '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://www.loc.gov/mads/rdf/v1#Topic> .\n'
+                '<http://id.loc.gov/authorities/names/n79021164> '
+                '<http://www.w3.org/2000/01/rdf-schema#label> "Tw\\u00E4in, Mark, 1835-1910" .\n')
+    jsonld = {'@context': {'skos': 'http://www.w3.org/2004/02/skos/core#'},
+              '@graph': [{'@id': 'http://id.worldcat.org/fast/1204155',
+                          'skos:prefLabel': {'@value': 'Florida', '@language': 'en'}},
+                         {'@id': 'http://id.worldcat.org/fast/1204156', 'skos:altLabel': 'Unused'}]}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = AuthorityStore(os.path.join(self.directory.name, 'labels.db'), cache_size=2)
+        self.store.load_ntriples(io.StringIO(self.ntriples))
+        self.store.load_jsonld(io.StringIO(json.dumps(self.jsonld)))
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_normalize_uri(self):
+        self.assertEqual('http://id.loc.gov/authorities/names/n79021164',
+                         normalize_uri(' https://id.loc.gov/authorities/names/n79021164.html'))
+
+    def test_labels(self):
+        self.assertEqual(3, len(self.store))
+        self.assertEqual('Maps (Cartography)', self.store.label('http://id.loc.gov/authorities/subjects/sh85140205'))
+        self.assertEqual('Tw\u00e4in, Mark, 1835-1910',
+                         self.store.label('https://id.loc.gov/authorities/names/n79021164/'))
+        self.assertEqual('Florida', self.store.label('http://id.worldcat.org/fast/1204155'))
+        self.assertIsNone(self.store.label('http://id.worldcat.org/fast/1204156'))
+        self.assertEqual(2, len(self.store._cache))
+
+    def test_json_lines(self):
+        self.store.load_jsonld(io.StringIO('{"@id": "http://example.org/1", "rdfs:label": "One"}\n\n'
+                                           '{"@id": "http://example.org/2", "label": ["Two"]}\n'))
+        self.assertEqual({'http://example.org/1': 'One', 'http://example.org/2': 'Two'},
+                         self.store.labels(['http://example.org/1', 'http://example.org/2']))
+
+    def test_enrich(self):
+        enriched = list(self.store.enrich(MODSReader(os.path.join(test_dir_path, 'subject_xml.xml')),
+                                          batch_size=2))
+        labels = [subject.label for record in enriched for subject in record.subjects
+                  if subject.item.uri == 'http://id.loc.gov/authorities/subjects/sh85140205']
+        self.assertTrue(labels)
+        self.assertEqual({'Maps (Cartography)'}, set(labels))
+        self.assertEqual(len(list(MODSReader(os.path.join(test_dir_path, 'subject_xml.xml')))),
+                         len(enriched))
+
+
+class InternTests(unittest.TestCase):
+    """
+
+    """
+    def tearDown(self):
+        intern_strings(False)
+
+    def test_intern_strings(self):
+        self.assertFalse(intern_strings(True))
+        self.assertTrue(intern_strings(False))
+
+    def test_shared_values(self):
+        with interned():
+            names = [name for record in MODSReader(os.path.join(test_dir_path, 'name_xml.xml')) for name in record.names
+                     if name.authority == 'local']
+        self.assertGreater(len(names), 1)
+        self.assertTrue(all(name.authority is names[0].authority for name in names))
+
+    def test_results_unchanged(self):
+        records = list(MODSReader(os.path.join(test_dir_path, 'subject_xml.xml')))
+        plain = [(record.subjects, record.dates, record.identifiers) for record in records]
+        with interned():
+            self.assertEqual(plain, [(record.subjects, record.dates, record.identifiers) for record in records])
+
+    def test_thread_scope(self):
+        seen = []
+        with interned():
+            thread = threading.Thread(target=lambda: seen.append(intern_strings(False)))
+            thread.start()
+            thread.join()
+            self.assertTrue(intern_strings(True))
+        self.assertEqual([False], seen)
+
+    def test_tabular_export(self):
+        exporter = TabularExporter(['rights.type'], intern=True)
+        rows = list(exporter.rows(MODSReader(os.path.join(test_dir_path, 'rights_xml.xml'))))
+        self.assertEqual([['use and reproduction'], ['use and reproduction'], ['useAndReproduction']], rows)
+        self.assertIs(rows[0][0], rows[1][0])
+        self.assertFalse(intern_strings(False))
+
+
+class ParserPresetTests(unittest.TestCase):
+    """
+
+    """
+    fixtures = ['abstract_xml.xml', 'genre_xml.xml', 'identifier_xml.xml', 'language_xml.xml', 'location_xml.xml',
+                'name_xml.xml', 'originInfo_xml.xml', 'physicalDesc_xml.xml', 'resourceType_xml.xml', 'rights_xml.xml',
+                'subject_xml.xml', 'title_xml.xml']
+
+    def test_unknown_preset(self):
+        self.assertRaises(ValueError, MODSReader, os.path.join(test_dir_path, 'title_xml.xml'), preset='quick')
+
+    def test_accessors_unchanged(self):
+        for preset in PARSER_PRESETS:
+            for fixture in self.fixtures:
+                path = os.path.join(test_dir_path, fixture)
+                default, tuned = list(MODSReader(path)), list(MODSReader(path, preset=preset))
+                self.assertEqual(len(default), len(tuned))
+                for old, new in zip(default, tuned):
+                    self.assertEqual({}, field_differences(old, new), (preset, fixture))
+
+    def test_fast_drops_blank_text(self):
+        record = next(MODSReader(os.path.join(test_dir_path, 'title_xml.xml'), preset='fast'))
+        self.assertIsNone(record.text)
+        self.assertIsNone(record[0].tail)
+
+    def test_huge_text(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'huge.xml')
+            with open(path, 'wb') as f:
+                f.write(b'<mods xmlns="http://www.loc.gov/mods/v3"><abstract>' + b'a' * 10000001 + b'</abstract></mods>')
+            self.assertRaises(etree.XMLSyntaxError, list, MODSReader(path))
+            self.assertEqual(10000001, len(next(MODSReader(path, preset='huge')).abstract[0].text))
+
+    def test_strict_entities(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'entity.xml')
+            with open(path, 'w') as f:
+                f.write('<!DOCTYPE mods [<!ENTITY place "Tallahassee">]>'
+                        '<mods xmlns="http://www.loc.gov/mods/v3"><note>&place;</note></mods>')
+            self.assertEqual('Tallahassee', next(MODSReader(path)).note[0].text)
+            self.assertNotEqual('Tallahassee', next(MODSReader(path, preset='strict')).note[0].text)
+
+
+class BatchesTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'records.xml')
+        sizes = [10, 10, 2000, 10, 10, 10]
+        with open(self.path, 'w') as f:
+            f.write('<modsCollection xmlns="http://www.loc.gov/mods/v3">')
+            for number, size in enumerate(sizes):
+                f.write('<mods><identifier type="IID">{0}</identifier><note>{1}</note></mods>'.format(number, 'x' * size))
+            f.write('</modsCollection>')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def keys(self, batches):
+        return [[record.iid for record in batch] for batch in batches]
+
+    def test_max_records(self):
+        self.assertEqual([['0', '1', '2', '3'], ['4', '5']], self.keys(MODSReader(self.path).batches(max_records=4)))
+
+    def test_max_bytes(self):
+        # small records are 85 bytes, the large one 2075
+        self.assertEqual([['0', '1'], ['2'], ['3', '4', '5']],
+                         self.keys(MODSReader(self.path).batches(max_records=None, max_bytes=300)))
+
+    def test_both_limits(self):
+        self.assertEqual([['0', '1'], ['2'], ['3', '4'], ['5']],
+                         self.keys(MODSReader(self.path).batches(max_records=2, max_bytes=300)))
+
+    def test_invalid_limits(self):
+        reader = MODSReader(self.path)
+        self.assertRaises(ValueError, reader.batches, max_records=None)
+        self.assertRaises(ValueError, reader.batches, max_records=0)
+        self.assertRaises(ValueError, reader.batches, max_bytes=0)
+
+    def test_yield_when_full(self):
+        parsed = []
+        reader = MODSReader(self.path)
+        parse_span = reader.parse_span
+        reader.parse_span = lambda scanner, span: parsed.append(span) or parse_span(scanner, span)
+        first = next(reader.batches(max_records=2))
+        self.assertEqual(2, len(first))
+        self.assertEqual(2, len(parsed))
+
+    def test_resume(self):
+        checkpoint = os.path.join(self.directory.name, 'run.checkpoint')
+        records = MODSReader(self.path, checkpoint=Checkpointer(checkpoint, every=1))
+        next(records)
+        next(records)
+        resumed = MODSReader(self.path, resume_from=checkpoint)
+        self.assertEqual([['1', '2', '3'], ['4', '5']], self.keys(resumed.batches(max_records=3)))
+
+    def test_checkpoint_per_batch(self):
+        checkpoint = os.path.join(self.directory.name, 'run.checkpoint')
+        batches = MODSReader(self.path, checkpoint=Checkpointer(checkpoint, every=1)).batches(max_records=2)
+        next(batches)
+        self.assertIsNone(load_checkpoint(checkpoint))
+        next(batches)
+        # stopped while processing the second batch
+        self.assertEqual(2, load_checkpoint(checkpoint).ordinal)
+        resumed = MODSReader(self.path, resume_from=checkpoint)
+        self.assertEqual([['2', '3'], ['4', '5']], self.keys(resumed.batches(max_records=2)))
+
+    def test_checkpoint_exhausted(self):
+        checkpoint = os.path.join(self.directory.name, 'run.checkpoint')
+        list(MODSReader(self.path, checkpoint=Checkpointer(checkpoint, every=100)).batches(max_records=4))
+        self.assertEqual(6, load_checkpoint(checkpoint).ordinal)
+
+
+def first_title(record):
+    return record.metadata.titles[0]
+
+
+class PagedOAIReaderTests(unittest.TestCase):
+    """
+
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        page = StandInOAIHandler.page.replace('<request verb="ListRecords">',
+                                              '<request verb="ListRecords"{2}>')
+        record = StandInOAIHandler.record
+        # file names deliberately out of harvest order
+        pages = {'c.xml': (None, [0, 1], 'page2'), 'a.xml': ('page2', [2, 3], 'page3'),
+                 'b.xml': ('page3', [1, 4], None)}
+        for name, (token, numbers, next_token) in pages.items():
+            with open(os.path.join(self.directory.name, name), 'w') as f:
+                f.write(page.format(
+                    ''.join(record.format(number) for number in numbers),
+                    '<resumptionToken>{0}</resumptionToken>'.format(next_token) if next_token else '',
+                    ' resumptionToken="{0}"'.format(token) if token else ''))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chain_order(self):
+        reader = PagedOAIReader(self.directory.name, processes=1)
+        self.assertEqual(['c.xml', 'a.xml', 'b.xml'], [os.path.basename(page.path) for page in reader.pages])
+
+    def test_superseded_records(self):
+        urns = [record.oai_urn for record in PagedOAIReader(self.directory.name, processes=1)]
+        self.assertEqual(['oai:test:0', 'oai:test:2', 'oai:test:3', 'oai:test:1', 'oai:test:4'], urns)
+
+    def test_filename_fallback(self):
+        for name in os.listdir(self.directory.name):
+            path = os.path.join(self.directory.name, name)
+            with open(path) as f:
+                text = f.read()
+            with open(path, 'w') as f:
+                f.write(text.replace(' resumptionToken="', ' token="'))
+        reader = PagedOAIReader(self.directory.name, processes=1)
+        self.assertEqual(['a.xml', 'b.xml', 'c.xml'], [os.path.basename(page.path) for page in reader.pages])
+
+    def test_parallel_map(self):
+        titles = list(PagedOAIReader(self.directory.name, processes=2).map(first_title))
+        self.assertEqual(['Title 0', 'Title 2', 'Title 3', 'Title 1', 'Title 4'], titles)
+
+    def test_index_identifiers(self):
+        for page in PagedOAIReader(self.directory.name, processes=1).pages:
+            records = list(OAIReader(page.path))
+            self.assertEqual([record.oai_urn for record in records], [urn for urn, span in page.entries])
+
+    def test_record_identifier(self):
+        record = (b'<record><header status="deleted"><identifier>oai:test:a&amp;b</identifier>'
+                  b'<datestamp>2020-01-01</datestamp></header></record>')
+        self.assertEqual('oai:test:a&b', record_identifier(record))
+        self.assertIsNone(record_identifier(b'<record><header/></record>'))
+
+
 if __name__ == '__main__':
     unittest.main()
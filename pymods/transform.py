@@ -0,0 +1,90 @@
+"""
+XSLT transform stage. Stylesheets are compiled once per thread and applied to records
+from any pymods reader, optionally across a pool of threads (libxslt releases the GIL
+while it transforms).
+"""
+
+import collections
+import concurrent.futures
+import os
+import threading
+
+from lxml import etree
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+_compiled = threading.local()
+
+
+def compiled(stylesheet):
+    """
+    Compile a stylesheet, or return the copy already compiled in this thread. XSLT objects
+    are not shared between threads. A stylesheet file is recompiled if it has been modified.
+
+    :param stylesheet: A file path, or the stylesheet source as bytes.
+    :return: An etree.XSLT.
+    """
+    try:
+        cache = _compiled.cache
+    except AttributeError:
+        cache = _compiled.cache = {}
+    if isinstance(stylesheet, bytes):
+        key = stylesheet
+    else:
+        key = stylesheet, os.stat(stylesheet).st_mtime_ns
+    try:
+        return cache[key]
+    except KeyError:
+        source = etree.XML(stylesheet) if isinstance(stylesheet, bytes) else etree.parse(stylesheet)
+        transform = cache[key] = etree.XSLT(source)
+        return transform
+
+
+class Transform(object):
+    """
+    Applies an XSLT stylesheet to records. Results are returned as elements, which can be
+    passed straight to pymods.Writer or the exporters without serializing and reparsing.
+
+    Result elements use the element classes of the reader that parsed the input: read with
+    RecordReader for results in the class matching their format (e.g. DCRecord for oai_dc).
+    """
+
+    def __init__(self, stylesheet, workers=1, **params):
+        """
+        :param stylesheet: A file path, or the stylesheet source as bytes.
+        :param workers: Number of threads to transform records in.
+        :param params: Stylesheet parameters as XPath expressions. Quote strings with etree.XSLT.strparam().
+        """
+        self.stylesheet = stylesheet
+        self.workers = workers
+        self.params = params
+
+    def __call__(self, record):
+        """
+        :param record: A record.
+        :return: The result's root element, or the result as a string for text output.
+        """
+        result = compiled(self.stylesheet)(record, **self.params)
+        root = result.getroot()
+        return str(result) if root is None else root
+
+    def apply(self, reader):
+        """
+        Transform every record from a reader, in reader order. With more than one worker, at
+        most a few records per worker are read ahead of the consumer.
+
+        :param reader: Any pymods reader, or iterable of records.
+        :return: An iterator of results (see Transform.__call__).
+        """
+        if self.workers == 1:
+            for record in reader:
+                yield self(record)
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = collections.deque()
+            for record in reader:
+                pending.append(executor.submit(self, record))
+                if len(pending) >= self.workers * 4:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
@@ -0,0 +1,128 @@
+"""
+XML Schema validation of records. Schemas are compiled once per thread from local XSD
+files, and records can be validated in a pool of worker processes.
+
+Schemas that import others by URL (the MODS XSD imports xlink.xsd and xml.xsd) should be
+pointed at local copies with an XML catalog (the XML_CATALOG_FILES environment variable),
+so that loading a schema doesn't touch the network.
+"""
+
+import collections
+import concurrent.futures
+import os
+import threading
+
+from lxml import etree
+
+from pymods.parallel import ordered_results, parse_document, record_documents
+
+__pdoc__ = {}  # for pdoc documentation - http://pdoc.burntsushi.net/pdoc
+
+ValidationError = collections.namedtuple('ValidationError', 'ordinal offset length key messages')
+__pdoc__['ValidationError'] = 'A record that failed validation.'
+__pdoc__['ValidationError.ordinal'] = 'Zero-based position of the record in the document.'
+__pdoc__['ValidationError.offset'] = 'Byte offset of the record start tag.'
+__pdoc__['ValidationError.length'] = 'Length of the record in bytes.'
+__pdoc__['ValidationError.key'] = 'The record key (see Record.key), or None.'
+__pdoc__['ValidationError.messages'] = 'List of validation (or parser) error messages.'
+
+_schemas = threading.local()
+
+
+def schema(xsd):
+    """
+    Load a schema, or return the copy already loaded in this thread. Validators keep
+    per-validation state, so they are not shared between threads. A schema file is
+    reloaded if it has been modified.
+
+    :param xsd: Path to an XSD file.
+    :return: An etree.XMLSchema.
+    """
+    try:
+        cache = _schemas.cache
+    except AttributeError:
+        cache = _schemas.cache = {}
+    key = xsd, os.stat(xsd).st_mtime_ns
+    try:
+        return cache[key]
+    except KeyError:
+        compiled = cache[key] = etree.XMLSchema(etree.parse(xsd))
+        return compiled
+
+
+def _messages(error_log):
+    return ['line {0}: {1}'.format(error.line, error.message) for error in error_log]
+
+
+def _validate_documents(arguments):
+    xsd, iter_elem, documents = arguments
+    validator = schema(xsd)
+    errors = []
+    for span, document in documents:
+        try:
+            record = parse_document(document, iter_elem)
+        except etree.XMLSyntaxError as e:
+            errors.append(ValidationError(span.ordinal, span.offset, span.length, None, [str(e)]))
+            continue
+        if record is None:
+            # the span's element is in another namespace
+            continue
+        if not validator.validate(record):
+            errors.append(ValidationError(span.ordinal, span.offset, span.length, record.key,
+                                          _messages(validator.error_log)))
+    return errors
+
+
+class Validator(object):
+    """
+    Validates records against an XML Schema.
+    """
+
+    def __init__(self, xsd, processes=1, chunk_size=500):
+        """
+        :param xsd: Path to an XSD file.
+        :param processes: Number of worker processes for Validator.errors(). None uses every CPU.
+        :param chunk_size: Number of records sent to a worker process at a time.
+        """
+        self.xsd = xsd
+        self.processes = processes
+        self.chunk_size = chunk_size
+
+    def __call__(self, record):
+        """
+        :param record: A record.
+        :return: A list of error messages, empty if the record is valid.
+        """
+        validator = schema(self.xsd)
+        if validator.validate(record):
+            return []
+        return _messages(validator.error_log)
+
+    def is_valid(self, record):
+        """
+        :param record: A record.
+        :return: True if the record is valid.
+        """
+        return schema(self.xsd).validate(record)
+
+    def errors(self, reader):
+        """
+        Validate every record in a reader's file.
+
+        :param reader: A pymods reader. Records are read one at a time, whether or not the reader is streaming.
+        :return: An iterator of ValidationError elements for invalid records, in document order.
+            Malformed records are reported with the parser's error message.
+        """
+        chunks = ((self.xsd, reader.iter_elem, documents)
+                  for documents in record_documents(reader, self.chunk_size))
+        if self.processes == 1:
+            # the same code path as the worker processes, so results don't depend on processes
+            for arguments in chunks:
+                for error in _validate_documents(arguments):
+                    yield error
+            return
+        workers = self.processes or os.cpu_count()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            for errors in ordered_results(executor, _validate_documents, chunks, 2 * workers):
+                for error in errors:
+                    yield error
@@ -1,3 +1,77 @@
 """
-Not currently implemented. See README for a suggested MODSXML writing module.
+Incremental writing of records to an XML collection document.
 """
+
+import contextlib
+
+from lxml import etree
+
+from pymods.constants import NAMESPACES
+
+
+class Writer(object):
+    """
+    Writes records into a collection element as they arrive, using lxml's incremental
+    serializer, so memory use does not grow with the number of records written.
+    """
+
+    def __init__(self, output, root='{0}modsCollection'.format(NAMESPACES['mods']), nsmap=None, encoding='UTF-8'):
+        """
+        :param output: A file path or a binary file object.
+        :param root: Tag of the collection element in Clark notation.
+        :param nsmap: Namespace prefixes to declare on the collection element.
+            Defaults to {'mods': 'http://www.loc.gov/mods/v3'}.
+        :param encoding: Output encoding.
+        """
+        self.output = output
+        self.root = root
+        self.nsmap = {'mods': NAMESPACES['mods'].strip('{}')} if nsmap is None else nsmap
+        self.encoding = encoding
+        self.count = 0
+        self._stack = None
+        self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self):
+        """
+        Write the XML declaration and collection start tag.
+
+        :return: self
+        """
+        self._stack = contextlib.ExitStack()
+        self._file = self._stack.enter_context(etree.xmlfile(self.output, encoding=self.encoding))
+        self._file.write_declaration()
+        self._stack.enter_context(self._file.element(self.root, nsmap=self.nsmap))
+        return self
+
+    def close(self):
+        """
+        Write the collection end tag and close the output.
+        """
+        if self._stack is not None:
+            self._stack.close()
+        self._stack = None
+        self._file = None
+
+    def write(self, record):
+        """
+        :param record: A record element, or an element tree such as an XSLT result.
+        """
+        if hasattr(record, 'getroot'):
+            record = record.getroot()
+        self._file.write(record, with_tail=False)
+        self.count += 1
+
+    def write_all(self, records):
+        """
+        :param records: Any pymods reader, or iterable of records.
+        :return: Number of records written.
+        """
+        for record in records:
+            self.write(record)
+        return self.count
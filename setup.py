@@ -12,7 +12,9 @@ setup(
     name="pymods",
     version="2.0.14",
     packages=find_packages(exclude=['tests*']),
+    python_requires='>=3.7',
     install_requires=['lxml >= 2.3'],
+    extras_require={'numpy': ['numpy']},
     author="Matthew Miguez",
     author_email="r.m.miguez@gmail.com",
     description="Utility class wrapping lxml for reading data from MODS XML metadata into Python data types.",
@@ -26,10 +28,6 @@ setup(
         'Intended Audience :: Other Audience',
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',